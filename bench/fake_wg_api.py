@@ -0,0 +1,213 @@
+"""Локальний замінник Wargaming API для бенчмарків (без звернень до справжнього API)"""
+import asyncio
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+CLAN_ID = "500310423"
+TANK_TYPES = ('heavyTank', 'mediumTank', 'lightTank', 'AT-SPG', 'SPG')
+ACHIEVEMENTS = ('medalKay', 'medalCarius', 'warrior', 'invader', 'mainGun', 'defender', 'steelwall', 'sniper')
+
+class FakeWargamingAPI:
+    """aiohttp сервер з ендпоінтами, які використовує бот.
+
+    roster_size - кількість учасників клану, latency - затримка кожної відповіді (с),
+    rate_limit - максимум запитів за секунду (0 - без обмеження), як REQUEST_LIMIT_EXCEEDED у справжньому API.
+    """
+
+    def __init__(self, roster_size=100, tanks_per_player=40, latency=0.0, rate_limit=0, seed=1):
+        self.roster_size = roster_size
+        self.tanks_per_player = tanks_per_player
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.seed = seed
+        self.requests = Counter()
+        self.rate_limited = 0
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.runner = None
+        self.url = None
+        self.account_ids = [1000000 + i for i in range(roster_size)]
+        self.tank_ids = [(i + 1) * 256 + 1 for i in range(max(tanks_per_player * 3, 100))]
+
+    def reset_counters(self):
+        self.requests.clear()
+        self.rate_limited = 0
+
+    @property
+    def total_requests(self):
+        return sum(self.requests.values())
+
+    async def start(self, host='127.0.0.1', port=0):
+        app = web.Application()
+        app.router.add_get('/wot/{section}/{method}/', self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://{host}:{port}/wot"
+        return self.url
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def _limited(self):
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        if now - self.window_start >= 1:
+            self.window_start = now
+            self.window_count = 0
+        self.window_count += 1
+        return self.window_count > self.rate_limit
+
+    async def handle(self, request):
+        endpoint = f"{request.match_info['section']}/{request.match_info['method']}"
+        self.requests[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._limited():
+            self.rate_limited += 1
+            return web.json_response({'status': 'error', 'error': {'code': 407, 'message': 'REQUEST_LIMIT_EXCEEDED'}})
+
+        handler = getattr(self, endpoint.replace('/', '_'), None)
+        if handler is None:
+            return web.json_response({'status': 'error', 'error': {'code': 404, 'message': 'METHOD_NOT_FOUND'}})
+        return web.json_response({'status': 'ok', 'data': handler(request.query)})
+
+    def _ids(self, query, key):
+        return [value for value in query.get(key, '').split(',') if value]
+
+    def _rng(self, *key):
+        return random.Random(':'.join(map(str, (self.seed,) + key)))
+
+    def _clan(self, query):
+        """Усі клани замінника мають однаковий склад; за замовчуванням - клан UADRG"""
+        return query.get('clan_id', CLAN_ID)
+
+    def clans_list(self, query):
+        search = query.get('search', '').upper()
+        return [{'clan_id': int(CLAN_ID) + i, 'tag': f"{search}{i or ''}", 'name': f"Fake clan {i}"} for i in range(3)]
+
+    def clans_info(self, query):
+        members = [{'account_id': account_id, 'account_name': f"player_{account_id}", 'role': 'private'}
+                   for account_id in self.account_ids]
+        clan_id = self._clan(query)
+        return {clan_id: {
+            'clan_id': int(clan_id), 'tag': 'UADRG' if clan_id == CLAN_ID else f"C{clan_id[-4:]}",
+            'name': 'Fake clan', 'motto': '',
+            'members_count': len(members), 'created_at': 1500000000, 'emblems': {},
+            'members': members,
+        }}
+
+    def clanratings_clans(self, query):
+        rng = self._rng('rating')
+        return {self._clan(query): {
+            'efficiency': {'value': rng.randint(1000, 2000), 'rank': rng.randint(1, 5000)},
+            'battles_count_avg': {'value': rng.randint(5000, 20000), 'rank': rng.randint(1, 5000)},
+            'wins_ratio_avg': {'value': round(rng.uniform(45, 60), 2), 'rank': rng.randint(1, 5000)},
+        }}
+
+    def stronghold_statistics(self, query):
+        rng = self._rng('stronghold')
+        return {self._clan(query): {
+            'total_battles_count': rng.randint(500, 2000), 'wins': rng.randint(200, 1000),
+            'industrial_resource': rng.randint(10000, 90000), 'reserved_industrial_resource': rng.randint(0, 5000),
+        }}
+
+    def stronghold_battles(self, query):
+        rng = self._rng('battles')
+        limit = int(query.get('limit', 10))
+        return {self._clan(query): [{'result': rng.choice(('victory', 'defeat')), 'time': 1700000000 + i * 3600,
+                           'type': 'attack', 'level': 10} for i in range(limit)]}
+
+    def stronghold_accountstats(self, query):
+        data = {}
+        for account_id in self._ids(query, 'account_id'):
+            rng = self._rng('accountstats', account_id)
+            battles = rng.randint(0, 3000)
+            data[account_id] = {'battles_count': battles, 'wins': rng.randint(0, battles),
+                                'industrial_resource_earned': rng.randint(0, 200000)}
+        return data
+
+    def account_list(self, query):
+        search = query.get('search', '')
+        limit = int(query.get('limit', 100))
+        if query.get('type') == 'exact':
+            names = {name.lower() for name in search.split(',')}
+            matches = lambda nickname: nickname.lower() in names
+        else:
+            matches = lambda nickname: nickname.lower().startswith(search.lower())
+        return [{'account_id': account_id, 'nickname': f"player_{account_id}"}
+                for account_id in self.account_ids if matches(f"player_{account_id}")][:limit]
+
+    def account_info(self, query):
+        data = {}
+        for account_id in self._ids(query, 'account_id'):
+            rng = self._rng('info', account_id)
+            battles = rng.randint(1000, 60000)
+            data[account_id] = {'account_id': int(account_id), 'nickname': f"player_{account_id}",
+                                'global_rating': rng.randint(1000, 12000),
+                                'last_battle_time': 1700000000 + rng.randint(0, 86400 * 30),
+                                'statistics': {'all': {'battles': battles, 'wins': int(battles * rng.uniform(0.45, 0.6)),
+                                                       'damage_dealt': int(battles * rng.uniform(600, 2500))}}}
+        return data
+
+    def _tanks(self, account_id):
+        rng = self._rng('tanks', account_id)
+        tanks = []
+        for tank_id in rng.sample(self.tank_ids, self.tanks_per_player):
+            battles = rng.randint(1, 2000)
+            tanks.append({
+                'tank_id': tank_id, 'mark_of_mastery': rng.randint(0, 4), 'battles': battles,
+                'wins': int(battles * rng.uniform(0.4, 0.65)), 'damage_dealt': int(battles * rng.uniform(300, 3000)),
+                'spotted': int(battles * rng.uniform(0.3, 2.0)), 'frags': int(battles * rng.uniform(0.3, 1.5)),
+                'dropped_capture_points': int(battles * rng.uniform(0.1, 1.5)),
+            })
+        return tanks
+
+    def account_tanks(self, query):
+        return {account_id: [{'tank_id': tank['tank_id'], 'mark_of_mastery': tank['mark_of_mastery'],
+                              'statistics': {'battles': tank['battles'], 'wins': tank['wins']}}
+                             for tank in self._tanks(account_id)]
+                for account_id in self._ids(query, 'account_id')}
+
+    def tanks_stats(self, query):
+        # Як і справжній ендпоінт, приймає лише один account_id
+        account_id = query.get('account_id', '')
+        stat_fields = ('battles', 'wins', 'damage_dealt', 'spotted', 'frags', 'dropped_capture_points')
+        return {account_id: [{'tank_id': tank['tank_id'], 'all': {field: tank[field] for field in stat_fields}}
+                             for tank in self._tanks(account_id)]}
+
+    def expected_values(self):
+        """Таблиця очікуваних значень WN8 для танків замінника (формат XVM)"""
+        rows = []
+        for tank_id in self.tank_ids:
+            rng = self._rng('expected', tank_id)
+            rows.append({'IDNum': tank_id, 'expDamage': rng.uniform(400, 2500), 'expSpot': rng.uniform(0.5, 1.5),
+                         'expFrag': rng.uniform(0.5, 1.2), 'expDef': rng.uniform(0.3, 1.0),
+                         'expWinRate': rng.uniform(48, 54)})
+        return {'header': {'version': 'bench'}, 'data': rows}
+
+    def account_achievements(self, query):
+        data = {}
+        for account_id in self._ids(query, 'account_id'):
+            rng = self._rng('achievements', account_id)
+            data[account_id] = {'achievements': {name: rng.randint(1, 50) for name in ACHIEVEMENTS}}
+        return data
+
+    def encyclopedia_vehicles(self, query):
+        requested = self._ids(query, 'tank_id') or [str(tank_id) for tank_id in self.tank_ids]
+        data = {}
+        for tank_id in requested:
+            rng = self._rng('vehicle', tank_id)
+            data[tank_id] = {'tank_id': int(tank_id), 'name': f"Tank {tank_id}", 'short_name': f"T{tank_id}",
+                             'tier': rng.randint(1, 10), 'type': rng.choice(TANK_TYPES), 'nation': 'ussr'}
+        return data
+
+    def encyclopedia_achievements(self, query):
+        return {name: {'name': name, 'description': f"Опис {name}", 'section': 'battle'} for name in ACHIEVEMENTS}
@@ -0,0 +1,261 @@
+"""Замінники об'єктів Discord для виклику обробників команд поза шлюзом"""
+import asyncio
+import collections
+import itertools
+
+_ids = itertools.count(1)
+
+class FakeMessage:
+    def __init__(self, content=None, embed=None, **kwargs):
+        self.id = next(_ids)
+        self.content = content
+        self.embed = embed
+        self.kwargs = kwargs
+
+    async def add_reaction(self, emoji):
+        pass
+
+    async def remove_reaction(self, emoji, member):
+        pass
+
+    async def clear_reactions(self):
+        pass
+
+    async def edit(self, **kwargs):
+        self.kwargs.update(kwargs)
+
+    async def delete(self, **kwargs):
+        pass
+
+class FakeFollowup:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        message = FakeMessage(content, embed, **kwargs)
+        self.messages.append(message)
+        return message
+
+class FakeResponse:
+    def __init__(self, followup):
+        self.followup = followup
+        self.deferred = False
+
+    async def defer(self, **kwargs):
+        self.deferred = True
+
+    async def send_message(self, content=None, *, embed=None, **kwargs):
+        await self.followup.send(content, embed=embed, **kwargs)
+
+    def is_done(self):
+        return self.deferred or bool(self.followup.messages)
+
+class FakeUser:
+    def __init__(self, user_id=1, name='bench'):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+
+class FakeInteraction:
+    def __init__(self, user=None, guild=None):
+        self.id = next(_ids)
+        self.user = user or FakeUser()
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.followup = FakeFollowup()
+        self.response = FakeResponse(self.followup)
+        self.extras = {}
+        self.command = None
+        self.original_edits = []
+        self.original_deleted = False
+
+    async def edit_original_response(self, **kwargs):
+        self.original_edits.append(kwargs)
+
+    async def delete_original_response(self):
+        self.original_deleted = True
+
+    @property
+    def messages(self):
+        return self.followup.messages
+
+    def failed(self):
+        """Чи відповіла команда повідомленням про помилку"""
+        return any(m.content and ('Помилка' in m.content or 'Не вдалося' in m.content) for m in self.messages)
+
+async def no_reactions(*args, **kwargs):
+    """Замінник bot.wait_for: ніхто не гортає сторінки"""
+    raise asyncio.TimeoutError
+
+async def invoke(bot, name, interaction, **kwargs):
+    """Викликає обробник slash-команди напряму"""
+    command = bot.tree.get_command(name)
+    if command is None:
+        raise KeyError(f"Команду {name} не знайдено")
+    interaction.command = command
+    await command.callback(interaction, **kwargs)
+    return interaction
+
+class FakeREST:
+    """Імітація REST API Discord: затримка відповіді та глобальний ліміт запитів за секунду"""
+
+    def __init__(self, latency=0.05, rate=50):
+        self.latency = latency
+        self.rate = rate
+        self.calls = collections.Counter()
+        self.queued = 0
+        self.peak_queued = 0
+        self._next_slot = 0.0
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+    async def request(self, route):
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1 / self.rate
+        try:
+            await asyncio.sleep(slot - now + self.latency)
+        finally:
+            self.queued -= 1
+        self.calls[route] += 1
+
+class FakeRole:
+    def __init__(self, role_id, guild):
+        self.id = role_id
+        self.guild = guild
+        self.mention = f"<@&{role_id}>"
+
+    def is_default(self):
+        return self.id == self.guild.id
+
+class FakeSentMessage:
+    def __init__(self, rest, channel):
+        self.id = next(_ids)
+        self.rest = rest
+        self.channel = channel
+
+    async def delete(self, **kwargs):
+        await self.rest.request('DELETE /channels/{channel_id}/messages/{message_id}')
+
+class FakeTextChannel:
+    def __init__(self, channel_id, guild, rest):
+        self.id = channel_id
+        self.guild = guild
+        self.rest = rest
+        self.mention = f"<#{channel_id}>"
+        self.members = []
+
+    async def send(self, content=None, **kwargs):
+        await self.rest.request('POST /channels/{channel_id}/messages')
+        return FakeSentMessage(self.rest, self)
+
+class FakeVoiceChannel(FakeTextChannel):
+    pass
+
+class FakeVoiceState:
+    def __init__(self, channel=None):
+        self.channel = channel
+
+class FakeMember(FakeUser):
+    def __init__(self, member_id, guild, rest, bot=False):
+        super().__init__(member_id, f"member_{member_id}")
+        self.guild = guild
+        self.rest = rest
+        self.bot = bot
+        self.roles = [guild.default_role]
+        self.voice = None
+        self.joined_at = None
+
+    async def send(self, content=None, **kwargs):
+        await self.rest.request('POST /users/@me/channels')
+        await self.rest.request('POST /channels/{channel_id}/messages')
+
+    async def edit(self, **kwargs):
+        await self.rest.request('PATCH /guilds/{guild_id}/members/{user_id}')
+        if 'roles' in kwargs:
+            self.roles = [self.guild.default_role] + list(kwargs['roles'])
+
+    async def move_to(self, channel, **kwargs):
+        await self.rest.request('PATCH /guilds/{guild_id}/members/{user_id}')
+
+    async def add_roles(self, *roles, **kwargs):
+        for role in roles:
+            await self.rest.request('PUT /guilds/{guild_id}/members/{user_id}/roles/{role_id}')
+            if role not in self.roles:
+                self.roles.append(role)
+
+    async def remove_roles(self, *roles, **kwargs):
+        for role in roles:
+            await self.rest.request('DELETE /guilds/{guild_id}/members/{user_id}/roles/{role_id}')
+            if role in self.roles:
+                self.roles.remove(role)
+
+class FakeGatewayMessage:
+    def __init__(self, author, channel, content=''):
+        self.id = next(_ids)
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content
+
+class FakeGuild:
+    """Сервер, створений лише з кешу (як після GUILD_CREATE), всі REST виклики йдуть у FakeREST"""
+
+    def __init__(self, guild_id, rest, shard_id=0):
+        self.id = guild_id
+        self.name = f"guild_{guild_id}"
+        self.rest = rest
+        self.shard_id = shard_id
+        self.owner_id = 0
+        self.default_role = FakeRole(guild_id, self)
+        self._members = {}
+        self._channels = {}
+        self._roles = {guild_id: self.default_role}
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    @property
+    def channels(self):
+        return list(self._channels.values())
+
+    @property
+    def voice_channels(self):
+        return [channel for channel in self._channels.values() if isinstance(channel, FakeVoiceChannel)]
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+    def get_role(self, role_id):
+        return self._roles.get(role_id)
+
+    def member(self, member_id):
+        if member_id not in self._members:
+            self._members[member_id] = FakeMember(member_id, self, self.rest)
+        return self._members[member_id]
+
+    def role(self, role_id):
+        if role_id not in self._roles:
+            self._roles[role_id] = FakeRole(role_id, self)
+        return self._roles[role_id]
+
+    def text_channel(self, channel_id):
+        if channel_id not in self._channels:
+            self._channels[channel_id] = FakeTextChannel(channel_id, self, self.rest)
+        return self._channels[channel_id]
+
+    def voice_channel(self, channel_id):
+        if channel_id not in self._channels:
+            self._channels[channel_id] = FakeVoiceChannel(channel_id, self, self.rest)
+        return self._channels[channel_id]
@@ -0,0 +1,230 @@
+"""Навантажувальний тест обробників подій: відтворення синтетичних або записаних потоків подій шлюзу.
+
+REST виклики Discord імітуються (затримка + глобальний ліміт), сервери, канали та учасники
+створюються в кеші бота так, ніби вони прийшли з GUILD_CREATE.
+
+Приклади:
+    python -m bench.replay --scenario message_flood --events 20000 --rate 2000
+    python -m bench.replay --scenario voice_churn --members 5000 --events 20000
+    python -m bench.replay --scenario mute_expiry --members 10000
+    python -m bench.replay --scenario voice_churn --dump churn.jsonl
+    python -m bench.replay --stream churn.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+from tabulate import tabulate
+
+import core
+import tracking
+from cogs import notifications, voice
+from bench.fakes import FakeGatewayMessage, FakeGuild, FakeREST, FakeVoiceState
+from bench.run import percentile
+
+GUILD_ID = 100
+AFK_CHANNEL = 900
+LOG_CHANNEL = 901
+VOICE_CHANNELS = tuple(range(910, 930))
+TEXT_CHANNELS = tuple(range(500, 520))
+FIRST_MEMBER = 10 ** 6
+
+# Формат події (один JSON об'єкт на рядок у записаному потоці):
+#   {"type": "message", "at": 0.1, "guild": 100, "channel": 500, "author": 1000001}
+#   {"type": "voice", "at": 0.2, "guild": 100, "member": 1000001, "before": null, "after": 910}
+#   {"type": "tick", "at": 5.0, "job": "check_voice_activity"}
+#   {"type": "notify", "guild": 100, "channel": 500, "roles": [7]}
+#   {"type": "track", "guild": 100, "voice_channel": 900, "log_channel": 901}
+#   {"type": "idle", "guild": 100, "member": 1000001, "minutes": 16}
+#   {"type": "mute", "guild": 100, "member": 1000001, "roles": [7]}
+
+def message_flood(events, rate, authors=1000, notify_channels=2, seed=1):
+    """Потік повідомлень у текстові канали, частина з яких налаштована для сповіщень"""
+    rng = random.Random(seed)
+    for channel in TEXT_CHANNELS[:notify_channels]:
+        yield {'type': 'notify', 'guild': GUILD_ID, 'channel': channel, 'roles': [7]}
+    for i in range(events):
+        yield {'type': 'message', 'at': i / rate, 'guild': GUILD_ID,
+               'channel': rng.choice(TEXT_CHANNELS), 'author': FIRST_MEMBER + rng.randrange(authors)}
+
+def voice_churn(events, rate, members=5000, idle_fraction=0.05, tick=1.0, seed=1):
+    """Заходи/виходи/переходи між голосовими каналами тисяч учасників разом з фоновими циклами"""
+    rng = random.Random(seed)
+    yield {'type': 'track', 'guild': GUILD_ID, 'voice_channel': AFK_CHANNEL, 'log_channel': LOG_CHANNEL}
+
+    location = {}
+    for member in rng.sample(range(FIRST_MEMBER, FIRST_MEMBER + members), int(members * idle_fraction)):
+        location[member] = AFK_CHANNEL
+        yield {'type': 'voice', 'at': 0, 'guild': GUILD_ID, 'member': member, 'before': None, 'after': AFK_CHANNEL}
+        yield {'type': 'idle', 'guild': GUILD_ID, 'member': member, 'minutes': rng.choice((11, 16))}
+
+    next_tick = 0.0
+    for i in range(events):
+        at = i / rate
+        while at >= next_tick:
+            for job in ('update_voice_activity', 'check_voice_activity'):
+                yield {'type': 'tick', 'at': next_tick, 'job': job}
+            next_tick += tick
+        member = FIRST_MEMBER + rng.randrange(members)
+        before = location.get(member)
+        after = None if before and rng.random() < 0.5 else rng.choice(VOICE_CHANNELS + (AFK_CHANNEL,))
+        location[member] = after
+        yield {'type': 'voice', 'at': at, 'guild': GUILD_ID, 'member': member, 'before': before, 'after': after}
+
+def mute_expiry(members=10000, seed=1):
+    """Масове зняття мутів: всі мути вже прострочені на момент перевірки"""
+    for member in range(FIRST_MEMBER, FIRST_MEMBER + members):
+        yield {'type': 'mute', 'guild': GUILD_ID, 'member': member, 'roles': [7]}
+    yield {'type': 'tick', 'at': 0, 'job': 'check_mutes'}
+
+class Replay:
+    def __init__(self, rest):
+        self.rest = rest
+        self.guilds = {}
+
+    def guild(self, guild_id):
+        if guild_id not in self.guilds:
+            guild = self.guilds[guild_id] = FakeGuild(guild_id, self.rest)
+            core.bot._connection._guilds[guild_id] = guild
+        return self.guilds[guild_id]
+
+    def apply(self, event):
+        """Оновлює кеш як шлюз і повертає корутину обробника (або None для подій налаштування)"""
+        kind = event['type']
+        if kind == 'tick':
+            return core.shard_jobs[event['job']](None)
+
+        guild = self.guild(event['guild'])
+        if kind == 'message':
+            author = guild.member(event['author'])
+            message = FakeGatewayMessage(author, guild.text_channel(event['channel']))
+            return notifications.on_message(message)
+
+        if kind == 'voice':
+            member = guild.member(event['member'])
+            before = guild.voice_channel(event['before']) if event['before'] else None
+            after = guild.voice_channel(event['after']) if event['after'] else None
+            if before and member in before.members:
+                before.members.remove(member)
+            if after:
+                after.members.append(member)
+            member.voice = FakeVoiceState(after) if after else None
+            return voice.on_voice_state_update(member, FakeVoiceState(before), FakeVoiceState(after))
+
+        if kind == 'notify':
+            guild.text_channel(event['channel'])
+            core.notification_channels[str(event['channel'])] = {'guild_id': guild.id, 'roles': event['roles']}
+        elif kind == 'track':
+            guild.voice_channel(event['voice_channel'])
+            guild.text_channel(event['log_channel'])
+            core.tracked_channels[guild.id] = {'voice_channel': event['voice_channel'],
+                                                  'log_channel': event['log_channel'], 'delete_after': 0}
+        elif kind == 'idle':
+            core.voice_time_tracker[guild.id][event['member']] = time.time() - event['minutes'] * 60
+        elif kind == 'mute':
+            guild.member(event['member'])
+            for role_id in event['roles']:
+                guild.role(role_id)
+            core.muted_users.setdefault(guild.id, tracking.GuildMutes()).add(
+                event['member'], tracking.Mute(time.time() - 60, None, 'bench', None, event['roles']))
+        return None
+
+async def sample_loop_lag(samples, interval=0.01):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+async def replay(events, rest, speed=1.0):
+    core.bot.loop = asyncio.get_running_loop()
+    await core.bot.load_extensions()
+
+    engine = Replay(rest)
+    durations = defaultdict(list)
+    tasks = []
+    lag = []
+    sampler = asyncio.create_task(sample_loop_lag(lag))
+
+    async def timed(kind, coro):
+        started = time.perf_counter()
+        await coro
+        durations[kind].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for event in events:
+        delay = event.get('at', 0) / speed - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        coro = engine.apply(event)
+        if coro is not None:
+            kind = event['job'] if event['type'] == 'tick' else event['type']
+            # Як і discord.py, кожна подія обробляється в окремій задачі
+            tasks.append(asyncio.create_task(timed(kind, coro)))
+    dispatched = time.perf_counter() - started
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    return {'durations': durations, 'lag': lag, 'dispatched': dispatched, 'elapsed': elapsed, 'handled': len(tasks)}
+
+def print_report(result, rest):
+    print(f"Оброблено {result['handled']} подій за {result['elapsed']:.2f}с "
+          f"(відправлення {result['dispatched']:.2f}с), {result['handled'] / result['elapsed']:.0f} подій/с")
+
+    rows = []
+    for kind, values in sorted(result['durations'].items()):
+        rows.append([kind, len(values), f"{percentile(values, 0.5) * 1000:.2f}",
+                     f"{percentile(values, 0.95) * 1000:.2f}", f"{max(values) * 1000:.2f}"])
+    print(tabulate(rows, headers=['handler', 'events', 'p50_ms', 'p95_ms', 'max_ms'], tablefmt='github'))
+
+    lag = result['lag'] or [0.0]
+    print(f"\nЗатримка циклу подій: p50 {percentile(lag, 0.5) * 1000:.1f}мс, "
+          f"p99 {percentile(lag, 0.99) * 1000:.1f}мс, max {max(lag) * 1000:.1f}мс")
+
+    print(f"\nREST викликів: {rest.total}, максимум у черзі: {rest.peak_queued}")
+    print(tabulate(sorted(rest.calls.items()), headers=['route', 'calls'], tablefmt='github'))
+
+def build_events(args):
+    if args.stream:
+        with open(args.stream, 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    if args.scenario == 'message_flood':
+        return list(message_flood(args.events, args.rate))
+    if args.scenario == 'voice_churn':
+        return list(voice_churn(args.events, args.rate, members=args.members))
+    return list(mute_expiry(args.members))
+
+def main():
+    parser = argparse.ArgumentParser(description="Відтворення потоку подій шлюзу в обробники бота")
+    parser.add_argument('--scenario', choices=['message_flood', 'voice_churn', 'mute_expiry'], default='message_flood')
+    parser.add_argument('--stream', help="Файл JSON Lines із записаним потоком подій")
+    parser.add_argument('--dump', help="Записати згенерований потік у файл замість відтворення")
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--rate', type=float, default=1000, help="Подій за секунду")
+    parser.add_argument('--members', type=int, default=5000)
+    parser.add_argument('--speed', type=float, default=1.0, help="Множник швидкості відтворення")
+    parser.add_argument('--rest-latency-ms', type=float, default=50)
+    parser.add_argument('--rest-rate', type=float, default=50, help="Глобальний ліміт REST запитів за секунду")
+    args = parser.parse_args()
+
+    events = build_events(args)
+    if args.dump:
+        with open(args.dump, 'w') as f:
+            for event in events:
+                f.write(json.dumps(event) + '\n')
+        print(f"Записано {len(events)} подій у {args.dump}")
+        return
+
+    # Обробники зберігають стан у JSON файли поточного каталогу
+    os.chdir(tempfile.mkdtemp(prefix='wot-bot-replay-'))
+    rest = FakeREST(latency=args.rest_latency_ms / 1000, rate=args.rest_rate)
+    result = asyncio.run(replay(events, rest, speed=args.speed))
+    print_report(result, rest)
+
+if __name__ == '__main__':
+    main()
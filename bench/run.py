@@ -0,0 +1,151 @@
+"""Офлайн бенчмарк команд бота на локальному заміннику Wargaming API.
+
+Приклади:
+    python -m bench.run --roster 100 --latency-ms 20
+    python -m bench.run --scenario members_activity --save before
+    python -m bench.run --compare before
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from tabulate import tabulate
+
+import core
+from bench.fake_wg_api import FakeWargamingAPI
+from bench.fakes import FakeInteraction, invoke, no_reactions
+
+BASELINES_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+# назва сценарію -> (slash-команда, аргументи)
+SCENARIOS = {
+    'clan_info': ('clan_info', {}),
+    'stronghold': ('stronghold', {'days': 7}),
+    'clan_rating': ('clan_rating', {}),
+    'members_activity': ('members_activity', {'days': 7}),
+    'top_players': ('top_players', {'parameter': 'battles', 'days': 7}),
+    'player_tanks': ('player_tanks', {'nickname': 'player_1000000'}),
+    'player_achievements': ('player_achievements', {'nickname': 'player_1000000'}),
+    'clan_wn8': ('clan_wn8', {}),
+    'lineup': ('lineup', {'tier': 10, 'min_battles': 200}),
+    'compare': ('compare', {'nicknames': ','.join(f"player_{1000000 + i}" for i in range(10))}),
+}
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+async def run_scenario(server, name, iterations):
+    command, kwargs = SCENARIOS[name]
+    latencies = []
+    requests = []
+    rate_limited = 0
+    failures = 0
+
+    for _ in range(iterations):
+        server.reset_counters()
+        interaction = FakeInteraction()
+        started = time.perf_counter()
+        await invoke(core.bot, command, interaction, **kwargs)
+        latencies.append(time.perf_counter() - started)
+        requests.append(server.total_requests)
+        rate_limited += server.rate_limited
+        failures += interaction.failed()
+
+    # Окремий прогін під tracemalloc, щоб трасування не впливало на час
+    tracemalloc.start()
+    await invoke(core.bot, command, FakeInteraction(), **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'requests': round(sum(requests) / len(requests), 1),
+        'rate_limited': rate_limited,
+        'failures': failures,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+async def run(args):
+    server = FakeWargamingAPI(
+        roster_size=args.roster,
+        tanks_per_player=args.tanks,
+        latency=args.latency_ms / 1000,
+        rate_limit=args.rate_limit,
+    )
+    url = await server.start()
+    for api in core.wg_apis.values():
+        # Ліміт запитів моделює сам замінник (--rate-limit), квота бота не обмежує бенчмарк
+        api.base, api.api_key, api.rps = url, 'bench', 0
+    with open('wn8_expected.json', 'w') as f:
+        json.dump(server.expected_values(), f)
+    core.bot.wait_for = no_reactions
+    await core.bot.load_extensions()
+
+    results = {}
+    try:
+        for name in args.scenario or SCENARIOS:
+            results[name] = await run_scenario(server, name, args.iterations)
+    finally:
+        await core.close_wg_apis()
+        await server.stop()
+    return results
+
+def config_of(args):
+    return {'roster': args.roster, 'tanks': args.tanks, 'latency_ms': args.latency_ms,
+            'rate_limit': args.rate_limit, 'iterations': args.iterations}
+
+def print_results(results, baseline=None):
+    columns = ['p50_ms', 'p95_ms', 'requests', 'rate_limited', 'failures', 'peak_kib']
+    rows = []
+    for name, result in results.items():
+        row = [name]
+        for column in columns:
+            value = result[column]
+            old = (baseline or {}).get(name, {}).get(column)
+            if old:
+                value = f"{value} ({(value - old) / old * 100:+.0f}%)"
+            row.append(value)
+        rows.append(row)
+    print(tabulate(rows, headers=['scenario'] + columns, tablefmt='github'))
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн бенчмарк команд бота")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="Сценарій (можна вказати кілька разів, за замовчуванням всі)")
+    parser.add_argument('--roster', type=int, default=100, help="Кількість учасників клану")
+    parser.add_argument('--tanks', type=int, default=40, help="Кількість танків у кожного гравця")
+    parser.add_argument('--latency-ms', type=float, default=20, help="Затримка кожної відповіді API")
+    parser.add_argument('--rate-limit', type=int, default=0, help="Ліміт запитів за секунду (0 - без ліміту)")
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--save', metavar='NAME', help="Зберегти результати як базову лінію")
+    parser.add_argument('--compare', metavar='NAME', help="Порівняти з базовою лінією")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINES_DIR, f"{args.compare}.json"), 'r') as f:
+            stored = json.load(f)
+        if stored['config'] != config_of(args):
+            print(f"Увага: параметри базової лінії відрізняються: {stored['config']}")
+        baseline = stored['results']
+
+    # Команди записують історію та стан у файли поточного каталогу
+    os.chdir(tempfile.mkdtemp(prefix='wot-bot-bench-'))
+    results = asyncio.run(run(args))
+    print_results(results, baseline)
+
+    if args.save:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        with open(os.path.join(BASELINES_DIR, f"{args.save}.json"), 'w') as f:
+            json.dump({'config': config_of(args), 'results': results}, f, indent=2)
+        print(f"Базову лінію збережено: {args.save}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Пам'ять стану трекерів на учасника та час щохвилинних циклів на синтетичному великому сервері.
+
+REST виклики Discord імітуються без затримки; цикли вимірюються у стані, коли нікого не треба
+відключати чи розмучувати, тобто це чиста ціна перевірки.
+
+Приклади:
+    python -m bench.state --members 100000
+    python -m bench.state --members 100000 --in-voice 0.3 --idle 0.05 --muted 0.1
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from tabulate import tabulate
+
+import core
+import tracking
+from bench.fakes import FakeGuild, FakeInteraction, FakeREST
+
+GUILD_ID = 100
+AFK_CHANNEL = 900
+LOG_CHANNEL = 901
+VOICE_CHANNELS = tuple(range(910, 930))
+FIRST_MEMBER = 10 ** 6
+
+class ActiveChoice:
+    value = 'active'
+
+def traced(fill):
+    """Байтів пам'яті, виділених під час fill()"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fill()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used
+
+async def best_of(coro_factory, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+async def run(args):
+    core.bot.loop = asyncio.get_running_loop()
+    await core.bot.load_extensions()
+    voice, moderation = sys.modules['cogs.voice'], sys.modules['cogs.moderation']
+
+    rest = FakeREST(latency=0, rate=10 ** 9)
+    guild = FakeGuild(GUILD_ID, rest)
+    core.bot._connection._guilds[GUILD_ID] = guild
+    joined = datetime.now(timezone.utc)
+    for i in range(args.members):
+        guild.member(FIRST_MEMBER + i).joined_at = joined - timedelta(days=i % 900)
+    members = guild.members
+    channels = [guild.voice_channel(channel_id) for channel_id in VOICE_CHANNELS]
+    afk = guild.voice_channel(AFK_CHANNEL)
+    guild.text_channel(LOG_CHANNEL)
+    core.tracked_channels[GUILD_ID] = {'voice_channel': AFK_CHANNEL, 'log_channel': LOG_CHANNEL, 'delete_after': 0}
+
+    in_voice = int(args.members * args.in_voice)
+    idle = members[in_voice:in_voice + int(args.members * args.idle)]
+    muted = members[:int(args.members * args.muted)]
+    for i, member in enumerate(members[:in_voice]):
+        channels[i % len(channels)].members.append(member)
+    afk.members.extend(idle)
+
+    now = time.time()
+    rows = []
+
+    def fill_activity():
+        core.voice_activity.add_many([member.id for member in members], 0.0)
+    rows.append(['voice_activity', args.members, traced(fill_activity)])
+
+    def fill_tracker():
+        tracker = core.voice_time_tracker[GUILD_ID]
+        for member in idle:
+            tracker[member.id] = now - 120
+    rows.append(['voice_time_tracker', len(idle), traced(fill_tracker)])
+
+    def fill_mutes():
+        mutes = core.muted_users.setdefault(GUILD_ID, tracking.GuildMutes())
+        for member in muted:
+            mutes.add(member.id, tracking.Mute(now + 3600, None, 'bench', None, [7]))
+    rows.append(['muted_users', len(muted), traced(fill_mutes)])
+
+    print(tabulate([[name, count, f"{used / count:.1f}" if count else '-'] for name, count, used in rows],
+                   headers=['state', 'entries', 'bytes_per_entry'], tablefmt='github'))
+
+    core.last_activity_update[None] = now - 60
+    loops = {
+        'update_voice_activity': lambda: voice.update_voice_activity(None),
+        'check_voice_activity': lambda: voice.check_voice_activity(None),
+        'check_mutes': lambda: moderation.check_mutes(None),
+        'dis_stat': lambda: voice.dis_stat.callback(FakeInteraction(guild=guild), type=ActiveChoice(), limit=10),
+    }
+    timings = [[name, f"{await best_of(factory, args.repeat) * 1000:.1f}"] for name, factory in loops.items()]
+    print()
+    print(tabulate(timings, headers=['loop', 'best_ms'], tablefmt='github'))
+    print(f"\nREST викликів: {rest.total}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Пам'ять і час циклів стану трекерів на великому сервері")
+    parser.add_argument('--members', type=int, default=100000)
+    parser.add_argument('--in-voice', type=float, default=0.3, help="Частка учасників у голосових каналах")
+    parser.add_argument('--idle', type=float, default=0.05, help="Частка учасників у каналі неактивних")
+    parser.add_argument('--muted', type=float, default=0.1, help="Частка замучених учасників")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Обробники зберігають стан у JSON файли поточного каталогу
+    os.chdir(tempfile.mkdtemp(prefix='wot-bot-state-'))
+    asyncio.run(run(args))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Прості лінійні графіки на Pillow (викликати поза циклом подій)"""
+import io
+from datetime import datetime
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+COLORS = ((88, 101, 242), (87, 242, 135), (254, 231, 92), (237, 66, 69), (235, 69, 158))
+BACKGROUND = (47, 49, 54)
+GRID = (79, 84, 92)
+TEXT = (220, 221, 222)
+
+def _font(size):
+    # DejaVuSans є в більшості дистрибутивів і підтримує кирилицю
+    try:
+        return ImageFont.truetype('DejaVuSans.ttf', size)
+    except OSError:
+        return ImageFont.load_default()
+
+def _format_value(value):
+    if abs(value) >= 10000:
+        return f"{value / 1000:.0f}k"
+    if abs(value) >= 100 or float(value).is_integer():
+        return f"{value:.0f}"
+    return f"{value:.2f}"
+
+def line_chart(series, title, width=800, height=400):
+    """series: список (назва, ts, values). Повертає PNG у байтах"""
+    image = Image.new('RGB', (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    font = _font(13)
+    left, top, right, bottom = 60, 40, width - 20, height - 50
+
+    draw.text((left, 12), title, fill=TEXT, font=_font(16))
+    series = [(name, np.asarray(ts), np.asarray(values, dtype=np.float64)) for name, ts, values in series if len(ts)]
+    if not series:
+        draw.text((left, height // 2), "No data", fill=TEXT, font=font)
+        return _png(image)
+
+    all_ts = np.concatenate([ts for _, ts, _ in series])
+    all_values = np.concatenate([values for _, _, values in series])
+    t_min, t_max = all_ts.min(), max(all_ts.max(), all_ts.min() + 1)
+    v_min, v_max = all_values.min(), all_values.max()
+    if v_min == v_max:
+        v_min, v_max = v_min - 1, v_max + 1
+
+    for i in range(5):
+        y = top + (bottom - top) * i / 4
+        draw.line((left, y, right, y), fill=GRID)
+        draw.text((5, y - 7), _format_value(v_max - (v_max - v_min) * i / 4), fill=TEXT, font=font)
+    for i, ts in enumerate(np.linspace(t_min, t_max, 5)):
+        x = left + (right - left) * i / 4
+        label = datetime.utcfromtimestamp(int(ts)).strftime('%Y-%m-%d')
+        draw.text((x - 75 if i == 4 else x - 35 if i else x, bottom + 8), label, fill=TEXT, font=font)
+
+    for index, (name, ts, values) in enumerate(series):
+        color = COLORS[index % len(COLORS)]
+        xs = left + (ts - t_min) / (t_max - t_min) * (right - left)
+        ys = bottom - (values - v_min) / (v_max - v_min) * (bottom - top)
+        points = list(zip(xs.tolist(), ys.tolist()))
+        if len(points) > 1:
+            draw.line(points, fill=color, width=2)
+        else:
+            x, y = points[0]
+            draw.ellipse((x - 3, y - 3, x + 3, y + 3), fill=color)
+        draw.text((left + 10 + index * 180, height - 22), f"■ {name}", fill=color, font=font)
+
+    return _png(image)
+
+def _png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
@@ -0,0 +1,73 @@
+"""Відстежувані клани: регіон, ID та стан кожного клану (історія метрик, індекс танків, таблиці лідерів, стрічка досягнень)"""
+import asyncio
+import json
+import os
+
+import feed
+import inventory
+import leaderboards
+import timeseries
+
+# Регіон -> базова адреса Wargaming API
+REALMS = {
+    'eu': 'https://api.worldoftanks.eu/wot',
+    'na': 'https://api.worldoftanks.com/wot',
+    'asia': 'https://api.worldoftanks.asia/wot',
+}
+
+def parse_clan_key(value):
+    """'eu:500310423' -> ('eu', '500310423'); ID без регіону вважається кланом EU"""
+    realm, _, clan_id = value.strip().rpartition(':')
+    realm = realm.lower() or 'eu'
+    if realm not in REALMS or not clan_id.isdigit():
+        raise ValueError(f"Невірний клан: {value} (очікується регіон:ID, наприклад eu:500310423)")
+    return realm, clan_id
+
+class Clan:
+    def __init__(self, realm, clan_id, api, timeseries_dir, inventory_file, leaderboard_file, feed_file):
+        self.realm = realm
+        self.clan_id = str(clan_id)
+        self.key = f"{realm}:{self.clan_id}"
+        self.api = api
+        self.tag = None
+        self.metrics = timeseries.TimeSeriesStore(os.path.join(timeseries_dir, self.clan_id))
+        self.inventory_file = inventory_file
+        self.inventory = inventory.TankInventory()
+        self.inventory_lock = asyncio.Lock()
+        self.leaderboard_file = leaderboard_file
+        self.roster = None  # account_id -> [нікнейм, звання]
+        self.roster_at = None
+        self.leaderboards = leaderboards.Leaderboards()
+        self.feed_file = feed_file
+        self.feed = feed.AchievementFeed()
+
+    @property
+    def label(self):
+        return f"[{self.tag}] {self.realm.upper()}" if self.tag else f"{self.clan_id} ({self.realm.upper()})"
+
+    def store_key(self, name):
+        """Ключ результату клану у спільному сховищі воркера"""
+        return f"{self.clan_id}/{name}"
+
+    def load_inventory(self):
+        try:
+            self.inventory = inventory.TankInventory.load(self.inventory_file)
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            print(f"Не вдалося завантажити індекс танків клану {self.key}: {e}")
+
+    def load_leaderboards(self):
+        try:
+            self.leaderboards = leaderboards.Leaderboards.load(self.leaderboard_file)
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            print(f"Не вдалося завантажити таблиці лідерів клану {self.key}: {e}")
+
+    def load_feed(self):
+        try:
+            self.feed = feed.AchievementFeed.load(self.feed_file)
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            print(f"Не вдалося завантажити стрічку досягнень клану {self.key}: {e}")
+
+    def matches(self, value):
+        """Чи відповідає клан введеному тегу, ID або регіон:ID"""
+        value = value.strip().lower()
+        return value in (self.key, self.clan_id) or (self.tag is not None and value == self.tag.lower())
@@ -0,0 +1,221 @@
+"""Розширення прив'язаних акаунтів: /link зв'язує Discord з акаунтом WG, /me відповідає з фоново оновлюваного кешу"""
+import asyncio
+import time
+
+import discord
+from discord import app_commands
+
+import core
+import metrics
+from clans import REALMS
+from cogs.achievements import current_encyclopedia
+from cogs.wargaming import WG_MAX_IDS
+from core import (
+    ACCOUNT_REFRESH_MINUTES, ACHIEVEMENT_FEED_SECTIONS, account_dashboards, account_links, chunked,
+    mark_failed, refresh_scheduler, save_account_links, vehicle_names,
+)
+
+TOP_TANKS = 5
+INFO_FIELDS = 'nickname,global_rating,last_battle_time,statistics.all.battles,statistics.all.wins,' \
+              'statistics.all.damage_dealt'
+
+def dashboard_key(realm, account_id):
+    return f"{realm}:{account_id}"
+
+def build_dashboard(info, tanks, medals, stronghold, encyclopedia, notable):
+    """Компактний запис для /me: лише те, що показується, без повних відповідей API"""
+    stats = info['statistics']['all']
+    tanks = sorted(tanks or [], key=lambda tank: tank['statistics']['battles'], reverse=True)
+    stronghold = stronghold or {}
+    return {
+        'at': time.time(),
+        'nickname': info['nickname'],
+        'last_battle_time': info['last_battle_time'],
+        'rating': info.get('global_rating', 0),
+        'battles': stats['battles'],
+        'wins': stats['wins'],
+        'damage_dealt': stats['damage_dealt'],
+        'tanks': len(tanks),
+        'mastery': sum(1 for tank in tanks if tank.get('mark_of_mastery') == 4),
+        'top_tanks': [[tank['tank_id'], tank['statistics']['battles'], tank['statistics']['wins']]
+                      for tank in tanks[:TOP_TANKS]],
+        'medals': sum(medals.values()),
+        'notable': sorted(([encyclopedia.name(key), count] for key, count in medals.items() if key in notable),
+                          key=lambda row: row[1], reverse=True),
+        'stronghold': [stronghold.get('battles_count', 0), stronghold.get('wins', 0),
+                       stronghold.get('industrial_resource_earned', 0)],
+    }
+
+async def prefetch(realm, account_ids, force=False):
+    """Оновлює кеш акаунтів пакетами по WG_MAX_IDS. Спершу дешевий account/info для всіх; танки, досягнення
+    та укріпрайон запитуються лише для тих, хто зіграв нові бої (або всіх при force)"""
+    api = core.wg_apis[realm]
+    infos = {}
+    for batch in chunked([str(account_id) for account_id in account_ids], WG_MAX_IDS):
+        data = await api.make_request('account/info', {'account_id': ','.join(batch), 'fields': INFO_FIELDS})
+        if data['status'] == 'ok':
+            infos.update({account_id: info for account_id, info in data['data'].items() if info is not None})
+
+    changed = [account_id for account_id, info in infos.items()
+               if force or (account_dashboards.get(dashboard_key(realm, account_id)) or {}).get('last_battle_time')
+               != info['last_battle_time']]
+    for batch in chunked(changed, WG_MAX_IDS):
+        ids = ','.join(batch)
+        tanks, achievements, stronghold = await asyncio.gather(
+            api.make_request('account/tanks', {'account_id': ids,
+                                               'fields': 'tank_id,mark_of_mastery,statistics.battles,statistics.wins'}),
+            api.make_request('account/achievements', {'account_id': ids, 'fields': 'achievements'}),
+            api.make_request('stronghold/accountstats', {
+                'account_id': ids, 'fields': 'battles_count,wins,industrial_resource_earned'}),
+        )
+        if tanks['status'] != 'ok' or achievements['status'] != 'ok':
+            continue
+        medals = {account_id: (achievements['data'].get(account_id) or {}).get('achievements', {})
+                  for account_id in batch}
+        encyclopedia = await current_encyclopedia(api, {key for values in medals.values() for key in values})
+        notable = encyclopedia.notable(ACHIEVEMENT_FEED_SECTIONS)
+        for account_id in batch:
+            account_dashboards[dashboard_key(realm, account_id)] = build_dashboard(
+                infos[account_id], tanks['data'].get(account_id), medals[account_id],
+                stronghold['data'].get(account_id) if stronghold['status'] == 'ok' else None, encyclopedia, notable)
+
+    top_tanks = [tank for account_id in changed
+                 for tank in account_dashboards.get(dashboard_key(realm, account_id), {}).get('top_tanks', ())]
+    missing = sorted({tank_id for tank_id, _, _ in top_tanks if tank_id not in vehicle_names})
+    for batch in chunked(missing, WG_MAX_IDS):
+        data = await api.make_request('encyclopedia/vehicles', {
+            'tank_id': ','.join(map(str, batch)),
+            'fields': 'name,tier'
+        })
+        if data['status'] == 'ok':
+            vehicle_names.update({int(tank_id): [vehicle['name'], vehicle['tier']]
+                                  for tank_id, vehicle in data['data'].items() if vehicle is not None})
+    return len(changed)
+
+async def refresh_accounts(realm):
+    """Фонове оновлення всіх прив'язаних акаунтів регіону"""
+    linked = sorted({link['account_id'] for link in account_links.values() if link['realm'] == realm})
+    if not linked:
+        return
+    changed = await prefetch(realm, linked)
+    print(f"Прив'язані акаунти {realm.upper()}: оновлено {changed} з {len(linked)}")
+
+def schedule_accounts():
+    # Особисті дані оновлює сам бот (воркер опитує лише клани), тож планувальник потрібен і з INGEST_WORKER
+    for realm in {link['realm'] for link in account_links.values()}:
+        if f"accounts/{realm}" not in refresh_scheduler.entries:
+            refresh_scheduler.add(f"accounts/{realm}", 'accounts', realm, ACCOUNT_REFRESH_MINUTES,
+                                  refresh_accounts, realm)
+    if account_links:
+        refresh_scheduler.start()
+
+def dashboard_embed(dashboard, realm):
+    battles = dashboard['battles']
+    embed = discord.Embed(
+        title=f"{dashboard['nickname']} ({realm.upper()})",
+        description=f"Особистий рейтинг: **{dashboard['rating']}**",
+        color=discord.Color.blue()
+    )
+    embed.add_field(
+        name="Загальна статистика",
+        value=f"Боїв: {battles}\n"
+              f"Відсоток перемог: {dashboard['wins'] / battles * 100 if battles else 0:.2f}%\n"
+              f"Середня шкода: {round(dashboard['damage_dealt'] / battles) if battles else 0}",
+        inline=True
+    )
+    sh_battles, sh_wins, resources = dashboard['stronghold']
+    embed.add_field(
+        name="Укріпрайон",
+        value=f"Боїв: {sh_battles}\nПеремог: {sh_wins}\nПромресурс: {resources}",
+        inline=True
+    )
+    tanks = []
+    for tank_id, tank_battles, tank_wins in dashboard['top_tanks']:
+        name, tier = vehicle_names.get(tank_id, [f"Танк {tank_id}", '?'])
+        tanks.append(f"{name} (Рівень {tier}): {tank_battles} боїв, "
+                     f"{tank_wins / tank_battles * 100 if tank_battles else 0:.1f}%")
+    embed.add_field(
+        name=f"Танки: {dashboard['tanks']}, Майстер: {dashboard['mastery']}",
+        value='\n'.join(tanks) or "Немає даних",
+        inline=False
+    )
+    notable = ', '.join(f"{name} ×{count}" if count > 1 else name for name, count in dashboard['notable'][:10])
+    embed.add_field(
+        name=f"Досягнення: {dashboard['medals']} медалей",
+        value=notable or "Рідкісних медалей поки немає",
+        inline=False
+    )
+    embed.set_footer(text=f"Дані оновлено {time.strftime('%d.%m %H:%M', time.localtime(dashboard['at']))}")
+    return embed
+
+@app_commands.command(name="link", description="Прив'язати свій акаунт World of Tanks до Discord")
+@app_commands.describe(nickname="Ваш нікнейм у грі (у регіоні клану сервера)")
+async def link(interaction: discord.Interaction, nickname: str):
+    await interaction.response.defer(ephemeral=True)
+    clan = core.guild_clan(interaction.guild_id)
+    api, realm = clan.api, clan.realm
+    try:
+        # Єдиний пошук за нікнеймом - далі всі запити йдуть за account_id
+        found = await api.make_request('account/list', {'search': nickname, 'type': 'exact', 'limit': 1})
+        if found['status'] != 'ok' or not found['data']:
+            return await interaction.followup.send("Гравця не знайдено.", ephemeral=True)
+        account = found['data'][0]
+        account_links[interaction.user.id] = {'realm': realm, 'account_id': account['account_id'],
+                                              'nickname': account['nickname'], 'guild_id': interaction.guild_id}
+        save_account_links()
+        # Спершу власний запит, щоб перший фоновий запуск не дублював його
+        await prefetch(realm, [account['account_id']], force=True)
+        schedule_accounts()
+        await interaction.followup.send(
+            f"✅ Акаунт {account['nickname']} ({realm.upper()}) прив'язано. Ваша статистика: /me",
+            ephemeral=True
+        )
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}", ephemeral=True)
+
+@app_commands.command(name="unlink", description="Відв'язати акаунт World of Tanks")
+async def unlink(interaction: discord.Interaction):
+    linked = account_links.pop(interaction.user.id, None)
+    if linked is None:
+        return await interaction.response.send_message("❌ Акаунт не прив'язано", ephemeral=True)
+    save_account_links()
+    if not any(other['account_id'] == linked['account_id'] for other in account_links.values()):
+        account_dashboards.pop(dashboard_key(linked['realm'], linked['account_id']), None)
+    await interaction.response.send_message(f"✅ Акаунт {linked['nickname']} відв'язано", ephemeral=True)
+
+@app_commands.command(name="me", description="Моя статистика: танки, досягнення та укріпрайон")
+async def me(interaction: discord.Interaction):
+    linked = account_links.get(interaction.user.id)
+    if linked is None:
+        return await interaction.response.send_message("Спочатку прив'яжіть акаунт через /link", ephemeral=True)
+
+    key = dashboard_key(linked['realm'], linked['account_id'])
+    dashboard = account_dashboards.get(key)
+    if dashboard is not None:
+        metrics.dashboard_requests.inc('cache')
+        return await interaction.response.send_message(embed=dashboard_embed(dashboard, linked['realm']))
+
+    # Кеш ще не заповнено (наприклад одразу після перезапуску) - запит за account_id, без пошуку
+    metrics.dashboard_requests.inc('fetch')
+    await interaction.response.defer()
+    try:
+        await prefetch(linked['realm'], [linked['account_id']], force=True)
+        dashboard = account_dashboards.get(key)
+        if dashboard is None:
+            mark_failed(interaction)
+            return await interaction.followup.send("Не вдалося отримати статистику гравця.")
+        await interaction.followup.send(embed=dashboard_embed(dashboard, linked['realm']))
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+async def setup(bot):
+    for command in (link, unlink, me):
+        bot.tree.add_command(command)
+    schedule_accounts()
+
+async def teardown(bot):
+    # Команди модуля discord.py прибирає сам
+    for realm in REALMS:
+        refresh_scheduler.remove(f"accounts/{realm}")
@@ -0,0 +1,177 @@
+"""Розширення стрічки досягнень: зведення нових медалей і рубежів боїв учасників клану в канал сервера"""
+import asyncio
+import time
+
+import discord
+from discord import app_commands
+
+import core
+import feed
+import metrics
+from cogs.roster import fetch_clan_roster
+from cogs.wargaming import WG_MAX_IDS
+from core import (
+    ACHIEVEMENT_ENCYCLOPEDIA_FILE, ACHIEVEMENT_FEED_MINUTES, ACHIEVEMENT_FEED_SECTIONS, INGEST_WORKER,
+    achievement_channels, chunked, owns_guild, refresh_scheduler, save_achievement_channels, shard_guilds, shared_store,
+)
+
+MESSAGE_LIMIT = 2000
+
+async def current_encyclopedia(api, missing=()):
+    """Локальна енциклопедія медалей; завантажується з API, якщо застаріла або не знає отриманих медалей"""
+    async with core.encyclopedia_lock:
+        encyclopedia = core.achievement_encyclopedia
+        if encyclopedia.fetched_at is None:
+            loaded = await asyncio.to_thread(feed.Encyclopedia.load, ACHIEVEMENT_ENCYCLOPEDIA_FILE)
+            encyclopedia.entries, encyclopedia.fetched_at = loaded.entries, loaded.fetched_at
+        if encyclopedia.stale() or any(key not in encyclopedia.entries for key in missing):
+            data = await api.make_request('encyclopedia/achievements', {'fields': 'name,name_i18n,section'})
+            if data['status'] == 'ok':
+                encyclopedia.update(data['data'])
+                await asyncio.to_thread(encyclopedia.save, ACHIEVEMENT_ENCYCLOPEDIA_FILE)
+        return encyclopedia
+
+async def fetch_battles(clan, account_ids):
+    """account_id -> кількість боїв: один запит account/info на кожні WG_MAX_IDS гравців"""
+    battles = {}
+    for batch in chunked(account_ids, WG_MAX_IDS):
+        info = await clan.api.make_request('account/info', {
+            'account_id': ','.join(batch),
+            'fields': 'statistics.all.battles'
+        })
+        if info['status'] == 'ok':
+            for account_id, data in info['data'].items():
+                if data is not None:
+                    battles[account_id] = data['statistics']['all']['battles']
+    return battles
+
+async def refresh_feed(clan):
+    """Опитує склад клану; досягнення запитуються пакетами лише для гравців із новими боями,
+    а медалі порівнюються лише для тих, у кого змінився хеш досягнень"""
+    roster = await fetch_clan_roster(clan)
+    if roster is None:
+        return False
+    battles = await fetch_battles(clan, list(roster))
+    state = clan.feed
+    changed = state.changed(battles)
+
+    achievements = {}
+    for batch in chunked(changed, WG_MAX_IDS):
+        data = await clan.api.make_request('account/achievements', {
+            'account_id': ','.join(batch),
+            'fields': 'achievements'
+        })
+        if data['status'] == 'ok':
+            for account_id, account in data['data'].items():
+                if account is not None:
+                    achievements[account_id] = account['achievements']
+
+    encyclopedia = await current_encyclopedia(clan.api, {key for medals in achievements.values() for key in medals})
+    notable = encyclopedia.notable(ACHIEVEMENT_FEED_SECTIONS)
+    events = []
+    for account_id, medals in achievements.items():
+        for event in state.observe(account_id, roster[account_id][0], battles[account_id], medals, notable):
+            if event['kind'] == 'medal':
+                event['name'] = encyclopedia.name(event['key'])
+            events.append(event)
+            metrics.achievement_events.inc(event['kind'])
+    state.add_digest(events)
+    state.retain(roster)
+    # При кількох процесах файл пише лише процес із шардом 0
+    if owns_guild(0):
+        await asyncio.to_thread(state.save, clan.feed_file)
+    print(f"Стрічка досягнень {clan.label}: досягнення запитано для {len(changed)} з {len(roster)} гравців, "
+          f"{len(events)} подій")
+    return True
+
+async def current_digests(clan):
+    """Зведення клану; з воркером - зі спільного сховища"""
+    if INGEST_WORKER:
+        stored = await asyncio.to_thread(shared_store.get, clan.store_key('feed'))
+        return feed.AchievementFeed.from_dict(stored or {})
+    return clan.feed
+
+def schedule_feed(clan):
+    # Досягнення опитуються лише для кланів, на серверах яких налаштовано стрічку
+    if not INGEST_WORKER and f"{clan.key}/feed" not in refresh_scheduler.entries:
+        refresh_scheduler.add(f"{clan.key}/feed", 'feed', clan.realm, ACHIEVEMENT_FEED_MINUTES, refresh_feed, clan)
+
+def format_event(event):
+    if event['kind'] == 'battles':
+        return f"{event['value']:,} боїв".replace(',', ' ')
+    return event['name'] + (f" ×{event['value']}" if event['value'] > 1 else "")
+
+def digest_messages(clan, events):
+    """Одне зведення: рядок на гравця з усіма його подіями, розбите на повідомлення до ліміту Discord"""
+    by_player = {}
+    for event in events:
+        by_player.setdefault(event['nickname'], []).append(format_event(event))
+    lines = [f"🏅 **{nickname}**: {', '.join(items)}" for nickname, items in sorted(by_player.items())]
+
+    messages, current = [], f"**Досягнення клану {clan.label}**"
+    for line in lines:
+        if len(current) + len(line) + 1 > MESSAGE_LIMIT:
+            messages.append(current)
+            current = line
+        else:
+            current += "\n" + line
+    messages.append(current)
+    return messages
+
+async def publish_feed(shard_id=None):
+    """Надсилає на сервери шарда зведення, які з'явилися з часу останньої доставки"""
+    for guild in shard_guilds(shard_id):
+        config = achievement_channels.get(guild.id)
+        if config is None:
+            continue
+        clan = core.guild_clan(guild.id)
+        schedule_feed(clan)
+        events, latest = (await current_digests(clan)).pending(config['at'])
+        if latest == config['at']:
+            continue
+        channel = guild.get_channel(config['channel'])
+        if events and channel is not None:
+            try:
+                for content in digest_messages(clan, events):
+                    await channel.send(content)
+            except discord.HTTPException as e:
+                print(f"Не вдалося надіслати зведення досягнень на сервер {guild.id}: {e}")
+                continue
+        config['at'] = latest
+        save_achievement_channels()
+
+@app_commands.command(name="achievement_feed", description="Оголошувати нові медалі та рубежі боїв учасників клану")
+@app_commands.describe(channel="Канал для зведень", enabled="Увімкнути чи вимкнути стрічку")
+async def achievement_feed(interaction: discord.Interaction, channel: discord.TextChannel, enabled: bool = True):
+    if not interaction.user.guild_permissions.administrator:
+        return await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+
+    if enabled:
+        # Зведення, що накопичилися до налаштування, не надсилаються
+        achievement_channels[interaction.guild.id] = {'channel': channel.id, 'at': time.time()}
+        save_achievement_channels()
+        schedule_feed(core.guild_clan(interaction.guild.id))
+        await interaction.response.send_message(
+            f"✅ Зведення досягнень надсилатимуться в {channel.mention} (перевірка кожні {ACHIEVEMENT_FEED_MINUTES} хв)",
+            ephemeral=True
+        )
+    else:
+        config = achievement_channels.get(interaction.guild.id)
+        if config is None or config['channel'] != channel.id:
+            return await interaction.response.send_message(
+                f"❌ Для каналу {channel.mention} не налаштовано стрічку досягнень",
+                ephemeral=True
+            )
+        del achievement_channels[interaction.guild.id]
+        save_achievement_channels()
+        await interaction.response.send_message(f"✅ Стрічку досягнень у {channel.mention} вимкнено", ephemeral=True)
+
+async def setup(bot):
+    bot.tree.add_command(achievement_feed)
+    core.register_shard_job(publish_feed)
+
+async def teardown(bot):
+    # Команди модуля discord.py прибирає сам
+    core.unregister_shard_job(publish_feed)
+    for clan in core.tracked_clans.values():
+        refresh_scheduler.remove(f"{clan.key}/feed")
@@ -0,0 +1,128 @@
+"""Розширення діагностики (завантажується ліниво): профілювання та керування розширеннями"""
+import ast
+import asyncio
+import io
+import sys
+import threading
+from datetime import datetime
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import core
+import profiler
+from core import bot
+
+PROFILE_MAX_SECONDS = 120
+
+async def is_owner(interaction):
+    if await bot.is_owner(interaction.user):
+        return True
+    await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+    return False
+
+@app_commands.command(name="profile", description="Зняти профіль роботи бота (лише для власника)")
+@app_commands.describe(seconds="Тривалість профілювання в секундах (за замовчуванням 30)")
+async def profile(interaction: discord.Interaction, seconds: int = 30):
+    if not await is_owner(interaction):
+        return
+    
+    seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+    await interaction.response.defer(ephemeral=True)
+    
+    # Семплер працює в окремому потоці і знімає стек потоку циклу подій
+    sampler = profiler.SamplingProfiler(threading.get_ident())
+    await asyncio.to_thread(sampler.run, seconds)
+    
+    embed = discord.Embed(
+        title=f"📈 Профіль за {seconds}с",
+        description=f"Семплів: {sampler.sample_count}",
+        color=discord.Color.blue()
+    )
+    top = '\n'.join(
+        f"{count * 100 / sampler.sample_count:.1f}% {name[:90]}"
+        for name, count in sampler.top_functions(10)
+    ) if sampler.sample_count else "—"
+    embed.add_field(name="Найчастіші функції", value=f"```\n{top[:1000]}\n```", inline=False)
+    
+    data = io.BytesIO(sampler.folded().encode('utf-8'))
+    filename = f"profile-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.folded"
+    await interaction.followup.send(embed=embed, file=discord.File(data, filename=filename), ephemeral=True)
+
+@app_commands.command(name="extensions", description="Показати розширення бота та час їх завантаження (лише для власника)")
+async def extensions(interaction: discord.Interaction):
+    if not await is_owner(interaction):
+        return
+    
+    lines = []
+    for name in core.EXTENSIONS + tuple(core.LAZY_EXTENSIONS):
+        lazy = " (ліниве)" if name in core.LAZY_EXTENSIONS else ""
+        if name in bot.extensions:
+            lines.append(f"🟢 {name}{lazy} - {bot.extension_load_times.get(name, 0) * 1000:.1f} мс")
+        else:
+            lines.append(f"⚪ {name}{lazy} - не завантажено")
+    
+    embed = discord.Embed(title="🧩 Розширення", description='\n'.join(lines), color=discord.Color.blue())
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def extension_imports(name):
+    """Завантажені розширення, з яких розширення name імпортує функції чи константи (from cogs.x import ...)"""
+    path = getattr(sys.modules.get(name), '__file__', None)
+    if path is None:
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            imported.add(node.module)
+            imported.update(f"{node.module}.{alias.name}" for alias in node.names)
+        elif isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names)
+    return imported & (set(bot.extensions) - {name})
+
+def with_dependents(names):
+    """names разом із завантаженими розширеннями, що імпортують з них (транзитивно): інакше ті лишаться зі старими
+    функціями. Кожне розширення перезавантажується після тих, з яких імпортує"""
+    imports = {name: extension_imports(name) for name in bot.extensions}
+    selected = list(names)
+    for name in selected:
+        selected.extend(other for other, used in imports.items() if name in used and other not in selected)
+    ordered = []
+    while selected:
+        ready = [name for name in selected if not imports.get(name, set()) & set(selected)] or selected[:1]
+        ordered.extend(ready)
+        selected = [name for name in selected if name not in ready]
+    return ordered
+
+@app_commands.command(name="reload", description="Перезавантажити розширення без перепідключення (лише для власника)")
+@app_commands.describe(extension="Назва розширення, наприклад wargaming (за замовчуванням всі завантажені)")
+async def reload(interaction: discord.Interaction, extension: Optional[str] = None):
+    if not await is_owner(interaction):
+        return
+    
+    await interaction.response.defer(ephemeral=True)
+    if extension:
+        names = [extension if extension.startswith('cogs.') else f"cogs.{extension}"]
+    else:
+        names = [name for name in core.EXTENSIONS + tuple(core.LAZY_EXTENSIONS) if name in bot.extensions]
+    
+    lines = []
+    for name in with_dependents(names):
+        try:
+            if name in bot.extensions:
+                elapsed = await bot.load_timed(name, reload=True)
+            else:
+                elapsed = await bot.load_timed(name)
+            lines.append(f"✅ {name} - {elapsed * 1000:.1f} мс")
+        except commands.ExtensionError as e:
+            # При помилці discord.py залишає попередню версію розширення
+            lines.append(f"❌ {name} - {e}")
+    
+    await interaction.followup.send('\n'.join(lines) or "Немає завантажених розширень", ephemeral=True)
+
+async def setup(bot):
+    for command in (profile, extensions, reload):
+        bot.tree.add_command(command)
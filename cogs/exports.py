@@ -0,0 +1,80 @@
+"""Розширення експорту (завантажується ліниво): /export вивантажує статистику у стиснених CSV або JSON Lines"""
+import asyncio
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+import discord
+from discord import app_commands
+
+import export
+from cogs.wargaming import CLAN_DESCRIBE, UNKNOWN_CLAN_MESSAGE, clan_autocomplete, resolve_clan
+from core import EXPORT_PART_MB, chunked, ensure_members_cached, mark_failed, muted_users, voice_activity
+
+MAX_ATTACHMENTS = 10  # Вкладень в одному повідомленні Discord
+DATASETS = {
+    'members': 'Статистика учасників в укріпрайоні (денні знімки)',
+    'history': 'Історія метрик клану (рейтинг, укріпрайон)',
+    'voice': 'Час у голосових каналах',
+    'mutes': 'Активні мути',
+}
+CLAN_DATASETS = ('members', 'history')
+
+def voice_snapshot(guild):
+    """[(member_id, ім'я, секунд)] учасників з ненульовим часом; знімається в циклі подій, поки трекер не змінився"""
+    members = [member for member in guild.members if not member.bot]
+    seconds = voice_activity.get_many([member.id for member in members])
+    return [(member.id, member.display_name, int(value))
+            for member, value in zip(members, seconds.tolist()) if value > 0]
+
+async def dataset_rows(guild, dataset, clan):
+    if dataset == 'members':
+        return export.member_rows(clan.leaderboard_file)
+    if dataset == 'history':
+        return export.history_rows(clan.metrics.root)
+    if dataset == 'voice':
+        await ensure_members_cached(guild)
+        return voice_snapshot(guild)
+    # Мутів небагато, тож їх простіше скопіювати одразу, ніж читати словник з іншого потоку
+    return list(export.mute_rows({guild.id: muted_users[guild.id]} if guild.id in muted_users else {}))
+
+@app_commands.command(name="export", description="Вивантажити статистику у стиснених файлах CSV або JSON Lines")
+@app_commands.rename(fmt='format')
+@app_commands.describe(dataset="Що вивантажити", fmt="Формат файлів", clan=CLAN_DESCRIBE)
+@app_commands.choices(
+    dataset=[app_commands.Choice(name=name, value=value) for value, name in DATASETS.items()],
+    fmt=[app_commands.Choice(name=value.upper(), value=value) for value in export.FORMATS],
+)
+@app_commands.autocomplete(clan=clan_autocomplete)
+async def export_command(interaction: discord.Interaction, dataset: str, fmt: str = 'csv',
+                         clan: Optional[str] = None):
+    if not interaction.user.guild_permissions.administrator:
+        return await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+
+    target = resolve_clan(interaction, clan) if dataset in CLAN_DATASETS else None
+    if dataset in CLAN_DATASETS and target is None:
+        return await interaction.response.send_message(UNKNOWN_CLAN_MESSAGE, ephemeral=True)
+
+    await interaction.response.defer(ephemeral=True)
+    name = f"{dataset}_{target.clan_id if target else interaction.guild.id}_{time.strftime('%Y%m%d')}"
+    part_bytes = int(min(EXPORT_PART_MB * 1024 * 1024, interaction.guild.filesize_limit))
+    directory = tempfile.mkdtemp(prefix='wot-export-')
+    try:
+        rows = await dataset_rows(interaction.guild, dataset, target)
+        # Читання, кодування та стиснення - в окремому потоці, цикл подій лише надсилає готові файли
+        paths, count = await asyncio.to_thread(export.export, dataset, rows, directory, name, fmt, part_bytes)
+        for i, batch in enumerate(chunked(paths, MAX_ATTACHMENTS)):
+            await interaction.followup.send(
+                f"✅ {DATASETS[dataset]}: {count} рядків, файлів: {len(paths)}" if i == 0 else None,
+                files=[discord.File(path) for path in batch],
+                ephemeral=True
+            )
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}", ephemeral=True)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+async def setup(bot):
+    bot.tree.add_command(export_command)
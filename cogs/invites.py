@@ -0,0 +1,168 @@
+"""Розширення ролей за запрошеннями: видає роль учаснику залежно від запрошення, за яким він прийшов"""
+import asyncio
+import time
+
+import discord
+from discord import app_commands
+
+from core import bot, deleted_invites, invite_cache, invite_locks, invite_roles, save_invite_role_data
+
+INVITE_WARMUP_CONCURRENCY = 10
+DELETED_INVITE_TTL = 30  # секунд
+
+async def update_invite_cache(guild):
+    """Оновлюємо кеш запрошень для сервера"""
+    try:
+        invites = await guild.invites()
+        invite_cache[guild.id] = {invite.code: invite.uses for invite in invites}
+        return invite_cache[guild.id]
+    except discord.Forbidden:
+        print(f"Немає дозволу на перегляд запрошень для сервера {guild.name}")
+    except Exception as e:
+        print(f"Помилка оновлення кешу запрошень: {e}")
+    return None
+
+async def warmup_invite_cache(guilds):
+    """Паралельно заповнює кеш запрошень для всіх серверів"""
+    semaphore = asyncio.Semaphore(INVITE_WARMUP_CONCURRENCY)
+    
+    async def warm(guild):
+        async with semaphore:
+            await update_invite_cache(guild)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(warm(guild) for guild in guilds))
+    print(f"Кеш запрошень заповнено для {len(guilds)} серверів за {time.perf_counter() - started:.2f}с")
+
+def recent_deleted(guild_id):
+    """Коди запрошень, видалених не пізніше DELETED_INVITE_TTL секунд тому; застарілі записи прибираються"""
+    deleted = deleted_invites.get(guild_id)
+    if not deleted:
+        return set()
+    now = time.monotonic()
+    for code in [code for code, (_, deleted_at) in deleted.items() if now - deleted_at > DELETED_INVITE_TTL]:
+        del deleted[code]
+    if not deleted:
+        deleted_invites.pop(guild_id)
+    return set(deleted)
+
+def needs_invite_diff(guild_id):
+    """Чи може вхід на сервер бути через запрошення з роллю (тобто потрібна звірка)"""
+    roles = invite_roles.get(guild_id)
+    if not roles:
+        return False
+    cached = invite_cache.get(guild_id)
+    if cached is None:
+        return True
+    recent = recent_deleted(guild_id)
+    return any(code in cached or code in recent for code in roles)
+
+def find_used_invite(guild_id, fresh):
+    """Порівнює кеш з актуальними запрошеннями та повертає код використаного (або None)"""
+    cached = invite_cache.get(guild_id, {})
+    used = [code for code, uses in fresh.items() if uses > cached.get(code, 0)]
+    if not used:
+        # Одноразові запрошення зникають одразу після використання
+        used = [code for code in set(cached) | recent_deleted(guild_id) if code not in fresh]
+    if len(used) == 1:
+        return used[0]
+    return None
+
+async def on_invite_create(invite):
+    # Лише для повністю завантаженого кешу: інакше /invite_role вважав би частковий кеш готовим
+    if invite.guild is None or invite.guild.id not in invite_cache:
+        return
+    invite_cache[invite.guild.id][invite.code] = invite.uses or 0
+
+async def on_invite_delete(invite):
+    if invite.guild is None:
+        return
+    uses = invite_cache.get(invite.guild.id, {}).pop(invite.code, None)
+    if uses is not None and invite.guild.id in invite_roles:
+        deleted_invites.setdefault(invite.guild.id, {})[invite.code] = (uses, time.monotonic())
+
+async def on_member_join(member):
+    guild = member.guild
+    if not needs_invite_diff(guild.id):
+        return
+    
+    # Входи обробляються послідовно, щоб звірка не змішувала двох учасників
+    async with invite_locks[guild.id]:
+        try:
+            invites = await guild.invites()
+        except discord.Forbidden:
+            print(f"Немає дозволу на перегляд запрошень для сервера {guild.name}")
+            return
+        except Exception as e:
+            print(f"Помилка оновлення кешу запрошень: {e}")
+            return
+        
+        fresh = {invite.code: invite.uses for invite in invites}
+        code = find_used_invite(guild.id, fresh)
+        invite_cache[guild.id] = fresh
+        deleted_invites.pop(guild.id, None)
+    
+    if code is None:
+        print(f"Не вдалося однозначно визначити запрошення для {member} на сервері {guild.name}")
+        return
+    
+    role_id = invite_roles.get(guild.id, {}).get(code)
+    role = guild.get_role(role_id) if role_id else None
+    if role:
+        try:
+            await member.add_roles(role, reason=f"Вхід за запрошенням {code}")
+        except discord.Forbidden:
+            print(f"Не вдалося видати роль {role.id} користувачу {member.id} на сервері {guild.id}")
+
+@app_commands.command(name="invite_role", description="Призначити роль для учасників, які приєдналися за запрошенням")
+@app_commands.describe(
+    invite="Код або посилання запрошення",
+    role="Роль для видачі",
+    enabled="Увімкнути чи вимкнути видачу ролі"
+)
+async def invite_role(
+    interaction: discord.Interaction,
+    invite: str,
+    role: discord.Role,
+    enabled: bool = True
+):
+    if not interaction.user.guild_permissions.administrator:
+        return await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+    
+    # Завантаження запрошень може не вкластися у 3 секунди на першу відповідь
+    await interaction.response.defer(ephemeral=True)
+    code = invite.strip().rstrip('/').split('/')[-1]
+    guild_roles = invite_roles.get(interaction.guild.id, {})
+    
+    if enabled:
+        invite_roles[interaction.guild.id] = guild_roles
+        guild_roles[code] = role.id
+        save_invite_role_data()
+        if interaction.guild.id not in invite_cache:
+            await update_invite_cache(interaction.guild)
+        await interaction.followup.send(
+            f"✅ Учасники, що приєдналися за запрошенням `{code}`, отримають роль {role.mention}",
+            ephemeral=True
+        )
+    else:
+        if guild_roles.pop(code, None) is None:
+            return await interaction.followup.send(
+                f"❌ Для запрошення `{code}` не налаштовано роль",
+                ephemeral=True
+            )
+        if not guild_roles:
+            invite_roles.pop(interaction.guild.id)
+        save_invite_role_data()
+        await interaction.followup.send(
+            f"✅ Видачу ролі для запрошення `{code}` вимкнено",
+            ephemeral=True
+        )
+
+async def on_ready():
+    # Поки бот був офлайн, запрошення могли змінитися. Кеш потрібен лише серверам із ролями за запрошеннями
+    await warmup_invite_cache([guild for guild in bot.guilds if invite_roles.get(guild.id)])
+
+async def setup(bot):
+    bot.tree.add_command(invite_role)
+    for listener in (on_invite_create, on_invite_delete, on_member_join, on_ready):
+        bot.add_listener(listener)
@@ -0,0 +1,448 @@
+"""Розширення модерації: тимчасові мути з автоматичним зняттям та очищення каналів"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional
+
+import discord
+from discord import app_commands
+
+import core
+import tracking
+from core import mark_failed, mute_roles, muted_users, save_mute_data, shard_guilds
+
+async def check_mutes(shard_id=None):
+    """Знімає мути, термін яких закінчився, на серверах шарда"""
+    current_time = time.time()
+    to_unmute = []
+    
+    for guild in shard_guilds(shard_id):
+        guild_id = guild.id
+        guild_mutes = muted_users.get(guild_id)
+        if not guild_mutes:
+            continue
+            
+        # Прострочені мути знаходяться одним порівнянням масиву часу зняття
+        for user_id in guild_mutes.due(current_time):
+            mute_data = guild_mutes.get(user_id)
+            if mute_data is None:
+                # Мут зняли командою, поки оброблялися попередні
+                continue
+            member = guild.get_member(user_id)
+            if member is None:
+                # Без повного кешу учасників (MEMBER_CACHE_POLICY voice/none) учасника треба запитати
+                try:
+                    member = await guild.fetch_member(user_id)
+                except discord.NotFound:
+                    # Учасник покинув сервер - повертати ролі нікому
+                    member = None
+                except discord.HTTPException as e:
+                    # Запис лишається, зняття мута повториться при наступній перевірці
+                    print(f"Не вдалося отримати користувача {user_id} на сервері {guild.id}: {e}")
+                    continue
+            if member:
+                # Отримуємо оригінальні ролі
+                original_roles = [guild.get_role(role_id) for role_id in mute_data.original_roles]
+                original_roles = [role for role in original_roles if role is not None]
+                
+                try:
+                    # Повертаємо оригінальні ролі
+                    await member.edit(roles=original_roles, reason="Автоматичне зняття мута")
+                    
+                    log_channel = guild.get_channel(mute_data.log_channel) if mute_data.log_channel else None
+                    if log_channel:
+                        embed = discord.Embed(
+                            title="🔊 Користувача розмучено",
+                            description=f"Користувач {member.mention} автоматично розмучений",
+                            color=discord.Color.green()
+                        )
+                        await log_channel.send(embed=embed)
+                        
+                    # Надсилаємо приватне повідомлення користувачу
+                    try:
+                        await member.send(f"Ваш мут на сервері {guild.name} знято!")
+                    except:
+                        pass
+                        
+                except discord.Forbidden:
+                    print(f"Не вдалося зняти мут з користувача {member.id} на сервері {guild.id}")
+            to_unmute.append((guild_id, user_id))
+    
+    # Видаляємо розмучених користувачів
+    for guild_id, user_id in to_unmute:
+        if guild_id in muted_users:
+            muted_users[guild_id].pop(user_id)
+            if not muted_users[guild_id]:  # Якщо мутів на сервері не лишилось
+                muted_users.pop(guild_id)
+    
+    if to_unmute:
+        save_mute_data()
+
+async def setup_mute_role(guild: discord.Guild) -> Optional[discord.Role]:
+    """Створює та налаштовує роль для мута"""
+    try:
+        # Створюємо роль з базовими налаштуваннями
+        mute_role = await guild.create_role(
+            name="Muted",
+            reason="Роль для мута користувачів",
+            color=discord.Color.dark_gray(),
+            permissions=discord.Permissions.none()  # Забираємо всі права
+        )
+        
+        # Налаштовуємо права для кожного каналу
+        for channel in guild.channels:
+            overwrites = {
+                mute_role: discord.PermissionOverwrite(
+                    send_messages=False,
+                    add_reactions=False,
+                    speak=False,
+                    stream=False,
+                    send_messages_in_threads=False,
+                    create_public_threads=False,
+                    create_private_threads=False,
+                    embed_links=False,
+                    attach_files=False,
+                    use_external_emojis=False,
+                    use_external_stickers=False,
+                    use_application_commands=False,
+                    send_tts_messages=False,
+                    manage_messages=False,
+                    manage_threads=False
+                )
+            }
+            await channel.edit(overwrites=overwrites, reason="Налаштування прав для ролі мута")
+        
+        return mute_role
+    except Exception as e:
+        print(f"Помилка створення ролі для мута: {e}")
+        return None
+
+@app_commands.command(name="mute", description="Тимчасово заблокувати користувача")
+@app_commands.describe(
+    member="Користувач для блокування",
+    duration="Тривалість (приклад: 1h, 30m, 1d)",
+    reason="Причина блокування",
+    log_channel="Канал для логування (необов'язково)"
+)
+async def mute(
+    interaction: discord.Interaction,
+    member: discord.Member,
+    duration: str,
+    reason: str,
+    log_channel: Optional[discord.TextChannel] = None
+):
+    if not interaction.user.guild_permissions.moderate_members:
+        return await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+    
+    # Перевіряємо чи модератор не намагається замутити власника сервера
+    if member.guild_permissions.administrator or member.guild.owner_id == member.id:
+        return await interaction.response.send_message(
+            "❌ Неможливо заблокувати адміністратора або власника сервера",
+            ephemeral=True
+        )
+    
+    # Відкладаємо відповідь
+    await interaction.response.defer(ephemeral=True)
+    
+    # Перевірка чи є роль для мута
+    mute_role = None
+    if interaction.guild.id in mute_roles:
+        mute_role = interaction.guild.get_role(mute_roles[interaction.guild.id])
+        
+        # Перевіряємо чи роль все ще існує
+        if not mute_role:
+            mute_roles.pop(interaction.guild.id)
+    
+    if not mute_role:
+        # Створюємо нову роль для мута
+        mute_role = await setup_mute_role(interaction.guild)
+        if not mute_role:
+            return await interaction.followup.send(
+                "❌ Не вдалося створити роль для мута",
+                ephemeral=True
+            )
+        mute_roles[interaction.guild.id] = mute_role.id
+    
+    # Парсимо тривалість
+    duration_seconds = 0
+    try:
+        unit = duration[-1].lower()
+        value = int(duration[:-1])
+        
+        if unit == 'm':
+            duration_seconds = value * 60
+        elif unit == 'h':
+            duration_seconds = value * 3600
+        elif unit == 'd':
+            duration_seconds = value * 86400
+        else:
+            return await interaction.followup.send(
+                "❌ Невірний формат тривалості. Використовуйте: 30m, 1h, 1d",
+                ephemeral=True
+            )
+    except ValueError:
+        return await interaction.followup.send(
+            "❌ Невірний формат тривалості",
+            ephemeral=True
+        )
+    
+    unmute_at = time.time() + duration_seconds
+    
+    # Зберігаємо старі ролі користувача
+    user_roles = [role.id for role in member.roles if role != interaction.guild.default_role]
+    
+    # Додаємо роль
+    try:
+        # Знімаємо всі ролі
+        await member.edit(roles=[mute_role], reason=reason)
+        
+        # Зберігаємо інформацію про мут
+        if interaction.guild.id not in muted_users:
+            muted_users[interaction.guild.id] = tracking.GuildMutes()
+        
+        muted_users[interaction.guild.id].add(member.id, tracking.Mute(
+            unmute_at,
+            mute_role.id,
+            reason,
+            log_channel.id if log_channel else None,
+            user_roles  # Зберігаємо оригінальні ролі
+        ))
+        save_mute_data()
+        
+        # Створюємо ембед
+        embed = discord.Embed(
+            title="🔇 Користувача заблоковано",
+            color=discord.Color.red(),
+            timestamp=datetime.utcnow()
+        )
+        
+        embed.add_field(name="Користувач", value=member.mention, inline=True)
+        embed.add_field(name="Модератор", value=interaction.user.mention, inline=True)
+        embed.add_field(name="Тривалість", value=duration, inline=True)
+        embed.add_field(name="Причина", value=reason, inline=False)
+        embed.add_field(name="Буде розблоковано", value=f"<t:{int(unmute_at)}:F>", inline=False)
+        
+        # Надсилаємо повідомлення
+        await interaction.followup.send(embed=embed)
+        if log_channel:
+            await log_channel.send(embed=embed)
+        
+        # Надсилаємо приватне повідомлення користувачу
+        try:
+            await member.send(f"Вас заблоковано на сервері {interaction.guild.name}\n"
+                            f"Причина: {reason}\n"
+                            f"Тривалість: {duration}\n"
+                            f"Буде знято: <t:{int(unmute_at)}:F>")
+        except:
+            pass
+            
+    except discord.Forbidden:
+        mark_failed(interaction)
+        await interaction.followup.send(
+            "❌ Не вдалося заблокувати користувача",
+            ephemeral=True
+        )
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(
+            f"❌ Сталася помилка: {str(e)}",
+            ephemeral=True
+        )
+
+@app_commands.command(name="unmute", description="Розблокувати користувача")
+@app_commands.describe(
+    member="Користувач для розблокування",
+    reason="Причина розблокування"
+)
+async def unmute(
+    interaction: discord.Interaction,
+    member: discord.Member,
+    reason: str
+):
+    if not interaction.user.guild_permissions.moderate_members:
+        return await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+    
+    await interaction.response.defer(ephemeral=True)
+    
+    guild_mutes = muted_users.get(interaction.guild.id)
+    if guild_mutes is None or member.id not in guild_mutes:
+        return await interaction.followup.send(
+            "❌ Цей користувач не заблокований",
+            ephemeral=True
+        )
+    
+    mute_data = guild_mutes.get(member.id)
+    
+    try:
+        # Отримуємо оригінальні ролі
+        original_roles = [interaction.guild.get_role(role_id) for role_id in mute_data.original_roles]
+        original_roles = [role for role in original_roles if role is not None]
+        
+        # Повертаємо оригінальні ролі
+        await member.edit(roles=original_roles, reason=f"Розмут: {reason}")
+        
+        # Видаляємо з бази мутів
+        guild_mutes.pop(member.id)
+        if not guild_mutes:
+            muted_users.pop(interaction.guild.id)
+        save_mute_data()
+        
+        # Створюємо ембед
+        embed = discord.Embed(
+            title="🔊 Користувача розблоковано",
+            color=discord.Color.green(),
+            timestamp=datetime.utcnow()
+        )
+        
+        embed.add_field(name="Користувач", value=member.mention, inline=True)
+        embed.add_field(name="Модератор", value=interaction.user.mention, inline=True)
+        embed.add_field(name="Причина", value=reason, inline=False)
+        
+        # Надсилаємо повідомлення
+        await interaction.followup.send(embed=embed)
+        
+        # Якщо є канал для логів
+        if mute_data.log_channel:
+            log_channel = interaction.guild.get_channel(mute_data.log_channel)
+            if log_channel:
+                await log_channel.send(embed=embed)
+        
+        # Надсилаємо приватне повідомлення користувачу
+        try:
+            await member.send(f"Вас розблоковано на сервері {interaction.guild.name}\n"
+                            f"Причина: {reason}")
+        except:
+            pass
+            
+    except discord.Forbidden:
+        mark_failed(interaction)
+        await interaction.followup.send(
+            "❌ Не вдалося розблокувати користувача",
+            ephemeral=True
+        )
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(
+            f"❌ Сталася помилка: {str(e)}",
+            ephemeral=True
+        )
+
+@app_commands.command(name="clean", description="Очистити повідомлення в каналі")
+@app_commands.describe(
+    amount="Кількість повідомлень для видалення (за замовчуванням всі)",
+    user="Користувач, чиї повідомлення потрібно видалити (необов'язково)",
+    reason="Причина видалення (необов'язково)"
+)
+async def clean(
+    interaction: discord.Interaction,
+    amount: Optional[int] = None,
+    user: Optional[discord.Member] = None,
+    reason: Optional[str] = "Очищення каналу"
+):
+    if not interaction.user.guild_permissions.manage_messages:
+        return await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+    
+    await interaction.response.defer(ephemeral=True)
+    
+    try:
+        def check_message(message):
+            if user:
+                return message.author == user
+            return True
+        
+        # Якщо amount не вказано, видаляємо всі повідомлення
+        if not amount:
+            # Створюємо новий канал з тими ж налаштуваннями
+            new_channel = await interaction.channel.clone(
+                reason=f"Очищення каналу: {reason}"
+            )
+            await new_channel.edit(position=interaction.channel.position)
+            await interaction.channel.delete()
+            
+            await new_channel.send(
+                embed=discord.Embed(
+                    title="🧹 Канал очищено",
+                    description=f"**Модератор:** {interaction.user.mention}\n"
+                              f"**Причина:** {reason}",
+                    color=discord.Color.green()
+                )
+            )
+            
+            await interaction.followup.send(
+                f"✅ Канал повністю очищено",
+                ephemeral=True
+            )
+            return
+        
+        # Видаляємо вказану кількість повідомлень
+        deleted = await interaction.channel.purge(
+            limit=amount,
+            check=check_message,
+            reason=reason
+        )
+        
+        # Створюємо ембед з результатами
+        embed = discord.Embed(
+            title="🧹 Повідомлення видалено",
+            color=discord.Color.green(),
+            timestamp=datetime.utcnow()
+        )
+        
+        embed.add_field(
+            name="Кількість видалених повідомлень",
+            value=str(len(deleted)),
+            inline=True
+        )
+        
+        embed.add_field(
+            name="Модератор",
+            value=interaction.user.mention,
+            inline=True
+        )
+        
+        if user:
+            embed.add_field(
+                name="Користувач",
+                value=user.mention,
+                inline=True
+            )
+        
+        if reason:
+            embed.add_field(
+                name="Причина",
+                value=reason,
+                inline=False
+            )
+        
+        # Надсилаємо повідомлення про результат
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        
+        # Надсилаємо повідомлення в канал, яке видалиться через 5 секунд
+        msg = await interaction.channel.send(embed=embed)
+        await asyncio.sleep(5)
+        try:
+            await msg.delete()
+        except:
+            pass
+            
+    except discord.Forbidden:
+        mark_failed(interaction)
+        await interaction.followup.send(
+            "❌ У бота немає прав на видалення повідомлень",
+            ephemeral=True
+        )
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(
+            f"❌ Помилка: {str(e)}",
+            ephemeral=True
+        )
+
+async def setup(bot):
+    for command in (mute, unmute, clean):
+        bot.tree.add_command(command)
+    core.register_shard_job(check_mutes)
+
+async def teardown(bot):
+    # Команди модуля discord.py прибирає сам
+    core.unregister_shard_job(check_mutes)
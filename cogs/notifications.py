@@ -0,0 +1,91 @@
+"""Розширення сповіщень: згадування ролей при нових повідомленнях у відстежуваних каналах"""
+import asyncio
+
+import discord
+from discord import app_commands
+
+from core import notification_channels, save_notification_data
+
+@app_commands.command(name="notification", description="Налаштувати автоматичні сповіщення для каналу")
+@app_commands.describe(
+    channel="Канал для відстеження",
+    roles="Ролі для згадування (розділіть комами)",
+    enabled="Увімкнути чи вимкнути сповіщення"
+)
+async def notification(
+    interaction: discord.Interaction,
+    channel: discord.TextChannel,
+    roles: str,
+    enabled: bool = True
+):
+    if not interaction.user.guild_permissions.administrator:
+        return await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+    
+    # Перевіряємо та обробляємо ролі
+    role_ids = []
+    invalid_roles = []
+    for role_name in [r.strip() for r in roles.split(',')]:
+        role = discord.utils.get(interaction.guild.roles, name=role_name)
+        if role:
+            role_ids.append(role.id)
+        else:
+            invalid_roles.append(role_name)
+    
+    if invalid_roles:
+        return await interaction.response.send_message(
+            f"❌ Не знайдено такі ролі: {', '.join(invalid_roles)}",
+            ephemeral=True
+        )
+    
+    if enabled:
+        notification_channels[str(channel.id)] = {
+            'guild_id': interaction.guild.id,
+            'roles': role_ids
+        }
+        save_notification_data()
+        
+        roles_mention = ', '.join([f'<@&{role_id}>' for role_id in role_ids])
+        await interaction.response.send_message(
+            f"✅ Налаштовано сповіщення для каналу {channel.mention}\n"
+            f"Ролі для згадування: {roles_mention}",
+            ephemeral=True
+        )
+    else:
+        if str(channel.id) in notification_channels:
+            del notification_channels[str(channel.id)]
+            save_notification_data()
+            await interaction.response.send_message(
+                f"✅ Сповіщення для каналу {channel.mention} вимкнено",
+                ephemeral=True
+            )
+        else:
+            await interaction.response.send_message(
+                f"❌ Для каналу {channel.mention} не налаштовано сповіщення",
+                ephemeral=True
+            )
+
+async def on_message(message):
+    if message.author.bot:
+        return
+    
+    # Перевіряємо чи канал у списку для сповіщень
+    if str(message.channel.id) in notification_channels:
+        data = notification_channels[str(message.channel.id)]
+        
+        # Перевіряємо чи повідомлення з того ж серверу
+        if message.guild.id == data['guild_id']:
+            roles_mention = ' '.join([f'<@&{role_id}>' for role_id in data['roles']])
+            
+            # Надсилаємо згадування ролей
+            try:
+                notification_msg = await message.channel.send(roles_mention)
+                # Видаляємо згадування через 1 секунду
+                await asyncio.sleep(1)
+                await notification_msg.delete()
+            except discord.Forbidden:
+                print(f"Не вдалося надіслати сповіщення в канал {message.channel.id}")
+
+async def setup(bot):
+    bot.tree.add_command(notification)
+    # Окремий обробник, тож префіксні команди й надалі обробляє стандартний on_message бота
+    bot.add_listener(on_message)
@@ -0,0 +1,277 @@
+"""Розширення ролей за складом клану: видає та знімає ролі Discord при вступі, виході та зміні звання в клані"""
+import asyncio
+import re
+import time
+
+import discord
+from discord import app_commands
+
+import core
+import metrics
+from core import (
+    INGEST_WORKER, ROSTER_ROLE_BATCH, ROSTER_ROLE_BATCH_SECONDS, ROSTER_SYNC_MINUTES, chunked, ensure_members_cached,
+    mark_failed, refresh_scheduler, roster_locks, roster_roles, roster_snapshots, save_roster_role_data,
+    save_roster_snapshots, shard_guilds, shared_store,
+)
+
+MEMBER_RANK = 'member'  # Роль для будь-якого учасника клану
+RANKS = {
+    MEMBER_RANK: 'Будь-який учасник клану',
+    'commander': 'Командувач',
+    'executive_officer': 'Заступник командувача',
+    'personnel_officer': 'Офіцер штабу',
+    'combat_officer': 'Командир підрозділу',
+    'intelligence_officer': 'Офіцер розвідки',
+    'quartermaster': 'Офіцер постачання',
+    'recruitment_officer': 'Офіцер з кадрів',
+    'junior_officer': 'Молодший офіцер',
+    'private': 'Рядовий',
+    'recruit': 'Новобранець',
+    'reservist': 'Резервіст',
+}
+# Нікнейм WG у відображуваному імені: "[TAG] Nickname (Ім'я)" -> nickname
+NICKNAME = re.compile(r'^(?:\[[^\]]*\]\s*)?([A-Za-z0-9_]+)')
+
+async def fetch_clan_roster(clan):
+    """Склад клану: account_id -> [нікнейм, звання]"""
+    data = await clan.api.make_request('clans/info', {
+        'clan_id': clan.clan_id,
+        'fields': 'members.account_id,members.account_name,members.role'
+    })
+    if data['status'] != 'ok' or data['data'].get(clan.clan_id) is None:
+        return None
+    return {str(member['account_id']): [member['account_name'], member['role']]
+            for member in data['data'][clan.clan_id]['members']}
+
+async def refresh_roster(clan):
+    roster = await fetch_clan_roster(clan)
+    if roster is not None:
+        clan.roster, clan.roster_at = roster, time.time()
+
+async def current_roster(clan):
+    """Останній отриманий склад клану та час його отримання; з воркером - зі спільного сховища"""
+    if INGEST_WORKER:
+        key = clan.store_key('roster')
+        return await asyncio.to_thread(shared_store.get, key), shared_store.updated_at(key)
+    return clan.roster, clan.roster_at
+
+def schedule_roster(clan):
+    # Склад оновлюється лише для кланів, на серверах яких налаштовано ролі
+    if not INGEST_WORKER and f"{clan.key}/roster" not in refresh_scheduler.entries:
+        refresh_scheduler.add(f"{clan.key}/roster", 'roster', clan.realm, ROSTER_SYNC_MINUTES, refresh_roster, clan)
+
+def nickname_of(member):
+    match = NICKNAME.match(member.display_name)
+    return match.group(1).lower() if match else None
+
+def diff_roster(previous, roster):
+    """Вступи, виходи та зміни звання: account_id -> (запис зі знімка або None, поточний запис або None)"""
+    changes = {}
+    for account_id, entry in roster.items():
+        old = previous.get(account_id)
+        if old is None or old[1] != entry[1]:
+            changes[account_id] = (old, entry)
+    for account_id, old in previous.items():
+        if account_id not in roster:
+            changes[account_id] = (old, None)
+    return changes
+
+def wanted_roles(guild, entry):
+    """ID ролей, які має мати гравець із записом складу (None - не в клані)"""
+    if entry is None:
+        return set()
+    return {role_id for rank, role_id in roster_roles.get(guild.id, {}).items()
+            if rank in (MEMBER_RANK, entry[1]) and guild.get_role(role_id) is not None}
+
+def role_update(member, managed, wanted):
+    """(ролі для видачі, ролі для зняття) серед керованих або None, якщо вони вже відповідають складу"""
+    current = {role.id for role in member.roles} & managed
+    if current == wanted:
+        return None
+    guild = member.guild
+    return ([guild.get_role(role_id) for role_id in wanted - current],
+            [guild.get_role(role_id) for role_id in current - wanted if guild.get_role(role_id) is not None])
+
+async def change_roles(member, add, remove, reason):
+    # Лише керовані ролі: повний список ролей (member.edit) затер би мут чи роль запрошення, видані одночасно
+    if add:
+        await member.add_roles(*add, reason=reason)
+    if remove:
+        await member.remove_roles(*remove, reason=reason)
+
+async def apply_role_updates(guild, updates, reason):
+    """Змінює ролі пакетами по ROSTER_ROLE_BATCH учасників з паузою між пакетами: зміни учасників мають
+    спільний ліміт Discord на сервер, і масова звірка не повинна забирати його в модерації та інших команд.
+    Повертає ID учасників, ролі яких змінити не вдалося"""
+    failed = set()
+    for i, batch in enumerate(chunked(updates, ROSTER_ROLE_BATCH)):
+        if i:
+            await asyncio.sleep(ROSTER_ROLE_BATCH_SECONDS)
+        results = await asyncio.gather(*(change_roles(member, add, remove, reason)
+                                         for member, (add, remove), _ in batch),
+                                       return_exceptions=True)
+        for (member, _, kind), result in zip(batch, results):
+            if isinstance(result, Exception):
+                print(f"Не вдалося змінити ролі користувача {member.id} на сервері {guild.id}: {result}")
+                failed.add(member.id)
+                continue
+            metrics.roster_role_updates.inc(kind)
+    return failed
+
+def record_snapshot(guild, clan, roster, fetched_at, pending=None):
+    """Запам'ятовує склад; зміни з pending (account_id -> (старий запис, новий)) лишаються незастосованими,
+    тож наступне порівняння знайде їх знову"""
+    members = dict(roster)
+    for account_id, (old, _) in (pending or {}).items():
+        if old is None:
+            members.pop(account_id, None)
+        else:
+            members[account_id] = old
+    roster_snapshots[guild.id] = {'clan': clan.key, 'at': fetched_at, 'members': members}
+    save_roster_snapshots()
+
+async def sync_guild(guild, clan, roster, fetched_at):
+    """Застосовує до ролей лише зміни складу з останнього знімка"""
+    async with roster_locks[guild.id]:
+        snapshot = roster_snapshots.get(guild.id)
+        if snapshot is None or snapshot['clan'] != clan.key:
+            # Перший знімок лише запам'ятовує склад; наявні ролі вирівнює /roster_sync
+            record_snapshot(guild, clan, roster, fetched_at)
+            return
+
+        changes = diff_roster(snapshot['members'], roster)
+        pending = {}
+        if changes:
+            await ensure_members_cached(guild)
+            by_nickname = {}
+            for member in guild.members:
+                for name in (nickname_of(member), member.name.lower()):
+                    if name and not member.bot:
+                        by_nickname.setdefault(name, member)
+
+            managed = set(roster_roles[guild.id].values())
+            updates, members = [], {}
+            for account_id, (old, new) in changes.items():
+                member = by_nickname.get((new or old)[0].lower())
+                if member is None:
+                    # Гравця ще немає на сервері - ролі видадуться, коли він з'явиться (знімати нічого)
+                    if new is not None:
+                        pending[account_id] = (old, new)
+                    continue
+                members[account_id] = member
+                roles = role_update(member, managed, wanted_roles(guild, new))
+                if roles is not None:
+                    kind = 'join' if old is None else 'leave' if new is None else 'rank'
+                    updates.append((member, roles, kind))
+            failed = await apply_role_updates(guild, updates, "Зміна складу клану")
+            # Невдалі зміни повторюються при наступній перевірці складу
+            pending.update({account_id: changes[account_id] for account_id, member in members.items()
+                            if member.id in failed})
+            print(f"Склад {clan.label}, сервер {guild.name}: {len(changes)} змін, ролі оновлено "
+                  f"{len(updates) - len(failed)} учасникам, відкладено {len(pending)}")
+        record_snapshot(guild, clan, roster, fetched_at, pending)
+
+async def sync_roster_roles(shard_id=None):
+    """Перевіряє, чи оновився склад кланів серверів шарда з часу останнього знімка"""
+    pending = []
+    for guild in shard_guilds(shard_id):
+        if not roster_roles.get(guild.id) or roster_locks[guild.id].locked():
+            continue
+        clan = core.guild_clan(guild.id)
+        schedule_roster(clan)
+        roster, fetched_at = await current_roster(clan)
+        snapshot = roster_snapshots.get(guild.id)
+        if roster is None or (snapshot and snapshot['clan'] == clan.key and snapshot['at'] == fetched_at):
+            continue
+        pending.append(sync_guild(guild, clan, roster, fetched_at))
+    # Ліміти на зміни учасників окремі для кожного сервера, тому сервери обробляються паралельно
+    await asyncio.gather(*pending)
+
+async def reconcile_guild(guild, clan, roster, fetched_at):
+    """Повна звірка: керовані ролі кожного учасника сервера приводяться до складу клану"""
+    await ensure_members_cached(guild)
+    by_nickname = {entry[0].lower(): entry for entry in roster.values()}
+    managed = set(roster_roles[guild.id].values())
+    updates = []
+    for member in guild.members:
+        if member.bot:
+            continue
+        entry = by_nickname.get(nickname_of(member)) or by_nickname.get(member.name.lower())
+        roles = role_update(member, managed, wanted_roles(guild, entry))
+        if roles is not None:
+            updates.append((member, roles, 'reconcile'))
+    failed = await apply_role_updates(guild, updates, "Звірка зі складом клану")
+    record_snapshot(guild, clan, roster, fetched_at)
+    return len(updates), len(updates) - len(failed)
+
+@app_commands.command(name="roster_role", description="Призначити роль Discord для учасників клану або звання")
+@app_commands.describe(
+    rank="Звання в клані (або будь-який учасник)",
+    role="Роль для видачі",
+    enabled="Увімкнути чи вимкнути видачу ролі"
+)
+@app_commands.choices(rank=[app_commands.Choice(name=name, value=rank) for rank, name in RANKS.items()])
+async def roster_role(interaction: discord.Interaction, rank: str, role: discord.Role, enabled: bool = True):
+    if not interaction.user.guild_permissions.administrator:
+        return await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+
+    guild_roles = roster_roles.get(interaction.guild.id, {})
+    if enabled:
+        roster_roles[interaction.guild.id] = guild_roles
+        guild_roles[rank] = role.id
+        save_roster_role_data()
+        schedule_roster(core.guild_clan(interaction.guild.id))
+        await interaction.response.send_message(
+            f"✅ {RANKS[rank]}: роль {role.mention}. Нові зміни складу застосовуються автоматично, "
+            f"для вирівнювання наявних ролей виконайте /roster_sync",
+            ephemeral=True
+        )
+    else:
+        if guild_roles.get(rank) != role.id:
+            return await interaction.response.send_message(
+                f"❌ Для «{RANKS[rank]}» не налаштовано роль {role.mention}",
+                ephemeral=True
+            )
+        del guild_roles[rank]
+        if not guild_roles:
+            roster_roles.pop(interaction.guild.id)
+        save_roster_role_data()
+        await interaction.response.send_message(f"✅ Видачу ролі {role.mention} вимкнено", ephemeral=True)
+
+@app_commands.command(name="roster_sync", description="Повністю звірити ролі учасників сервера зі складом клану")
+async def roster_sync(interaction: discord.Interaction):
+    if not interaction.user.guild_permissions.administrator:
+        return await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+    if not roster_roles.get(interaction.guild.id):
+        return await interaction.response.send_message("❌ Спочатку налаштуйте ролі через /roster_role", ephemeral=True)
+
+    await interaction.response.defer(ephemeral=True)
+    clan = core.guild_clan(interaction.guild.id)
+    try:
+        if not INGEST_WORKER:
+            await refresh_roster(clan)
+        roster, fetched_at = await current_roster(clan)
+        if roster is None:
+            mark_failed(interaction)
+            return await interaction.followup.send("Не вдалося отримати склад клану.", ephemeral=True)
+
+        async with roster_locks[interaction.guild.id]:
+            changed, applied = await reconcile_guild(interaction.guild, clan, roster, fetched_at)
+        await interaction.followup.send(
+            f"✅ Звірку зі складом {clan.label} завершено: ролі оновлено {applied} з {changed} учасників",
+            ephemeral=True
+        )
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}", ephemeral=True)
+
+async def setup(bot):
+    for command in (roster_role, roster_sync):
+        bot.tree.add_command(command)
+    core.register_shard_job(sync_roster_roles)
+
+async def teardown(bot):
+    # Команди модуля discord.py прибирає сам
+    core.unregister_shard_job(sync_roster_roles)
+    for clan in core.tracked_clans.values():
+        refresh_scheduler.remove(f"{clan.key}/roster")
@@ -0,0 +1,185 @@
+"""Розширення голосової активності: облік часу в голосових каналах, відключення неактивних і /dis_stat"""
+import asyncio
+import math
+import time
+from datetime import datetime
+from typing import Optional
+
+import discord
+import numpy as np
+from discord import app_commands
+
+import core
+from core import (
+    bot, ensure_members_cached, last_activity_update, shard_guilds, tracked_channels, voice_activity,
+    voice_time_tracker, warning_sent,
+)
+
+WARNING_SECONDS = 10 * 60
+DISCONNECT_SECONDS = 15 * 60
+
+class MemberActivity:
+    """Рядок /dis_stat"""
+    __slots__ = ('member', 'voice_seconds', 'joined_days', 'roles_count', 'activity_score')
+
+    def __init__(self, member, voice_seconds, joined_days, roles_count, activity_score):
+        self.member = member
+        self.voice_seconds = voice_seconds
+        self.joined_days = joined_days
+        self.roles_count = roles_count
+        self.activity_score = activity_score
+
+@app_commands.command(name="dis_stat", description="Показати статистику активності користувачів")
+@app_commands.describe(
+    type="Тип статистики",
+    limit="Кількість користувачів для показу (за замовчуванням 10)"
+)
+@app_commands.choices(type=[
+    app_commands.Choice(name="🟢 Найактивніші", value="active"),
+    app_commands.Choice(name="🔴 Найменш активні", value="inactive")
+])
+async def dis_stat(
+    interaction: discord.Interaction,
+    type: app_commands.Choice[str],
+    limit: Optional[int] = 10
+):
+    await interaction.response.defer()
+    await ensure_members_cached(interaction.guild)
+    
+    # Збираємо статистику: скор рахується для всіх учасників масивами, записи - лише для показаних
+    members = [member for member in interaction.guild.members if not member.bot]
+    now = time.time()
+    ids = np.fromiter((member.id for member in members), dtype=np.int64, count=len(members))
+    joined_at = np.fromiter((member.joined_at.timestamp() if member.joined_at else now for member in members),
+                            dtype=np.float64, count=len(members))
+    # Віднімаємо @everyone
+    roles_count = np.fromiter((len(member.roles) - 1 for member in members), dtype=np.int64, count=len(members))
+    
+    # Базова активність (час у голосових каналах) та додаткові фактори активності
+    voice_seconds = voice_activity.get_many(ids)
+    joined_days = np.floor((now - joined_at) / 86400)
+    
+    # Розраховуємо загальний скор активності
+    activity_score = (
+        voice_seconds / 3600  # Години в голосових каналах
+        + roles_count * 5  # Бонус за кожну роль
+        - joined_days * 0.1  # Невеликий мінус за кожен день з приєднання
+    )
+    
+    # Сортуємо за активністю та обмежуємо кількість
+    order = np.argsort(-activity_score if type.value == "active" else activity_score, kind='stable')[:limit]
+    member_stats = [
+        MemberActivity(members[i], voice_seconds[i], int(joined_days[i]), int(roles_count[i]), activity_score[i])
+        for i in order.tolist()
+    ]
+    
+    # Створюємо ембед
+    embed = discord.Embed(
+        title="📊 Статистика активності користувачів",
+        description=f"{'Найактивніші' if type.value == 'active' else 'Найменш активні'} користувачі серверу",
+        color=discord.Color.green() if type.value == "active" else discord.Color.red(),
+        timestamp=datetime.utcnow()
+    )
+    
+    # Додаємо поля для кожного користувача
+    for i, stat in enumerate(member_stats, 1):
+        member = stat.member
+        voice_hours = stat.voice_seconds / 3600
+        
+        embed.add_field(
+            name=f"{i}. {member.display_name}",
+            value=f"👥 Ролей: {stat.roles_count}\n"
+                  f"🎤 Годин у голосових: {voice_hours:.1f}\n"
+                  f"📅 Днів на сервері: {stat.joined_days}\n"
+                  f"📊 Скор активності: {stat.activity_score:.1f}",
+            inline=False
+        )
+    
+    # Додаємо загальну інформацію
+    total_members = len(members)
+    embed.set_footer(text=f"Всього учасників: {total_members}")
+    
+    await interaction.followup.send(embed=embed)
+
+async def update_voice_activity(shard_id=None):
+    """Оновлює лічильник часу проведеного в голосових каналах"""
+    now = time.time()
+    time_elapsed = now - last_activity_update.get(shard_id, now)
+    last_activity_update[shard_id] = now
+    
+    # Один векторний запис для всіх учасників у голосових каналах шарда
+    voice_activity.add_many([member.id for guild in shard_guilds(shard_id) for voice_channel in guild.voice_channels
+                             for member in voice_channel.members if not member.bot], time_elapsed)
+
+async def check_voice_activity(shard_id=None):
+    """Перевіряє активність користувачів у голосових каналах"""
+    current_time = time.time()
+    for guild in shard_guilds(shard_id):
+        guild_id = guild.id
+        data = tracked_channels.get(guild_id)
+        if not data:
+            continue
+            
+        voice_channel = guild.get_channel(data["voice_channel"])
+        log_channel = guild.get_channel(data["log_channel"])
+        if not voice_channel or not log_channel:
+            continue
+        
+        tracker = voice_time_tracker[guild_id]
+        warned = warning_sent[guild_id]
+        members = [member for member in voice_channel.members if not member.bot]
+        entered = tracker.get_many([member.id for member in members], default=np.nan)
+        for member, entered_at in zip(members, entered.tolist()):
+            if math.isnan(entered_at):  # Учасник щойно з'явився в каналі
+                tracker[member.id] = current_time
+                warned.discard(member.id)
+                continue
+                
+            time_in_channel = current_time - entered_at
+            
+            if time_in_channel > WARNING_SECONDS and member.id not in warned:
+                try:
+                    await member.send("⚠️ Ви в каналі для неактивних користувачів вже 10+ хвилин. ✅ Будьте активні, або Ви будете відєднані!")
+                    warned.add(member.id)
+                except:
+                    pass
+            
+            if time_in_channel > DISCONNECT_SECONDS:
+                try:
+                    await member.move_to(None)
+                    msg = await log_channel.send(f"🔴 {member.mention} відключено за неактивність на сервері")
+                    bot.loop.create_task(delete_after(msg, data["delete_after"]))
+                    tracker.pop(member.id)
+                    warned.discard(member.id)
+                except:
+                    pass
+
+async def on_voice_state_update(member, before, after):
+    """Обробляє зміни стану голосового підключення"""
+    if before.channel and before.channel.id in [data["voice_channel"] for data in tracked_channels.values()]:
+        tracker = voice_time_tracker.get(member.guild.id)
+        if tracker is not None and tracker.pop(member.id) is not None:
+            warning_sent[member.guild.id].discard(member.id)
+
+async def delete_after(message, minutes):
+    """Видаляє повідомлення після вказаного часу"""
+    if minutes <= 0:
+        return
+    await asyncio.sleep(minutes * 60)
+    try:
+        await message.delete()
+    except:
+        pass
+
+SHARD_JOBS = (update_voice_activity, check_voice_activity)
+
+async def setup(bot):
+    bot.tree.add_command(dis_stat)
+    bot.add_listener(on_voice_state_update)
+    for job in SHARD_JOBS:
+        core.register_shard_job(job)
+
+async def teardown(bot):
+    # Лічильники живуть у core, тож перезавантаження їх не скидає
+    for job in SHARD_JOBS:
+        core.unregister_shard_job(job)
@@ -0,0 +1,1122 @@
+"""Розширення Wargaming: команди кланів та гравців, історія метрик кланів, WN8 та індекс танків"""
+import asyncio
+import io
+import json
+import re
+import time
+from datetime import datetime
+from typing import Optional
+
+import discord
+from discord import app_commands
+
+import core
+import inventory
+import jobs
+import leaderboards
+import metrics
+import ratings
+import resilience
+import timeseries
+from clans import REALMS
+from core import (
+    CLAN_METRICS_INTERVAL_MINUTES, INGEST_WORKER, INVENTORY_REFRESH_MINUTES, LEADERBOARD_REFRESH_MINUTES,
+    WN8_EXPECTED_FILE, bot, chunked, command_jobs, mark_failed, owns_guild, refresh_scheduler, shared_store,
+)
+
+TANK_STATS_CONCURRENCY = 5
+CLAN_BATTLES_LIMIT = 100
+MAX_COMPARE_PLAYERS = 10
+WG_MAX_IDS = 100  # Максимум ID в одному запиті
+QUEUE_FULL_MESSAGE = "У вас вже є запити в черзі. Зачекайте, поки вони виконаються."
+UNKNOWN_CLAN_MESSAGE = "Клан не відстежується. Вкажіть тег, ID або регіон:ID одного з відстежуваних кланів."
+TANK_STATS_FIELDS = 'tank_id,' + ','.join(f"all.{field}" for field in ratings.STAT_FIELDS)
+TANK_TYPE_NAMES = {
+    'heavyTank': 'Важкий танк',
+    'mediumTank': 'Середній танк',
+    'lightTank': 'Легкий танк',
+    'AT-SPG': 'ПТ-САУ',
+    'SPG': 'САУ',
+}
+
+def get_rating_engine():
+    """Завантажує таблицю очікуваних значень при першому використанні"""
+    if core.rating_engine is None:
+        try:
+            core.rating_engine = ratings.RatingEngine(ratings.ExpectedValues.load(WN8_EXPECTED_FILE))
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError) as e:
+            print(f"Не вдалося завантажити очікувані значення WN8 ({WN8_EXPECTED_FILE}): {e}")
+            return None
+    return core.rating_engine
+
+async def fetch_roster(clan):
+    """Список учасників клану"""
+    members_data = await clan.api.make_request('clans/info', {
+        'clan_id': clan.clan_id,
+        'fields': 'members'
+    })
+    if members_data['status'] == 'ok' and members_data['data'].get(clan.clan_id) is not None:
+        return members_data['data'][clan.clan_id]['members']
+    return None
+
+async def fetch_tank_battles(api, account_ids):
+    """Сумарна кількість боїв на танках для багатьох гравців (account/tanks по 100 ID)"""
+    battles = {}
+    for batch in chunked([str(account_id) for account_id in account_ids], WG_MAX_IDS):
+        tanks_data = await api.make_request('account/tanks', {
+            'account_id': ','.join(batch),
+            'fields': 'tank_id,statistics.battles'
+        })
+        if tanks_data['status'] != 'ok':
+            continue
+        for account_id, tanks in tanks_data['data'].items():
+            battles[int(account_id)] = sum(tank['statistics']['battles'] for tank in tanks or [])
+    return battles
+
+async def fetch_tank_stats(api, account_id):
+    """Детальна статистика танків гравця для WN8 (tanks/stats приймає лише один account_id)"""
+    stats_data = await api.make_request('tanks/stats', {
+        'account_id': account_id,
+        'fields': TANK_STATS_FIELDS
+    })
+    if stats_data['status'] == 'ok' and stats_data['data'].get(str(account_id)) is not None:
+        return ratings.TankStats.from_api(stats_data['data'][str(account_id)])
+    return None
+
+async def rate_accounts(engine, api, account_ids):
+    """WN8 для багатьох гравців: tanks/stats запитується лише для тих, у кого змінилась кількість боїв"""
+    keys = await fetch_tank_battles(api, account_ids)
+    stale = [account_id for account_id in account_ids if engine.cached(account_id, keys.get(account_id)) is None]
+    
+    semaphore = asyncio.Semaphore(TANK_STATS_CONCURRENCY)
+    async def fetch(account_id):
+        async with semaphore:
+            return account_id, await fetch_tank_stats(api, account_id)
+    
+    fetched = dict(await asyncio.gather(*(fetch(account_id) for account_id in stale)))
+    results = engine.rate({a: stats for a, stats in fetched.items() if stats is not None}, keys)
+    for account_id in account_ids:
+        if account_id not in results:
+            cached = engine.cached(account_id, keys.get(account_id))
+            if cached is not None:
+                results[account_id] = cached
+    return results
+
+async def refresh_tank_inventory(clan):
+    """Оновлює індекс танків клану: account/tanks запитується лише для гравців з новими боями"""
+    async with clan.inventory_lock:
+        members = await fetch_roster(clan)
+        if members is None:
+            return False
+        names = {member['account_id']: member['account_name'] for member in members}
+        
+        # Час останнього бою - дешевий маркер змін для всього складу
+        last_battles = {}
+        for batch in chunked([str(account_id) for account_id in names], WG_MAX_IDS):
+            info = await clan.api.make_request('account/info', {
+                'account_id': ','.join(batch),
+                'fields': 'last_battle_time'
+            })
+            if info['status'] == 'ok':
+                for account_id, data in info['data'].items():
+                    if data is not None:
+                        last_battles[int(account_id)] = data['last_battle_time']
+        
+        index = clan.inventory
+        changed = index.changed(last_battles)
+        for batch in chunked(changed, WG_MAX_IDS):
+            tanks_data = await clan.api.make_request('account/tanks', {
+                'account_id': ','.join(map(str, batch)),
+                'fields': 'tank_id,statistics.battles,statistics.wins'
+            })
+            if tanks_data['status'] != 'ok':
+                continue
+            for account_id, tanks in tanks_data['data'].items():
+                index.update(int(account_id), last_battles[int(account_id)], tanks or [])
+        
+        for batch in chunked(index.missing_vehicles(index.by_tank), WG_MAX_IDS):
+            vehicles_data = await clan.api.make_request('encyclopedia/vehicles', {
+                'tank_id': ','.join(map(str, batch)),
+                'fields': 'name,tier,type'
+            })
+            if vehicles_data['status'] == 'ok':
+                index.add_vehicles(vehicles_data['data'])
+        
+        index.retain(names)
+        index.updated_at = time.time()
+        # При кількох процесах файл пише лише процес із шардом 0
+        if owns_guild(0):
+            index.save(clan.inventory_file)
+        print(f"Індекс танків {clan.label} оновлено: {len(changed)} з {len(names)} гравців мали нові бої")
+        return True
+
+async def fetch_clan_info(clan):
+    data = await clan.api.make_request('clans/info', {'clan_id': clan.clan_id})
+    if data['status'] == 'ok' and data['data'].get(clan.clan_id) is not None:
+        info = data['data'][clan.clan_id]
+        clan.tag = info['tag']
+        return info
+    return None
+
+async def fetch_stronghold_stats(clan, period):
+    data = await clan.api.make_request('stronghold/statistics', {
+        'clan_id': clan.clan_id,
+        'period': period
+    })
+    if data['status'] == 'ok' and data['data'].get(clan.clan_id) is not None:
+        return data['data'][clan.clan_id]
+    return None
+
+async def fetch_clan_battles(clan, count=CLAN_BATTLES_LIMIT):
+    data = await clan.api.make_request('stronghold/battles', {
+        'clan_id': clan.clan_id,
+        'limit': count
+    })
+    if data['status'] == 'ok' and data['data'].get(clan.clan_id) is not None:
+        return data['data'][clan.clan_id]
+    return None
+
+async def fetch_clan_ratings(clan):
+    data = await clan.api.make_request('clanratings/clans', {
+        'clan_id': clan.clan_id
+    })
+    if data['status'] == 'ok' and data['data'].get(clan.clan_id) is not None:
+        return data['data'][clan.clan_id]
+    return None
+
+async def fetch_member_stats(clan):
+    """Статистика укріпрайону кожного учасника клану; кожне оновлення перераховує таблиці лідерів"""
+    members = await fetch_roster(clan)
+    if members is None:
+        return None
+    
+    # Статистика укріпрайону запитується пакетами по WG_MAX_IDS гравців
+    stronghold = {}
+    for batch in chunked([str(member['account_id']) for member in members], WG_MAX_IDS):
+        player_stats = await clan.api.make_request('stronghold/accountstats', {
+            'account_id': ','.join(batch),
+            'fields': 'battles_count,wins,industrial_resource_earned'
+        })
+        if player_stats['status'] == 'ok':
+            stronghold.update(player_stats['data'])
+    
+    member_stats = []
+    for member in members:
+        account_id = member['account_id']
+        stats = stronghold.get(str(account_id))
+        if stats is not None:
+            member_stats.append({
+                'account_id': account_id,
+                'nickname': member['account_name'],
+                'battles': stats.get('battles_count', 0),
+                'wins': stats.get('wins', 0),
+                'resources': stats.get('industrial_resource_earned', 0)
+            })
+    
+    clan.leaderboards.update(member_stats)
+    # При кількох процесах файл пише лише процес із шардом 0
+    if owns_guild(0):
+        await asyncio.to_thread(clan.leaderboards.save, clan.leaderboard_file)
+    return member_stats
+
+def render_members_activity(member_stats):
+    """Таблиця активності учасників, розбита на частини для повідомлень"""
+    # Sort by battles count
+    member_stats = sorted(member_stats, key=lambda x: x['battles'], reverse=True)
+    
+    # Create table
+    from tabulate import tabulate
+    table = tabulate(
+        [[s['nickname'], s['battles'], s['wins'], s['resources']] for s in member_stats],
+        headers=['Гравець', 'Боїв', 'Перемог', 'Промресурс'],
+        tablefmt='grid'
+    )
+    
+    # Split message if it's too long
+    return [table[i:i+1900] for i in range(0, len(table), 1900)]
+
+async def fetch_clan_wn8(clan):
+    """WN8 клану та учасників, відсортованих за спаданням"""
+    engine = get_rating_engine()
+    members = await fetch_roster(clan) if engine else None
+    if members is None:
+        return None
+    
+    names = {member['account_id']: member['account_name'] for member in members}
+    member_ratings = await rate_accounts(engine, clan.api, list(names))
+    rated = sorted(member_ratings.items(), key=lambda item: item[1].overall, reverse=True)
+    return {
+        'clan': engine.combined(member_ratings.values()),
+        'roster': len(names),
+        'members': [{'nickname': names[account_id], 'wn8': rating.overall} for account_id, rating in rated]
+    }
+
+async def clan_data(interaction, clan, name, fetch, *args, queued=False):
+    """У режимі воркера команди лише читають готові результати зі сховища, інакше запитують API самі.
+    З queued запит іде через спільну чергу: однакові задачі виконуються один раз, а користувач бачить позицію.
+    Якщо API не відповів, показуються останні збережені дані з позначкою їхнього віку"""
+    key = clan.store_key(name)
+    if INGEST_WORKER:
+        return await asyncio.to_thread(shared_store.get, key)
+    
+    try:
+        if queued:
+            data = await command_jobs.submit(key, queued_fetch, fetch, clan, *args, guild_id=interaction.guild_id,
+                                             user_id=interaction.user.id, on_position=queue_position(interaction))
+        else:
+            data = await fetch(clan, *args)
+        error = None
+    except resilience.UpstreamError as e:
+        data, error = None, e
+    finally:
+        if queued:
+            await clear_queue_status(interaction)
+    
+    if data is not None:
+        await asyncio.to_thread(core.stale_cache.put, key, data)
+        return data
+    stale = await asyncio.to_thread(core.stale_cache.get, key)
+    if stale is None:
+        if error is not None:
+            raise error
+        return None
+    age = int((time.time() - core.stale_cache.updated_at(key)) // 60)
+    metrics.stale_responses.inc(name.split('/')[0])
+    await interaction.followup.send(
+        f"⚠️ Wargaming API не відповідає ({error or 'немає даних'}), показано збережені дані станом на {age} хв тому")
+    return stale
+
+async def queued_fetch(fetch, clan, *args):
+    # Задача черги живе довше за команду, яка її створила, тому має власний бюджет часу
+    resilience.start_budget(core.COMMAND_JOB_BUDGET_SECONDS)
+    return await fetch(clan, *args)
+
+def queue_position(interaction):
+    async def show_position(position):
+        # Сповіщення йдуть окремими задачами і можуть запізнитися після завершення запиту
+        if interaction.extras.get('queue_done'):
+            return
+        interaction.extras['queue_status'] = True
+        content = f"⏳ Запит у черзі, позиція: {position}" if position else "⏳ Виконується..."
+        await interaction.edit_original_response(content=content)
+    return show_position
+
+async def clear_queue_status(interaction):
+    """Прибирає повідомлення про позицію в черзі: результат чи помилка надсилаються окремими повідомленнями"""
+    interaction.extras['queue_done'] = True
+    if interaction.extras.get('queue_status'):
+        try:
+            await interaction.delete_original_response()
+        except discord.HTTPException as e:
+            print(f"Не вдалося прибрати статус черги: {e}")
+
+async def current_inventory(clan):
+    if INGEST_WORKER:
+        return await asyncio.to_thread(shared_store.get, clan.store_key('tank_inventory'), inventory.TankInventory.from_dict)
+    if clan.inventory.updated_at is None and not await refresh_tank_inventory(clan):
+        return None
+    return clan.inventory
+
+async def current_leaderboards(clan):
+    if INGEST_WORKER:
+        return await asyncio.to_thread(shared_store.get, clan.store_key('leaderboards'), leaderboards.Leaderboards.from_dict)
+    return clan.leaderboards if clan.leaderboards.updated_at is not None else None
+
+def resolve_clan(interaction, value):
+    """Клан з параметра команди, інакше клан сервера"""
+    return core.find_clan(value) if value else core.guild_clan(interaction.guild_id)
+
+async def clan_autocomplete(interaction: discord.Interaction, current: str):
+    current = current.lower()
+    return [app_commands.Choice(name=clan.label, value=clan.key) for clan in core.tracked_clans.values()
+            if current in clan.label.lower() or current in clan.key][:25]
+
+def player_api(interaction):
+    """Пошук гравців - у регіоні клану сервера"""
+    return core.guild_clan(interaction.guild_id).api
+
+CLAN_DESCRIBE = "Клан (тег, ID або регіон:ID), за замовчуванням клан сервера"
+
+@app_commands.command(name="clan_info", description="Показати загальну інформацію про клан")
+@app_commands.describe(clan=CLAN_DESCRIBE)
+@app_commands.autocomplete(clan=clan_autocomplete)
+async def clan_info(interaction: discord.Interaction, clan: Optional[str] = None):
+    """Display basic clan information"""
+    await interaction.response.defer()
+    
+    target = resolve_clan(interaction, clan)
+    if target is None:
+        return await interaction.followup.send(UNKNOWN_CLAN_MESSAGE)
+    
+    try:
+        info = await clan_data(interaction, target, 'clan_info', fetch_clan_info)
+        
+        if info is not None:
+            embed = discord.Embed(
+                title=f"[{info['tag']}] {info['name']}",
+                color=discord.Color.blue()
+            )
+            
+            embed.add_field(name="Motto", value=info['motto'] or "Не встановлено", inline=False)
+            embed.add_field(name="Members", value=str(info['members_count']), inline=True)
+            embed.add_field(name="Created", value=datetime.fromtimestamp(info['created_at']).strftime('%Y-%m-%d'), inline=True)
+            
+            if info['emblems']:
+                embed.set_thumbnail(url=info['emblems']['x195']['portal'])
+                
+            await interaction.followup.send(embed=embed)
+        else:
+            mark_failed(interaction)
+            await interaction.followup.send("Не вдалося отримати інформацію про клан.")
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+STRONGHOLD_METRICS = ('total_battles_count', 'wins', 'industrial_resource', 'reserved_industrial_resource')
+
+def record_stronghold_stats(clan, stats):
+    """Зберігає знімок статистики укріпрайону в історію"""
+    for key in STRONGHOLD_METRICS:
+        if isinstance(stats.get(key), (int, float)):
+            clan.metrics.append(f"stronghold/{key}", stats[key])
+
+def record_clan_ratings(clan, ratings):
+    """Зберігає знімок рейтингу клану в історію"""
+    for category, rating in ratings.items():
+        if isinstance(rating, dict) and isinstance(rating.get('value'), (int, float)):
+            clan.metrics.append(f"rating/{category}", rating['value'])
+
+def record_clan_metrics(clan, ratings, stronghold):
+    """Знімок рейтингу та денної статистики укріпрайону (блокуючий запис файлів, через asyncio.to_thread).
+    Історію пише лише планове опитування, а не команди користувачів, тож точки йдуть рівномірно"""
+    if ratings is not None:
+        record_clan_ratings(clan, ratings)
+    if stronghold is not None:
+        record_stronghold_stats(clan, stronghold)
+
+def history_chart(clan, title, names, days):
+    """Будує графік і тренди за історією (блокуючий виклик, запускати через asyncio.to_thread)"""
+    since = int(time.time()) - days * 86400
+    series = []
+    trends = {}
+    for name in names:
+        ts, values = clan.metrics.query(name, since)
+        series.append((name.split('/')[-1], ts, values))
+        trends[name] = timeseries.trend(ts, values)
+    # Pillow потрібен лише для графіків історії
+    import charts
+    return charts.line_chart(series, title), trends
+
+def format_trend(trend):
+    if not trend:
+        return "недостатньо історії"
+    pct = f" ({trend['pct']:+.1f}%)" if trend['pct'] is not None else ""
+    return f"{trend['delta']:+.0f}{pct}, {trend['slope_per_day']:+.1f}/день"
+
+@app_commands.command(name="stronghold", description="Показати статистику укріпрайону")
+@app_commands.describe(
+    days="Кількість днів для аналізу (за замовчуванням 7)",
+    chart="Показати графік історії за вказану кількість днів",
+    clan=CLAN_DESCRIBE
+)
+@app_commands.autocomplete(clan=clan_autocomplete)
+async def stronghold_stats(interaction: discord.Interaction, days: int = 7, chart: bool = False,
+                           clan: Optional[str] = None):
+    """Display stronghold statistics for the specified number of days"""
+    await interaction.response.defer()
+    
+    target = resolve_clan(interaction, clan)
+    if target is None:
+        return await interaction.followup.send(UNKNOWN_CLAN_MESSAGE)
+    
+    try:
+        period = 'day' if days <= 7 else 'month'
+        stats = await clan_data(interaction, target, f"stronghold/{period}", fetch_stronghold_stats, period)
+        
+        if stats is not None:
+            embed = discord.Embed(
+                title=f"Статистика укріпрайону за {days} днів",
+                color=discord.Color.green()
+            )
+            embed.set_author(name=target.label)
+            
+            # Battles statistics
+            total_battles = stats.get('total_battles_count', 0)
+            wins = stats.get('wins', 0)
+            win_rate = (wins / total_battles * 100) if total_battles > 0 else 0
+            
+            embed.add_field(
+                name="Загальна статистика",
+                value=f"Всього боїв: {total_battles}\n"
+                      f"Перемог: {wins}\n"
+                      f"Відсоток перемог: {win_rate:.2f}%",
+                inline=False
+            )
+            
+            # Resources statistics
+            embed.add_field(
+                name="Ресурси",
+                value=f"Промресурс: {stats.get('industrial_resource', 0)}\n"
+                      f"Заброньовано: {stats.get('reserved_industrial_resource', 0)}",
+                inline=False
+            )
+            
+            if chart:
+                png, trends = await asyncio.to_thread(
+                    history_chart, target, f"Stronghold, {days}d",
+                    ['stronghold/total_battles_count', 'stronghold/wins'], days
+                )
+                embed.add_field(
+                    name=f"Зміна за {days} днів",
+                    value=f"Боїв: {format_trend(trends['stronghold/total_battles_count'])}\n"
+                          f"Перемог: {format_trend(trends['stronghold/wins'])}",
+                    inline=False
+                )
+                embed.set_image(url="attachment://stronghold.png")
+                return await interaction.followup.send(embed=embed, file=discord.File(io.BytesIO(png), filename="stronghold.png"))
+            
+            await interaction.followup.send(embed=embed)
+        else:
+            mark_failed(interaction)
+            await interaction.followup.send("Не вдалося отримати статистику укріпрайону.")
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+@app_commands.command(name="members_activity", description="Показати активність учасників клану в укріпрайоні")
+@app_commands.describe(days="Кількість днів для аналізу (за замовчуванням 7)", clan=CLAN_DESCRIBE)
+@app_commands.autocomplete(clan=clan_autocomplete)
+async def members_activity(interaction: discord.Interaction, days: int = 7, clan: Optional[str] = None):
+    """Display clan members activity in stronghold"""
+    await interaction.response.defer()
+    
+    target = resolve_clan(interaction, clan)
+    if target is None:
+        return await interaction.followup.send(UNKNOWN_CLAN_MESSAGE)
+    
+    try:
+        member_stats = await clan_data(interaction, target, 'member_stats', fetch_member_stats, queued=True)
+        
+        if member_stats is not None:
+            for i, chunk in enumerate(render_members_activity(member_stats)):
+                header = f"**{target.label}**\n" if i == 0 else ""
+                await interaction.followup.send(f"{header}```\n{chunk}\n```")
+        else:
+            mark_failed(interaction)
+            await interaction.followup.send("Не вдалося отримати інформацію про учасників клану.")
+    except jobs.QueueFull:
+        mark_failed(interaction)
+        await interaction.followup.send(QUEUE_FULL_MESSAGE)
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+@app_commands.command(name="player_tanks", description="Показати інформацію про танки гравця")
+@app_commands.describe(nickname="Нікнейм гравця")
+async def player_tanks(interaction: discord.Interaction, nickname: str):
+    """Display player's tanks information"""
+    await interaction.response.defer()
+    api = player_api(interaction)
+    
+    try:
+        # Get account ID
+        account_data = await api.make_request('account/list', {'search': nickname, 'limit': 1})
+        
+        if account_data['status'] == 'ok' and account_data['data']:
+            account_id = account_data['data'][0]['account_id']
+            
+            # Get player's tanks
+            tanks_data = await api.make_request('tanks/stats', {
+                'account_id': account_id,
+                'fields': TANK_STATS_FIELDS
+            })
+            
+            if tanks_data['status'] == 'ok' and tanks_data['data'].get(str(account_id)) is not None:
+                tanks = tanks_data['data'][str(account_id)]
+                
+                engine = get_rating_engine()
+                rating = engine.rate({account_id: ratings.TankStats.from_api(tanks)})[account_id] if engine else None
+                
+                # Get tank names
+                tank_ids = [str(tank['tank_id']) for tank in tanks]
+                vehicles_data = await api.make_request('encyclopedia/vehicles', {
+                    'tank_id': ','.join(tank_ids)
+                })
+                
+                if vehicles_data['status'] == 'ok':
+                    tank_stats = []
+                    for tank in tanks:
+                        tank_id = str(tank['tank_id'])
+                        if tank_id in vehicles_data['data']:
+                            vehicle = vehicles_data['data'][tank_id]
+                            battles = tank['all']['battles']
+                            wins = tank['all']['wins']
+                            win_rate = (wins / battles * 100) if battles > 0 else 0
+                            
+                            tank_stats.append({
+                                'name': vehicle['name'],
+                                'tier': vehicle['tier'],
+                                'type': vehicle['type'],
+                                'battles': battles,
+                                'win_rate': win_rate,
+                                'wn8': rating.tanks.get(tank['tank_id']) if rating else None
+                            })
+                    
+                    # Sort by battles
+                    tank_stats.sort(key=lambda x: x['battles'], reverse=True)
+                    
+                    # Create embed pages (10 tanks per page)
+                    tanks_per_page = 10
+                    pages = []
+                    
+                    for i in range(0, len(tank_stats), tanks_per_page):
+                        page_tanks = tank_stats[i:i + tanks_per_page]
+                        embed = discord.Embed(
+                            title=f"Танки гравця {nickname}",
+                            description=f"Сторінка {len(pages) + 1}"
+                                        + (f"\nЗагальний WN8: **{rating.overall:.0f}**" if rating else ""),
+                            color=discord.Color(ratings.wn8_color(rating.overall)) if rating else discord.Color.blue()
+                        )
+                        
+                        for tank in page_tanks:
+                            wn8 = f"\nWN8: {tank['wn8']:.0f}" if tank['wn8'] is not None else ""
+                            embed.add_field(
+                                name=f"{tank['name']} (Рівень {tank['tier']})",
+                                value=f"Тип: {tank['type']}\n"
+                                      f"Боїв: {tank['battles']}\n"
+                                      f"Відсоток перемог: {tank['win_rate']:.2f}%{wn8}",
+                                inline=False
+                            )
+                        
+                        pages.append(embed)
+                    
+                    # Send first page
+                    current_page = 0
+                    message = await interaction.followup.send(embed=pages[current_page])
+                    
+                    # Add navigation reactions
+                    if len(pages) > 1:
+                        await message.add_reaction("◀️")
+                        await message.add_reaction("▶️")
+                        
+                        def check(reaction, user):
+                            return user == interaction.user and str(reaction.emoji) in ["◀️", "▶️"]
+                        
+                        while True:
+                            try:
+                                reaction, user = await bot.wait_for("reaction_add", timeout=60.0, check=check)
+                                
+                                if str(reaction.emoji) == "▶️" and current_page < len(pages) - 1:
+                                    current_page += 1
+                                    await message.edit(embed=pages[current_page])
+                                elif str(reaction.emoji) == "◀️" and current_page > 0:
+                                    current_page -= 1
+                                    await message.edit(embed=pages[current_page])
+                                
+                                await message.remove_reaction(reaction, user)
+                            except asyncio.TimeoutError:
+                                await message.clear_reactions()
+                                break
+                else:
+                    mark_failed(interaction)
+                    await interaction.followup.send("Не вдалося отримати інформацію про танки.")
+            else:
+                mark_failed(interaction)
+                await interaction.followup.send("Не вдалося отримати статистику гравця.")
+        else:
+            await interaction.followup.send("Гравця не знайдено.")
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+@app_commands.command(name="clan_battles", description="Показати останні бої клану")
+@app_commands.describe(count="Кількість боїв для показу (за замовчуванням 10)", clan=CLAN_DESCRIBE)
+@app_commands.autocomplete(clan=clan_autocomplete)
+async def clan_battles(interaction: discord.Interaction, count: int = 10, clan: Optional[str] = None):
+    """Display recent clan battles"""
+    await interaction.response.defer()
+    
+    target = resolve_clan(interaction, clan)
+    if target is None:
+        return await interaction.followup.send(UNKNOWN_CLAN_MESSAGE)
+    
+    try:
+        battles = await clan_data(interaction, target, 'clan_battles', fetch_clan_battles, count)
+        
+        if battles is not None:
+            # Воркер зберігає останні CLAN_BATTLES_LIMIT боїв
+            battles = battles[:count]
+            
+            embed = discord.Embed(
+                title=f"Останні {count} боїв клану",
+                color=discord.Color.green()
+            )
+            embed.set_author(name=target.label)
+            
+            for battle in battles:
+                result = "Перемога" if battle['result'] == 'victory' else "Поразка"
+                battle_time = datetime.fromtimestamp(battle['time']).strftime('%Y-%m-%d %H:%M')
+                
+                embed.add_field(
+                    name=f"Бій {battle_time}",
+                    value=f"Результат: {result}\n"
+                          f"Тип: {battle['type']}\n"
+                          f"Рівень: {battle['level']}",
+                    inline=False
+                )
+            
+            await interaction.followup.send(embed=embed)
+        else:
+            mark_failed(interaction)
+            await interaction.followup.send("Не вдалося отримати інформацію про бої.")
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+WINDOW_NAMES = {1: "за добу", 7: "за тиждень", 30: "за місяць", 0: "за весь час"}
+
+@app_commands.command(name="top_players", description="Показати топ гравців клану за вибраним параметром")
+@app_commands.describe(
+    parameter="Параметр для сортування",
+    days="Період (за замовчуванням тиждень)",
+    clan=CLAN_DESCRIBE
+)
+@app_commands.choices(
+    parameter=[app_commands.Choice(name=name, value=key) for key, (name, _) in leaderboards.PARAMETERS.items()],
+    days=[app_commands.Choice(name=WINDOW_NAMES[days], value=days) for days in leaderboards.WINDOWS]
+)
+@app_commands.autocomplete(clan=clan_autocomplete)
+async def top_players(
+    interaction: discord.Interaction,
+    parameter: str = "battles",
+    days: int = 7,
+    clan: Optional[str] = None
+):
+    """Display top clan players by selected parameter"""
+    await interaction.response.defer()
+    
+    target = resolve_clan(interaction, clan)
+    if target is None:
+        return await interaction.followup.send(UNKNOWN_CLAN_MESSAGE)
+    
+    try:
+        # Таблиці готові після кожного оновлення статистики учасників; сканування складу - лише якщо їх ще немає
+        boards = await current_leaderboards(target)
+        if boards is None and not INGEST_WORKER:
+            await clan_data(interaction, target, 'member_stats', fetch_member_stats, queued=True)
+            boards = await current_leaderboards(target)
+        board = boards.board(parameter, days) if boards is not None else None
+        
+        if board is not None:
+            title, _ = leaderboards.PARAMETERS[parameter]
+            embed = discord.Embed(
+                title=f"Топ {leaderboards.TOP_SIZE} гравців: {title.lower()} {WINDOW_NAMES[days]}",
+                color=discord.Color.gold()
+            )
+            embed.set_author(name=target.label)
+            
+            for i, (nickname, value) in enumerate(board['rows'], 1):
+                embed.add_field(
+                    name=f"{i}. {nickname}",
+                    value=f"Значення: {value}",
+                    inline=False
+                )
+            
+            footer = f"Оновлено {datetime.fromtimestamp(boards.updated_at).strftime('%Y-%m-%d %H:%M')}"
+            if days and board['since'] is not None and board['since'] > boards.updated_at - days * leaderboards.DAY:
+                # Історії ще менше, ніж вибраний період
+                footer += f", дані з {datetime.fromtimestamp(board['since']).strftime('%Y-%m-%d %H:%M')}"
+            embed.set_footer(text=footer)
+            
+            await interaction.followup.send(embed=embed)
+        else:
+            mark_failed(interaction)
+            await interaction.followup.send("Не вдалося отримати інформацію про учасників клану.")
+    except jobs.QueueFull:
+        mark_failed(interaction)
+        await interaction.followup.send(QUEUE_FULL_MESSAGE)
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+@app_commands.command(name="clan_rating", description="Показати рейтинг клану")
+@app_commands.describe(
+    chart="Категорія рейтингу для графіка історії (наприклад efficiency)",
+    days="Кількість днів історії для графіка (за замовчуванням 30)",
+    clan=CLAN_DESCRIBE
+)
+@app_commands.autocomplete(clan=clan_autocomplete)
+async def clan_rating(interaction: discord.Interaction, chart: Optional[str] = None, days: int = 30,
+                      clan: Optional[str] = None):
+    """Display clan rating information"""
+    await interaction.response.defer()
+    
+    target = resolve_clan(interaction, clan)
+    if target is None:
+        return await interaction.followup.send(UNKNOWN_CLAN_MESSAGE)
+    
+    try:
+        clan_ratings = await clan_data(interaction, target, 'clan_ratings', fetch_clan_ratings)
+        
+        if clan_ratings is not None:
+            embed = discord.Embed(
+                title="Рейтинг клану",
+                color=discord.Color.blue()
+            )
+            embed.set_author(name=target.label)
+            
+            for category, rating in clan_ratings.items():
+                if isinstance(rating, dict) and 'value' in rating:
+                    embed.add_field(
+                        name=category,
+                        value=f"Значення: {rating['value']}\n"
+                              f"Ранг: {rating.get('rank', 'N/A')}",
+                        inline=True
+                    )
+            
+            if chart:
+                if f"rating/{chart}" not in target.metrics.series('rating/'):
+                    return await interaction.followup.send(
+                        embed=embed,
+                        content=f"Немає історії для категорії `{chart}`"
+                    )
+                png, trends = await asyncio.to_thread(history_chart, target, f"{chart}, {days}d", [f"rating/{chart}"], days)
+                embed.add_field(name=f"{chart}: зміна за {days} днів", value=format_trend(trends[f"rating/{chart}"]), inline=False)
+                embed.set_image(url="attachment://rating.png")
+                return await interaction.followup.send(embed=embed, file=discord.File(io.BytesIO(png), filename="rating.png"))
+            
+            await interaction.followup.send(embed=embed)
+        else:
+            mark_failed(interaction)
+            await interaction.followup.send("Не вдалося отримати інформацію про рейтинг клану.")
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+@app_commands.command(name="player_achievements", description="Показати досягнення гравця")
+@app_commands.describe(nickname="Нікнейм гравця")
+async def player_achievements(interaction: discord.Interaction, nickname: str):
+    """Display player's achievements"""
+    await interaction.response.defer()
+    api = player_api(interaction)
+    
+    try:
+        # Get account ID
+        account_data = await api.make_request('account/list', {'search': nickname, 'limit': 1})
+        
+        if account_data['status'] == 'ok' and account_data['data']:
+            account_id = account_data['data'][0]['account_id']
+            
+            # Get achievements
+            achievements_data = await api.make_request('account/achievements', {
+                'account_id': account_id
+            })
+            
+            if achievements_data['status'] == 'ok' and str(account_id) in achievements_data['data']:
+                achievements = achievements_data['data'][str(account_id)]
+                
+                # Get achievement descriptions
+                descriptions = await api.make_request('encyclopedia/achievements', {})
+                
+                if descriptions['status'] == 'ok':
+                    embed = discord.Embed(
+                        title=f"Досягнення гравця {nickname}",
+                        color=discord.Color.purple()
+                    )
+                    
+                    for achievement, count in achievements.items():
+                        if achievement in descriptions['data']:
+                            desc = descriptions['data'][achievement]
+                            embed.add_field(
+                                name=f"{desc['name']} (x{count})",
+                                value=desc['description'][:1024],
+                                inline=False
+                            )
+                    
+                    await interaction.followup.send(embed=embed)
+                else:
+                    mark_failed(interaction)
+                    await interaction.followup.send("Не вдалося отримати опис досягнень.")
+            else:
+                mark_failed(interaction)
+                await interaction.followup.send("Не вдалося отримати інформацію про досягнення.")
+        else:
+            await interaction.followup.send("Гравця не знайдено.")
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+@app_commands.command(name="clan_wn8", description="Показати WN8 клану та його учасників")
+@app_commands.describe(limit="Кількість гравців для показу (за замовчуванням 15)", clan=CLAN_DESCRIBE)
+@app_commands.autocomplete(clan=clan_autocomplete)
+async def clan_wn8(interaction: discord.Interaction, limit: int = 15, clan: Optional[str] = None):
+    """Display clan-wide and per-member WN8"""
+    await interaction.response.defer()
+    
+    if not INGEST_WORKER and get_rating_engine() is None:
+        return await interaction.followup.send("Таблиця очікуваних значень WN8 не налаштована.")
+    
+    target = resolve_clan(interaction, clan)
+    if target is None:
+        return await interaction.followup.send(UNKNOWN_CLAN_MESSAGE)
+    
+    try:
+        wn8 = await clan_data(interaction, target, 'clan_wn8', fetch_clan_wn8)
+        if wn8 is None:
+            mark_failed(interaction)
+            return await interaction.followup.send("Не вдалося отримати інформацію про учасників клану.")
+        
+        rated = wn8['members']
+        embed = discord.Embed(
+            title="WN8 клану",
+            description=f"WN8 клану: **{wn8['clan']:.0f}**\n"
+                        f"Середній WN8 учасників: **{sum(m['wn8'] for m in rated) / len(rated) if rated else 0:.0f}**",
+            color=discord.Color(ratings.wn8_color(wn8['clan']))
+        )
+        embed.set_author(name=target.label)
+        
+        lines = [f"{i}. {member['nickname']} - {member['wn8']:.0f}" for i, member in enumerate(rated[:limit], 1)]
+        if lines:
+            embed.add_field(name="Учасники", value='\n'.join(lines)[:1024], inline=False)
+        embed.set_footer(text=f"Враховано {len(rated)} з {wn8['roster']} учасників")
+        
+        await interaction.followup.send(embed=embed)
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+@app_commands.command(name="lineup", description="Знайти гравців клану з потрібними танками")
+@app_commands.describe(
+    tier="Рівень техніки",
+    type="Тип техніки",
+    tank="Частина назви танка",
+    min_battles="Мінімальна кількість боїв на танку (за замовчуванням 0)",
+    limit="Кількість гравців для показу (за замовчуванням 20)",
+    clan=CLAN_DESCRIBE
+)
+@app_commands.choices(type=[
+    app_commands.Choice(name=name, value=value) for value, name in TANK_TYPE_NAMES.items()
+])
+@app_commands.autocomplete(clan=clan_autocomplete)
+async def lineup(
+    interaction: discord.Interaction,
+    tier: Optional[app_commands.Range[int, 1, 10]] = None,
+    type: Optional[app_commands.Choice[str]] = None,
+    tank: Optional[str] = None,
+    min_battles: int = 0,
+    limit: int = 20,
+    clan: Optional[str] = None
+):
+    """Answer lineup queries from the clan tank index"""
+    await interaction.response.defer()
+    
+    target = resolve_clan(interaction, clan)
+    if target is None:
+        return await interaction.followup.send(UNKNOWN_CLAN_MESSAGE)
+    
+    try:
+        index = await current_inventory(target)
+        if index is None:
+            mark_failed(interaction)
+            return await interaction.followup.send("Не вдалося побудувати індекс танків клану.")
+        
+        started = time.perf_counter()
+        found = index.find(tier, type.value if type else None, tank, min_battles)
+        
+        # Групуємо за гравцями, найдосвідченіші першими
+        players = {}
+        for account_id, tank_id, battles, wins in found:
+            players.setdefault(account_id, []).append((tank_id, battles, wins))
+        elapsed = (time.perf_counter() - started) * 1000
+        
+        criteria = [f"рівень {tier}" if tier else None, type.name if type else None,
+                    f"назва містить \"{tank}\"" if tank else None, f"від {min_battles} боїв" if min_battles else None]
+        embed = discord.Embed(
+            title="Підбір складу",
+            description=(", ".join(c for c in criteria if c) or "Вся техніка") + f"\nЗнайдено гравців: **{len(players)}**",
+            color=discord.Color.dark_green()
+        )
+        embed.set_author(name=target.label)
+        
+        # Discord дозволяє не більше 25 полів в embed
+        for account_id, tanks in list(players.items())[:min(limit, 25)]:
+            lines = [f"{index.vehicles[tank_id]['name']} (Рівень {index.vehicles[tank_id]['tier']}) - "
+                     f"{battles} боїв, {wins / battles * 100 if battles else 0:.1f}%"
+                     for tank_id, battles, wins in tanks[:3]]
+            if len(tanks) > 3:
+                lines.append(f"...та ще {len(tanks) - 3}")
+            embed.add_field(name=index.names.get(account_id, str(account_id)), value='\n'.join(lines), inline=False)
+        
+        age = (time.time() - index.updated_at) / 60
+        embed.set_footer(text=f"Індекс оновлено {age:.0f} хв тому • пошук {elapsed:.1f} мс")
+        await interaction.followup.send(embed=embed)
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+@app_commands.command(name="compare", description="Порівняти кількох гравців")
+@app_commands.describe(nicknames=f"Нікнейми гравців через кому (до {MAX_COMPARE_PLAYERS})")
+async def compare(interaction: discord.Interaction, nicknames: str):
+    """Side-by-side comparison of several players in a few multi-ID requests"""
+    await interaction.response.defer()
+    
+    names = []
+    for name in re.split(r'[,\s]+', nicknames):
+        if name and name.lower() not in [n.lower() for n in names]:
+            names.append(name)
+    if not names:
+        return await interaction.followup.send("Вкажіть хоча б один нікнейм.")
+    if len(names) > MAX_COMPARE_PLAYERS:
+        return await interaction.followup.send(f"Можна порівняти не більше {MAX_COMPARE_PLAYERS} гравців.")
+    
+    api = player_api(interaction)
+    try:
+        # Точний пошук приймає кілька нікнеймів одним запитом
+        account_data = await api.make_request('account/list', {
+            'search': ','.join(names),
+            'type': 'exact',
+            'limit': 100
+        })
+        
+        if account_data['status'] != 'ok' or not account_data['data']:
+            return await interaction.followup.send("Гравців не знайдено.")
+        
+        accounts = {str(account['account_id']): account['nickname'] for account in account_data['data']}
+        account_ids = ','.join(accounts)
+        
+        info_data, tanks_data, achievements_data = await asyncio.gather(
+            api.make_request('account/info', {
+                'account_id': account_ids,
+                'fields': 'global_rating,statistics.all.battles,statistics.all.wins,statistics.all.damage_dealt'
+            }),
+            api.make_request('account/tanks', {
+                'account_id': account_ids,
+                'fields': 'tank_id,mark_of_mastery'
+            }),
+            api.make_request('account/achievements', {
+                'account_id': account_ids,
+                'fields': 'achievements'
+            })
+        )
+        
+        if info_data['status'] != 'ok':
+            mark_failed(interaction)
+            return await interaction.followup.send("Не вдалося отримати статистику гравців.")
+        
+        rows = []
+        for account_id, nickname in accounts.items():
+            info = info_data['data'].get(account_id) or {}
+            stats = (info.get('statistics') or {}).get('all') or {}
+            battles = stats.get('battles', 0)
+            tanks = (tanks_data['data'].get(account_id) or []) if tanks_data['status'] == 'ok' else []
+            medals = (achievements_data['data'].get(account_id) or {}).get('achievements') or {} \
+                if achievements_data['status'] == 'ok' else {}
+            
+            rows.append([
+                nickname,
+                info.get('global_rating') or 0,
+                battles,
+                f"{stats.get('wins', 0) / battles * 100:.2f}" if battles else "0.00",
+                round(stats.get('damage_dealt', 0) / battles) if battles else 0,
+                len(tanks),
+                sum(1 for tank in tanks if tank.get('mark_of_mastery') == 4),
+                sum(medals.values())
+            ])
+        
+        rows.sort(key=lambda row: row[1], reverse=True)
+        from tabulate import tabulate
+        table = tabulate(
+            rows,
+            headers=['Гравець', 'Рейтинг', 'Боїв', '% перемог', 'Сер. шкода', 'Танків', 'Майстер', 'Медалей'],
+            tablefmt='grid'
+        )
+        
+        found = {nickname.lower() for nickname in accounts.values()}
+        missing = [name for name in names if name.lower() not in found]
+        if missing:
+            table += f"\n\nНе знайдено: {', '.join(missing)}"
+        
+        for chunk in [table[i:i+1900] for i in range(0, len(table), 1900)]:
+            await interaction.followup.send(f"```\n{chunk}\n```")
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+@app_commands.command(name="clan_setup", description="Вибрати клан, який команди показують на цьому сервері")
+@app_commands.describe(realm="Регіон клану", tag="Тег клану")
+@app_commands.choices(realm=[app_commands.Choice(name=realm.upper(), value=realm) for realm in REALMS])
+async def clan_setup(interaction: discord.Interaction, realm: app_commands.Choice[str], tag: str):
+    if not interaction.user.guild_permissions.administrator:
+        return await interaction.response.send_message("❌ У вас немає прав на це", ephemeral=True)
+    
+    await interaction.response.defer(ephemeral=True)
+    try:
+        found = await core.wg_apis[realm.value].make_request('clans/list', {
+            'search': tag,
+            'fields': 'clan_id,tag,name',
+            'limit': 10
+        })
+        match = next((c for c in found.get('data') or [] if c['tag'].lower() == tag.lower()), None) \
+            if found['status'] == 'ok' else None
+        if match is None:
+            return await interaction.followup.send(f"Клан з тегом `{tag}` не знайдено в регіоні {realm.name}.")
+        
+        clan = core.get_clan(f"{realm.value}:{match['clan_id']}")
+        clan.tag = match['tag']
+        core.guild_clans[str(interaction.guild.id)] = {'clan': clan.key, 'tag': clan.tag}
+        core.save_guild_clans()
+        schedule_clan(clan)
+        await interaction.followup.send(f"✅ Команди клану на цьому сервері тепер показують {clan.label} ({match['name']})")
+    except Exception as e:
+        mark_failed(interaction)
+        await interaction.followup.send(f"Помилка: {str(e)}")
+
+async def collect_clan_metrics(clan):
+    """Періодично записує метрики клану в історію"""
+    if clan.tag is None:
+        await fetch_clan_info(clan)
+    ratings = await fetch_clan_ratings(clan)
+    stronghold = await fetch_stronghold_stats(clan, 'day')
+    await asyncio.to_thread(record_clan_metrics, clan, ratings, stronghold)
+
+COMMANDS = (clan_info, stronghold_stats, members_activity, player_tanks, clan_battles, top_players,
+            clan_rating, player_achievements, clan_wn8, lineup, compare, clan_setup)
+
+def schedule_clan(clan):
+    """Фонові оновлення клану у спільному планувальнику; з воркером їх виконує він"""
+    if INGEST_WORKER:
+        return
+    # При кількох процесах історію клану збирає лише процес із шардом 0
+    if owns_guild(0):
+        refresh_scheduler.add(f"{clan.key}/metrics", 'metrics', clan.realm, CLAN_METRICS_INTERVAL_MINUTES,
+                              collect_clan_metrics, clan)
+    refresh_scheduler.add(f"{clan.key}/inventory", 'inventory', clan.realm, INVENTORY_REFRESH_MINUTES,
+                          refresh_tank_inventory, clan)
+    refresh_scheduler.add(f"{clan.key}/members", 'members', clan.realm, LEADERBOARD_REFRESH_MINUTES,
+                          fetch_member_stats, clan)
+
+def start_loops():
+    for clan in core.tracked_clans.values():
+        if INGEST_WORKER and clan.tag is None:
+            info = shared_store.get(clan.store_key('clan_info'))
+            clan.tag = info['tag'] if info else None
+        schedule_clan(clan)
+    if not INGEST_WORKER:
+        refresh_scheduler.start()
+
+async def on_ready():
+    start_loops()
+
+async def setup(bot):
+    for command in COMMANDS:
+        bot.tree.add_command(command)
+    bot.add_listener(on_ready)
+    if bot.is_ready():
+        start_loops()
+
+async def teardown(bot):
+    # Команди та обробники подій модуля discord.py прибирає сам, задачі модуля прибираємо з планувальника
+    for clan in core.tracked_clans.values():
+        refresh_scheduler.remove(f"{clan.key}/metrics")
+        refresh_scheduler.remove(f"{clan.key}/inventory")
+        refresh_scheduler.remove(f"{clan.key}/members")
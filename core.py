@@ -0,0 +1,778 @@
+"""Ядро бота: конфігурація, клієнт Discord і Wargaming API, спільний стан та фонові задачі шардів.
+
+Команди живуть у розширеннях (cogs/), які можна перезавантажувати без перепідключення до шлюзу.
+Весь стан, що має пережити перезавантаження, зберігається тут.
+"""
+import os
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+import aiohttp
+from datetime import datetime
+from dotenv import load_dotenv
+import asyncio
+from collections import defaultdict
+import importlib.util
+import json
+import time
+import hashlib
+import psutil
+import metrics
+import profiler
+import clans
+import feed
+import scheduler
+import store
+import jobs
+import resilience
+import tracking
+
+# Холодний старт рахується від запуску процесу (разом із запуском інтерпретатора та імпортами)
+PROCESS_STARTED = psutil.Process().create_time()
+startup_phases = {'імпорти': time.time() - PROCESS_STARTED}  # етап -> секунд
+
+# Load environment variables
+load_dotenv()
+
+# Bot configuration
+DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
+WARGAMING_API_KEY = os.getenv('WARGAMING_API_KEY')
+# Відстежувані клани (регіон:ID через кому); перший - клан за замовчуванням для серверів без налаштування
+CLANS = [key for key in os.getenv('CLANS', 'eu:500310423').split(',') if key.strip()]  # UADRG
+GUILD_CLANS_FILE = 'guild_clans.json'
+SYNC_GUILD_ID = os.getenv('SYNC_GUILD_ID')  # Синхронізація команд лише для одного сервера (для розробки)
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC', '').lower() in ('1', 'true', 'yes')
+COMMAND_HASH_FILE = 'command_tree_hash.json'
+
+# Шардинг: AUTO_SHARD вмикає AutoShardedBot, SHARD_IDS дозволяє запускати частину шардів в окремому процесі
+AUTO_SHARD = os.getenv('AUTO_SHARD', '').lower() in ('1', 'true', 'yes')
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+SHARD_IDS = [int(i) for i in os.getenv('SHARD_IDS', '').split(',') if i.strip()] or None
+
+# Кеш учасників: all - всі учасники (за замовчуванням), voice - лише учасники в голосових каналах, none - без кешу.
+# В режимах voice/none учасники сервера завантажуються лише при першому виклику /dis_stat
+MEMBER_CACHE_POLICY = os.getenv('MEMBER_CACHE_POLICY', 'all').lower()
+MEMBER_CACHE_IDLE_MINUTES = int(os.getenv('MEMBER_CACHE_IDLE_MINUTES', '30'))
+
+# Метрики Prometheus (вимкнено, якщо METRICS_PORT не вказано)
+METRICS_PORT = os.getenv('METRICS_PORT')
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+# Логувати callback-и, що блокують цикл подій довше за поріг (0 - вимкнено)
+SLOW_CALLBACK_MS = int(os.getenv('SLOW_CALLBACK_MS', '500'))
+
+# Історія метрик клану (рейтинг, укріпрайон)
+TIMESERIES_DIR = os.getenv('TIMESERIES_DIR', 'timeseries')
+CLAN_METRICS_INTERVAL_MINUTES = int(os.getenv('CLAN_METRICS_INTERVAL_MINUTES', '60'))
+
+# Таблиця очікуваних значень WN8 (формат XVM, https://static.modxvm.com/wn8-data-exp/json/wn8exp.json)
+WN8_EXPECTED_FILE = os.getenv('WN8_EXPECTED_FILE', 'wn8_expected.json')
+
+# Окремий процес-воркер (worker.py) опитує Wargaming API і пише готові результати у спільне сховище
+INGEST_WORKER = os.getenv('INGEST_WORKER', 'false').lower() == 'true'
+SHARED_STORE_DIR = os.getenv('SHARED_STORE_DIR', 'shared_store')
+
+# Індекс танків клану для /lineup (для кожного клану окремий файл з його ID в назві)
+TANK_INVENTORY_FILE = os.getenv('TANK_INVENTORY_FILE', 'tank_inventory.json')
+INVENTORY_REFRESH_MINUTES = int(os.getenv('INVENTORY_REFRESH_MINUTES', '30'))
+
+# Таблиці лідерів клану для /top_players (до назви файлу додається ID клану)
+LEADERBOARD_FILE = os.getenv('LEADERBOARD_FILE', 'leaderboards.json')
+LEADERBOARD_REFRESH_MINUTES = int(os.getenv('LEADERBOARD_REFRESH_MINUTES', '60'))
+
+# Синхронізація ролей Discord зі складом клану: інтервал оновлення складу, змін ролей у пакеті та пауза між пакетами
+ROSTER_SYNC_MINUTES = int(os.getenv('ROSTER_SYNC_MINUTES', '15'))
+ROSTER_ROLE_BATCH = int(os.getenv('ROSTER_ROLE_BATCH', '5'))
+ROSTER_ROLE_BATCH_SECONDS = float(os.getenv('ROSTER_ROLE_BATCH_SECONDS', '5'))
+
+# Стрічка досягнень: стан гравців клану (до назви файлу додається ID клану), локальна енциклопедія медалей,
+# інтервал опитування і розділи енциклопедії, медалі яких оголошуються
+ACHIEVEMENT_FEED_FILE = os.getenv('ACHIEVEMENT_FEED_FILE', 'achievement_feed.json')
+ACHIEVEMENT_ENCYCLOPEDIA_FILE = os.getenv('ACHIEVEMENT_ENCYCLOPEDIA_FILE', 'achievements_encyclopedia.json')
+ACHIEVEMENT_FEED_MINUTES = int(os.getenv('ACHIEVEMENT_FEED_MINUTES', '30'))
+ACHIEVEMENT_FEED_SECTIONS = [s.strip() for s in os.getenv('ACHIEVEMENT_FEED_SECTIONS', 'epic').split(',') if s.strip()]
+
+# Прив'язані акаунти WG: як часто фоново оновлюються дані для /me
+ACCOUNT_REFRESH_MINUTES = int(os.getenv('ACCOUNT_REFRESH_MINUTES', '30'))
+
+# Максимальний розмір одного файлу /export (МБ; не більше ліміту вкладень сервера)
+EXPORT_PART_MB = float(os.getenv('EXPORT_PART_MB', '8'))
+
+# Черга довгих команд (/members_activity, /top_players): одночасних задач і задач у черзі на користувача
+COMMAND_JOB_CONCURRENCY = int(os.getenv('COMMAND_JOB_CONCURRENCY', '2'))
+COMMAND_JOBS_PER_USER = int(os.getenv('COMMAND_JOBS_PER_USER', '2'))
+
+# Квота та пул з'єднань кожного регіону Wargaming API; фонові оновлення займають не більше SCHEDULER_QUOTA_SHARE квоти
+WG_REALM_RPS = float(os.getenv('WG_REALM_RPS', '10'))
+WG_REALM_CONNECTIONS = int(os.getenv('WG_REALM_CONNECTIONS', '10'))
+SCHEDULER_QUOTA_SHARE = float(os.getenv('SCHEDULER_QUOTA_SHARE', '0.5'))
+
+# Межі очікування Wargaming API: тайм-аут запиту, бюджет часу команди та довгої задачі черги,
+# дубль запиту, якщо відповіді немає за WG_HEDGE_MS (0 - вимкнено), запобіжник на ендпоінт
+WG_REQUEST_TIMEOUT = float(os.getenv('WG_REQUEST_TIMEOUT', '10'))
+COMMAND_BUDGET_SECONDS = float(os.getenv('COMMAND_BUDGET_SECONDS', '20'))
+COMMAND_JOB_BUDGET_SECONDS = float(os.getenv('COMMAND_JOB_BUDGET_SECONDS', '120'))
+WG_HEDGE_MS = int(os.getenv('WG_HEDGE_MS', '0'))
+WG_BREAKER_FAILURES = int(os.getenv('WG_BREAKER_FAILURES', '5'))
+WG_BREAKER_COOLDOWN = float(os.getenv('WG_BREAKER_COOLDOWN', '30'))
+# Останні успішні відповіді для кланових команд на випадок недоступності API
+STALE_CACHE_DIR = os.getenv('STALE_CACHE_DIR', 'stale_cache')
+
+# Розширення з командами. Ліниві завантажуються при першому виклику однієї з їхніх команд
+EXTENSIONS = ('cogs.wargaming', 'cogs.moderation', 'cogs.notifications', 'cogs.voice', 'cogs.invites', 'cogs.roster',
+              'cogs.achievements', 'cogs.accounts')
+LAZY_EXTENSIONS = {
+    'cogs.diagnostics': ('profile', 'extensions', 'reload'),
+    'cogs.exports': ('export',),
+}
+
+# Bot setup
+class WoTCommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction):
+        interaction.extras['started_at'] = time.perf_counter()
+        # Бюджет діє в задачі команди: всі запити до API обмежені залишком часу
+        resilience.start_budget(COMMAND_BUDGET_SECONDS)
+        # Викликається до пошуку команди в дереві, тож ліниве розширення встигає її зареєструвати
+        extension = lazy_commands.get((interaction.data or {}).get('name'))
+        if extension is not None and extension not in self.client.extensions:
+            await self.client.load_lazy_extension(extension)
+        return True
+    
+    async def on_error(self, interaction, error):
+        if interaction.command:
+            observe_command(interaction, interaction.command, error=True)
+        await super().on_error(interaction, error)
+
+def mark_failed(interaction):
+    """Позначає команду, яка сама обробила помилку й відповіла користувачу: вона теж рахується в command_errors"""
+    interaction.extras['failed'] = True
+
+def observe_command(interaction, command, error=False):
+    started_at = interaction.extras.get('started_at')
+    if started_at is not None:
+        metrics.command_duration.observe(time.perf_counter() - started_at, command.qualified_name)
+    if error or interaction.extras.get('failed'):
+        metrics.command_errors.inc(command.qualified_name)
+
+BotBase = commands.AutoShardedBot if AUTO_SHARD else commands.Bot
+
+class WoTClanBot(BotBase):
+    def __init__(self):
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.members = True  # Add this for member-related commands
+        intents.guilds = True   # Add this for guild-related commands
+        intents.voice_states = True
+        intents.invites = True
+        options = {}
+        if AUTO_SHARD:
+            options.update(shard_count=SHARD_COUNT, shard_ids=SHARD_IDS)
+        if MEMBER_CACHE_POLICY != 'all':
+            member_cache_flags = discord.MemberCacheFlags.none()
+            member_cache_flags.voice = MEMBER_CACHE_POLICY == 'voice'
+            options.update(member_cache_flags=member_cache_flags, chunk_guilds_at_startup=False)
+        super().__init__(command_prefix='/', intents=intents, tree_cls=WoTCommandTree, **options)
+        self.extension_load_times = {}
+        self.lazy_lock = asyncio.Lock()
+        self.state_task = None
+        self.login_started = None
+        self.gateway_started = None
+    
+    async def login(self, token):
+        # Збережений стан читається в окремому потоці, поки йде вхід у Discord
+        self.login_started = time.perf_counter()
+        self.state_task = asyncio.create_task(asyncio.to_thread(load_persisted_state))
+        await super().login(token)
+        
+    async def setup_hook(self):
+        # setup_hook викликається всередині login одразу після входу
+        started = time.perf_counter()
+        startup_phases['вхід'] = started - self.login_started
+        state, startup_phases['стан (паралельно зі входом)'] = await self.state_task
+        startup_phases['очікування стану'] = time.perf_counter() - started
+        apply_persisted_state(state)
+        
+        started = time.perf_counter()
+        await self.load_extensions()
+        startup_phases['розширення'] = time.perf_counter() - started
+        if SLOW_CALLBACK_MS > 0:
+            profiler.LoopWatchdog(self.loop, SLOW_CALLBACK_MS / 1000).start()
+        if METRICS_PORT:
+            await metrics.start_server(METRICS_HOST, int(METRICS_PORT))
+            self.loop.create_task(metrics.monitor_event_loop())
+            print(f"Метрики доступні на http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        started = time.perf_counter()
+        await self.sync_commands()
+        startup_phases['синхронізація команд'] = time.perf_counter() - started
+        self.gateway_started = time.perf_counter()
+    
+    async def load_timed(self, name, reload=False):
+        """Завантажує (або перезавантажує) розширення і запам'ятовує час завантаження"""
+        started = time.perf_counter()
+        if reload:
+            await self.reload_extension(name)
+        else:
+            await self.load_extension(name)
+        elapsed = time.perf_counter() - started
+        self.extension_load_times[name] = elapsed
+        metrics.extension_load_duration.observe(elapsed, name)
+        print(f"Розширення {name} {'перезавантажено' if reload else 'завантажено'} за {elapsed * 1000:.1f} мс")
+        return elapsed
+    
+    async def load_extensions(self):
+        for name in EXTENSIONS:
+            await self.load_timed(name)
+    
+    async def load_lazy_extension(self, name):
+        async with self.lazy_lock:
+            if name not in self.extensions:
+                await self.load_timed(name)
+    
+    def command_tree_hash(self):
+        """Хеш дерева команд (без звернень до Discord). Ліниві розширення ще не завантажені,
+        тому замість їхніх команд враховується їхній код"""
+        payload = sorted(
+            (command.to_dict() for command in self.tree.get_commands()),
+            key=lambda command: (command.get('type', 1), command['name'])
+        )
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        digest = hashlib.sha256(raw.encode('utf-8'))
+        for name in sorted(LAZY_EXTENSIONS):
+            if name not in self.extensions:
+                with open(importlib.util.find_spec(name).origin, 'rb') as f:
+                    digest.update(f.read())
+        return digest.hexdigest()
+    
+    async def sync_commands(self):
+        """Синхронізує команди лише якщо дерево змінилося з моменту останньої синхронізації"""
+        guild = discord.Object(id=int(SYNC_GUILD_ID)) if SYNC_GUILD_ID else None
+        scope = f"{self.application_id}:{guild.id if guild else 'global'}"
+        current_hash = self.command_tree_hash()
+        
+        try:
+            with open(COMMAND_HASH_FILE, 'r') as f:
+                hashes = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            hashes = {}
+        
+        if not FORCE_COMMAND_SYNC and hashes.get(scope) == current_hash:
+            print("Команди не змінилися, синхронізацію пропущено")
+            return
+        
+        # Для синхронізації потрібне повне дерево команд
+        for name in LAZY_EXTENSIONS:
+            await self.load_lazy_extension(name)
+        if guild:
+            self.tree.copy_global_to(guild=guild)
+        
+        print("Syncing commands...")
+        try:
+            started = time.perf_counter()
+            synced = await self.tree.sync(guild=guild)
+            print(f"Синхронізовано {len(synced)} команд ({'сервер ' + str(guild.id) if guild else 'глобально'}) "
+                  f"за {time.perf_counter() - started:.2f}с")
+        except Exception as e:
+            print(f"Failed to sync commands: {e}")
+            return
+        
+        hashes[scope] = current_hash
+        with open(COMMAND_HASH_FILE, 'w') as f:
+            json.dump(hashes, f)
+        
+    async def on_ready(self):
+        print(f'{self.user} has connected to Discord!')
+        print(f'Slash commands synced to {len(self.guilds)} guild(s)')
+        print(f'Bot invite link: https://discord.com/api/oauth2/authorize?client_id={self.user.id}&permissions=8&scope=bot%20applications.commands')
+
+class WargamingAPI:
+    """Клієнт одного регіону: власний пул з'єднань і квота запитів за секунду"""
+    def __init__(self, api_key, base, rps=0, connections=WG_REALM_CONNECTIONS):
+        self.api_key = api_key
+        self.base = base
+        self.rps = rps
+        self.connections = connections
+        self.session = None
+        self.next_slot = 0.0
+        self.breakers = defaultdict(lambda: resilience.CircuitBreaker(WG_BREAKER_FAILURES, WG_BREAKER_COOLDOWN))
+
+    async def get_session(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connections))
+        return self.session
+
+    async def throttle(self):
+        """Рівномірно розподіляє запити в межах квоти регіону"""
+        if not self.rps:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + 1 / self.rps
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def make_request(self, endpoint, params=None):
+        """GET з тайм-аутом від бюджету команди, необов'язковим дублем і запобіжником ендпоінта.
+        Збої мережі, тайм-аути та помилки сервера піднімаються як resilience.UpstreamError"""
+        if params is None:
+            params = {}
+        params['application_id'] = self.api_key
+        
+        breaker = self.breakers[endpoint]
+        try:
+            probe = breaker.check()
+        except resilience.CircuitOpen:
+            metrics.wg_circuit_rejections.inc(endpoint)
+            raise
+        try:
+            timeout = resilience.attempt_timeout(WG_REQUEST_TIMEOUT)
+        except resilience.UpstreamError:
+            if probe:
+                breaker.probing = False
+            raise
+        try:
+            if WG_HEDGE_MS and timeout > WG_HEDGE_MS / 1000:
+                data = await resilience.hedged(lambda: self.fetch(endpoint, params), WG_HEDGE_MS / 1000, timeout,
+                                               on_hedge=lambda: metrics.wg_hedged_requests.inc(endpoint))
+            else:
+                data = await asyncio.wait_for(self.fetch(endpoint, params), timeout)
+        except asyncio.TimeoutError:
+            # Тайм-аут, скорочений бюджетом команди, не свідчить про збій API
+            if timeout >= WG_REQUEST_TIMEOUT:
+                breaker.failure()
+            raise resilience.UpstreamError(f"{endpoint}: немає відповіді за {timeout:.1f}с")
+        except (aiohttp.ClientError, resilience.UpstreamError) as e:
+            # Помилки мережі та відповіді 5xx
+            breaker.failure()
+            raise resilience.UpstreamError(f"{endpoint}: {e}") from e
+        except ValueError as e:
+            raise resilience.UpstreamError(f"{endpoint}: {e}") from e
+        else:
+            breaker.success()
+        finally:
+            # Пробну спробу знімає лише запит, який її почав
+            if probe:
+                breaker.probing = False
+        return data
+
+    async def fetch(self, endpoint, params):
+        """Одна спроба запиту"""
+        await self.throttle()
+        scheduler.count_request()
+        session = await self.get_session()
+        started = time.perf_counter()
+        try:
+            async with session.get(f"{self.base}/{endpoint}/", params=params) as response:
+                body = await response.read()
+        except Exception:
+            metrics.wg_responses.inc(endpoint, 'none', 'exception')
+            raise
+        finally:
+            metrics.wg_request_duration.observe(time.perf_counter() - started, endpoint)
+        
+        metrics.wg_response_size.observe(len(body), endpoint)
+        if response.status >= 500:
+            # Тіло 5xx часто не JSON (сторінка проксі), тому статус перевіряється до розбору
+            metrics.wg_responses.inc(endpoint, str(response.status), 'unknown')
+            raise resilience.UpstreamError(f"HTTP {response.status}")
+        try:
+            data = json.loads(body)
+        except ValueError:
+            metrics.wg_responses.inc(endpoint, str(response.status), 'exception')
+            raise
+        metrics.wg_responses.inc(endpoint, str(response.status), data.get('status', 'unknown'))
+        return data
+
+bot = WoTClanBot()
+wg_apis = {realm: WargamingAPI(WARGAMING_API_KEY, base, WG_REALM_RPS) for realm, base in clans.REALMS.items()}
+rating_engine = None  # Ліниво створюється розширенням Wargaming
+shared_store = store.SharedStore(SHARED_STORE_DIR)
+stale_cache = store.SharedStore(STALE_CACHE_DIR)
+refresh_scheduler = scheduler.RefreshScheduler(lambda realm: wg_apis[realm].rps if realm in wg_apis else 0,
+                                               SCHEDULER_QUOTA_SHARE)
+command_jobs = jobs.JobQueue(COMMAND_JOB_CONCURRENCY, COMMAND_JOBS_PER_USER)
+lazy_commands = {command: extension for extension, names in LAZY_EXTENSIONS.items() for command in names}
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+# Відстежувані клани
+tracked_clans = {}  # 'регіон:ID' -> clans.Clan
+guild_clans = {}  # str(guild_id) -> {'clan': 'регіон:ID', 'tag'}
+
+def get_clan(key):
+    """Клан за ключем регіон:ID; невідомий клан додається до відстежуваних"""
+    realm, clan_id = clans.parse_clan_key(key)
+    clan = tracked_clans.get(f"{realm}:{clan_id}")
+    if clan is None:
+        root, ext = os.path.splitext(TANK_INVENTORY_FILE)
+        board_root, board_ext = os.path.splitext(LEADERBOARD_FILE)
+        feed_root, feed_ext = os.path.splitext(ACHIEVEMENT_FEED_FILE)
+        clan = clans.Clan(realm, clan_id, wg_apis[realm], TIMESERIES_DIR, f"{root}_{clan_id}{ext}",
+                          f"{board_root}_{clan_id}{board_ext}", f"{feed_root}_{clan_id}{feed_ext}")
+        clan.load_inventory()
+        clan.load_leaderboards()
+        clan.load_feed()
+        tracked_clans[clan.key] = clan
+    return clan
+
+def load_clans():
+    """Клани з CLANS та з налаштувань серверів"""
+    guild_clans.update(load_guild_clans())
+    for key in CLANS:
+        get_clan(key)
+    for config in guild_clans.values():
+        get_clan(config['clan']).tag = config.get('tag')
+
+def guild_clan(guild_id):
+    """Клан сервера; без налаштування - перший клан з CLANS"""
+    config = guild_clans.get(str(guild_id)) if guild_id else None
+    return get_clan(config['clan'] if config else CLANS[0])
+
+def find_clan(value):
+    """Відстежуваний клан за тегом, ID або регіон:ID"""
+    return next((clan for clan in tracked_clans.values() if clan.matches(value)), None)
+
+async def close_wg_apis():
+    for api in wg_apis.values():
+        await api.close()
+
+# Системи відстеження
+# Час зберігається в epoch-секундах, учасники - в масивах за ID (tracking.IdArray)
+voice_time_tracker = defaultdict(tracking.IdArray)  # guild_id -> member_id -> час входу в канал неактивних
+tracked_channels = {}
+warning_sent = defaultdict(set)  # guild_id -> ID попереджених учасників
+voice_activity = tracking.IdArray()  # member_id -> секунд у голосових каналах
+last_activity_update = {}  # shard_id -> час останнього оновлення
+
+# Ліниво завантажені учасники (MEMBER_CACHE_POLICY != all)
+lazily_chunked = {}  # guild_id -> час останнього використання
+chunk_locks = defaultdict(asyncio.Lock)
+
+# Система ролей за запрошеннями
+invite_roles = {}
+invite_cache = {}
+deleted_invites = {}  # Нещодавно видалені запрошення (одноразові видаляються одразу після входу)
+invite_locks = defaultdict(asyncio.Lock)
+
+# Ролі за складом клану
+roster_roles = {}  # guild_id -> {звання або 'member': role_id}
+roster_snapshots = {}  # guild_id -> {'clan', 'at', 'members': {account_id: [нікнейм, звання]}}
+roster_locks = defaultdict(asyncio.Lock)
+
+# Стрічка досягнень
+achievement_channels = {}  # guild_id -> {'channel': channel_id, 'at': час останнього доставленого зведення}
+achievement_encyclopedia = feed.Encyclopedia()
+encyclopedia_lock = asyncio.Lock()
+
+# Прив'язані акаунти Wargaming
+account_links = {}  # user_id -> {'realm', 'account_id', 'nickname', 'guild_id'}
+account_dashboards = {}  # 'регіон:account_id' -> дані для /me, оновлюються фоново
+vehicle_names = {}  # tank_id -> [назва, рівень]
+
+# Система привітальних повідомлень
+welcome_messages = {}
+
+# Система сповіщень
+notification_channels = {}
+
+# Система мутів
+muted_users = {}  # guild_id -> tracking.GuildMutes
+mute_roles = {}
+
+def load_notification_data():
+    try:
+        with open('notification_channels.json', 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_notification_data():
+    write_shared_state('notification_channels.json', notification_channels,
+                       guild_of=lambda key, value: value['guild_id'])
+
+def owns_guild(guild_id):
+    """Чи обслуговує цей процес сервер (при запуску частини шардів окремим процесом)"""
+    if not (AUTO_SHARD and SHARD_IDS and SHARD_COUNT):
+        return True
+    return (int(guild_id) >> 22) % SHARD_COUNT in SHARD_IDS
+
+def write_shared_state(path, data, guild_of=lambda key, value: key):
+    """Записує JSON-стан; у багатопроцесному режимі зберігає записи інших процесів"""
+    if not (AUTO_SHARD and SHARD_IDS and SHARD_COUNT):
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return
+    
+    import fcntl
+    with open(f"{path}.lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(path, 'r') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        merged = {k: v for k, v in stored.items() if not owns_guild(guild_of(k, v))}
+        merged.update({k: v for k, v in data.items() if owns_guild(guild_of(k, v))})
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(merged, f)
+        os.replace(f"{path}.tmp", path)
+
+def load_guild_clans():
+    try:
+        with open(GUILD_CLANS_FILE, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_guild_clans():
+    write_shared_state(GUILD_CLANS_FILE, guild_clans)
+
+def load_invite_role_data():
+    try:
+        with open('invite_roles.json', 'r') as f:
+            data = json.load(f)
+            return {int(k): v for k, v in data.items()}  # Конвертуємо ключі в int
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_invite_role_data():
+    data = {str(k): v for k, v in invite_roles.items()}
+    write_shared_state('invite_roles.json', data)
+
+def load_roster_role_data():
+    try:
+        with open('roster_roles.json', 'r') as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_roster_role_data():
+    write_shared_state('roster_roles.json', {str(k): v for k, v in roster_roles.items()})
+
+def load_roster_snapshots():
+    try:
+        with open('roster_snapshots.json', 'r') as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_roster_snapshots():
+    write_shared_state('roster_snapshots.json', {str(k): v for k, v in roster_snapshots.items()})
+
+def load_achievement_channels():
+    try:
+        with open('achievement_channels.json', 'r') as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_achievement_channels():
+    write_shared_state('achievement_channels.json', {str(k): v for k, v in achievement_channels.items()})
+
+def load_account_links():
+    try:
+        with open('account_links.json', 'r') as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_account_links():
+    # Прив'язка належить процесу, що обслуговує сервер, на якому її створено
+    write_shared_state('account_links.json', {str(k): v for k, v in account_links.items()},
+                       guild_of=lambda key, value: value['guild_id'])
+
+def load_persisted_state():
+    """Читає весь збережений стан (у потоці, паралельно зі входом у Discord); повертає (стан, секунд)"""
+    started = time.perf_counter()
+    load_clans()
+    state = {
+        'invite_roles': load_invite_role_data(),
+        'roster_roles': load_roster_role_data(),
+        'roster_snapshots': load_roster_snapshots(),
+        'achievement_channels': load_achievement_channels(),
+        'account_links': load_account_links(),
+        'notification_channels': load_notification_data(),
+        'muted_users': load_mute_data(),
+    }
+    return state, time.perf_counter() - started
+
+def apply_persisted_state(state):
+    invite_roles.update(state['invite_roles'])
+    roster_roles.update(state['roster_roles'])
+    roster_snapshots.update(state['roster_snapshots'])
+    achievement_channels.update(state['achievement_channels'])
+    account_links.update(state['account_links'])
+    notification_channels.update(state['notification_channels'])
+    muted_users.update(state['muted_users'])
+
+def log_startup():
+    total = time.time() - PROCESS_STARTED
+    phases = ', '.join(f"{name} {seconds:.2f}с" for name, seconds in startup_phases.items())
+    print(f"Холодний старт до READY: {total:.2f}с ({phases})")
+
+def load_mute_data():
+    try:
+        with open('mute_data.json', 'r') as f:
+            data = json.load(f)
+            return {int(k): tracking.GuildMutes.from_dict(v) for k, v in data.items()}  # Конвертуємо ключі в int
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_mute_data():
+    # Конвертуємо ключі в str для JSON серіалізації
+    data = {str(k): v.to_dict() for k, v in muted_users.items()}
+    write_shared_state('mute_data.json', data)
+
+ready_count = 0
+
+@bot.event
+async def on_ready():
+    # on_ready викликається і при кожному перепідключенні до шлюзу
+    global ready_count
+    ready_count += 1
+    if ready_count > 1:
+        print(f'Бот {bot.user} перепідключився (#{ready_count - 1})')
+    else:
+        startup_phases['шлюз до READY'] = time.perf_counter() - bot.gateway_started
+        print(f'Бот {bot.user} онлайн!')
+        log_startup()
+        print(f"Кеш учасників: {MEMBER_CACHE_POLICY}, {sum(len(g.members) for g in bot.guilds)} учасників, "
+              f"RSS {resident_memory_mb():.1f} МБ")
+        if MEMBER_CACHE_POLICY == 'none':
+            # Без кешу учасників голосові канали завжди порожні
+            print("Увага: MEMBER_CACHE_POLICY=none вимикає облік часу в голосових каналах "
+                  "та попередження/відключення неактивних; для них потрібен режим voice або all")
+        
+        # Встановлюємо київський час для логування (pytz потрібен лише тут)
+        import pytz
+        kyiv_tz = pytz.timezone('Europe/Kiev')
+        now = datetime.now(kyiv_tz)
+        print(f"Поточний час (Київ): {now}")
+    
+    for shard_id in (bot.shards if AUTO_SHARD else [None]):
+        start_shard_scheduler(shard_id)
+
+@bot.event
+async def on_app_command_completion(interaction, command):
+    observe_command(interaction, command)
+
+@bot.event
+async def on_socket_event_type(event_type):
+    metrics.gateway_events.inc(event_type)
+
+@bot.event
+async def on_shard_ready(shard_id):
+    # Шарди стартують незалежно, тому задачі шарда запускаються одразу
+    print(f"Шард {shard_id} готовий")
+    start_shard_scheduler(shard_id)
+
+def resident_memory_mb():
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+async def ensure_members_cached(guild):
+    """Завантажує всіх учасників сервера при першому використанні (режим економії пам'яті)"""
+    if MEMBER_CACHE_POLICY == 'all':
+        return
+    lazily_chunked[guild.id] = time.monotonic()
+    
+    async with chunk_locks[guild.id]:
+        if guild.chunked:
+            return
+        rss_before = resident_memory_mb()
+        started = time.perf_counter()
+        await guild.chunk()
+        print(f"Завантажено {len(guild.members)} учасників сервера {guild.name} за {time.perf_counter() - started:.2f}с, "
+              f"RSS {rss_before:.1f} -> {resident_memory_mb():.1f} МБ")
+
+async def evict_idle_members(shard_id=None):
+    """Видаляє з кешу ліниво завантажених учасників серверів, де /dis_stat давно не використовувався"""
+    if MEMBER_CACHE_POLICY == 'all':
+        return
+    now = time.monotonic()
+    for guild in shard_guilds(shard_id):
+        last_used = lazily_chunked.get(guild.id)
+        if last_used is None or now - last_used < MEMBER_CACHE_IDLE_MINUTES * 60:
+            continue
+        
+        del lazily_chunked[guild.id]
+        # discord.py не має публічного API для витіснення учасників з кешу; приватний метод перевіряється,
+        # бо може зникнути при оновленні (версія закріплена в requirements.txt)
+        if not hasattr(guild, '_remove_member'):
+            print("Увага: ця версія discord.py не підтримує витіснення учасників з кешу, "
+                  "ліниво завантажені учасники лишаються в пам'яті")
+            continue
+        rss_before = resident_memory_mb()
+        evicted = 0
+        for member in list(guild.members):
+            if member.id == bot.user.id or (MEMBER_CACHE_POLICY == 'voice' and member.voice):
+                continue
+            guild._remove_member(member)
+            evicted += 1
+        print(f"Видалено з кешу {evicted} учасників сервера {guild.name}, "
+              f"RSS {rss_before:.1f} -> {resident_memory_mb():.1f} МБ")
+
+def shard_guilds(shard_id):
+    """Сервери, що належать шарду (усі сервери без шардингу)"""
+    if shard_id is None:
+        return list(bot.guilds)
+    return [guild for guild in bot.guilds if guild.shard_id == shard_id]
+
+# Назва -> задача, яку кожну хвилину виконує кожен шард (розширення реєструють свої при завантаженні)
+shard_jobs = {'evict_idle_members': evict_idle_members}
+
+class ShardScheduler:
+    """Фонові задачі одного шарда: кожен шард обробляє лише свої сервери у власних циклах"""
+    
+    def __init__(self, shard_id):
+        self.shard_id = shard_id
+        self.loops = {}
+    
+    def _bind(self, name):
+        async def run():
+            # Після перезавантаження розширення береться нова версія задачі
+            job = shard_jobs.get(name)
+            if job is None:
+                return
+            started = time.perf_counter()
+            try:
+                await job(self.shard_id)
+            finally:
+                metrics.task_duration.observe(time.perf_counter() - started, name, str(self.shard_id))
+        run.__name__ = name
+        return run
+    
+    def start(self):
+        for name in shard_jobs:
+            if name not in self.loops:
+                self.loops[name] = tasks.loop(minutes=1)(self._bind(name))
+            if not self.loops[name].is_running():
+                self.loops[name].start()
+    
+    def stop(self, name=None):
+        for job_name in [name] if name else list(self.loops):
+            loop = self.loops.pop(job_name, None)
+            if loop is not None:
+                # Поточний запуск завершується, нові не починаються
+                loop.stop()
+
+shard_schedulers = {}
+
+def start_shard_scheduler(shard_id):
+    if shard_id not in shard_schedulers:
+        shard_schedulers[shard_id] = ShardScheduler(shard_id)
+    shard_schedulers[shard_id].start()
+
+def register_shard_job(job):
+    shard_jobs[job.__name__] = job
+    for scheduler in shard_schedulers.values():
+        scheduler.start()
+
+def unregister_shard_job(job):
+    shard_jobs.pop(job.__name__, None)
+    for scheduler in shard_schedulers.values():
+        scheduler.stop(job.__name__)
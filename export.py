@@ -0,0 +1,117 @@
+"""Потоковий експорт статистики у стиснені CSV або JSON Lines: рядки -> текст -> gzip -> файли до ліміту розміру.
+
+Кожен етап - генератор, тому пам'ять не залежить від обсягу даних; файли пишуться на диск частинами,
+кожна частина - окремий повний gzip-файл (для CSV - із заголовком), тож її можна відкрити без решти.
+Функції блокуючі: з бота запускати через asyncio.to_thread.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timezone
+
+import leaderboards
+import timeseries
+
+FORMATS = ('csv', 'jsonl')
+# Запас до ліміту частини: gzip віддає стиснені дані блоками, тож розмір файлу відстає від записаного
+PART_MARGIN = 512 * 1024
+
+def iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec='seconds')
+
+# Набори даних: назва -> колонки. Рядки voice - знімок [(member_id, ім'я, секунд)], зроблений у циклі подій
+COLUMNS = {
+    'members': ('date', 'account_id', 'nickname', 'battles', 'wins', 'resources'),
+    'history': ('series', 'time', 'value'),
+    'voice': ('member_id', 'name', 'seconds'),
+    'mutes': ('guild_id', 'member_id', 'unmute_at', 'reason'),
+}
+
+def member_rows(leaderboard_file):
+    """Денні знімки статистики учасників в укріпрайоні (накопичувальні значення на початок дня)"""
+    boards = leaderboards.Leaderboards.load(leaderboard_file)
+    for ts, accounts in boards.snapshots:
+        date = iso(ts)[:10]
+        for account_id, values in accounts.items():
+            yield (date, account_id, boards.names.get(account_id, '')) + tuple(values)
+
+def history_rows(timeseries_dir, prefix=''):
+    """Сирі точки історії метрик клану (рейтинг, укріпрайон), читаються з файлів частинами"""
+    store = timeseries.TimeSeriesStore(timeseries_dir)
+    for series in store.series(prefix):
+        for records in store.chunks(series):
+            for ts, value in zip(records['ts'].tolist(), records['value'].tolist()):
+                yield series, iso(ts), value
+
+def mute_rows(mutes):
+    """mutes: guild_id -> tracking.GuildMutes"""
+    for guild_id, guild_mutes in mutes.items():
+        for member_id, mute in guild_mutes.records.items():
+            yield guild_id, member_id, iso(mute.unmute_at), mute.reason
+
+def encode(rows, columns, fmt):
+    """Рядки -> рядки тексту вибраного формату"""
+    if fmt == 'jsonl':
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n'
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+def header(columns, fmt):
+    return ','.join(columns) + '\n' if fmt == 'csv' else ''
+
+def write_parts(lines, directory, name, fmt, columns, part_bytes):
+    """Пише рядки у стиснені частини не більші за part_bytes; повертає шляхи файлів.
+    Одна частина називається name.fmt.gz, кілька - name-1.fmt.gz, name-2.fmt.gz, ..."""
+    limit = max(part_bytes - PART_MARGIN, part_bytes // 2)
+    paths = []
+    raw = compressed = None
+
+    def next_part():
+        nonlocal raw, compressed
+        close_part()
+        paths.append(os.path.join(directory, f"{name}-{len(paths) + 1}.{fmt}.gz"))
+        raw = open(paths[-1], 'wb')
+        compressed = gzip.GzipFile(fileobj=raw, mode='wb')
+        compressed.write(header(columns, fmt).encode())
+
+    def close_part():
+        if compressed is not None:
+            compressed.close()
+            raw.close()
+
+    try:
+        # Порожній набір все одно дає файл (для CSV - із заголовком)
+        next_part()
+        for line in lines:
+            if raw.tell() >= limit:
+                next_part()
+            compressed.write(line.encode())
+    finally:
+        close_part()
+    if len(paths) == 1:
+        single = os.path.join(directory, f"{name}.{fmt}.gz")
+        os.replace(paths[0], single)
+        paths = [single]
+    return paths
+
+def export(dataset, rows, directory, name, fmt, part_bytes):
+    """Повний конвеєр для набору dataset; повертає (шляхи частин, кількість рядків)"""
+    columns = COLUMNS[dataset]
+    counted = [0]
+
+    def counting(source):
+        for row in source:
+            counted[0] += 1
+            yield row
+
+    paths = write_parts(encode(counting(rows), columns, fmt), directory, name, fmt, columns, part_bytes)
+    return paths, counted[0]
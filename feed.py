@@ -0,0 +1,141 @@
+"""Стрічка досягнень клану: хеш вмісту досягнень кожного гравця, нові медалі й рубежі боїв, зведення для оголошень"""
+import hashlib
+import json
+import os
+import time
+
+DAY = 86400
+DIGEST_DAYS = 7  # Скільки днів зберігаються зведення для серверів, які ще не отримали їх
+# Рубежі боїв: перелічені, далі кожні MILESTONE_STEP
+MILESTONES = (1000, 2500, 5000)
+MILESTONE_STEP = 5000
+# Медалі поза оголошуваними розділами енциклопедії, які все одно варто оголошувати
+EXTRA_NOTABLE = ('markOfMastery',)  # Майстер
+
+def content_hash(achievements):
+    """Короткий хеш досягнень гравця: однаковий хеш - нічого не змінилося, порівнювати медалі не потрібно"""
+    encoded = json.dumps(achievements, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+def milestone(old, new):
+    """Найбільший рубіж боїв, перейдений між old і new, або None"""
+    crossed = [value for value in MILESTONES if old < value <= new]
+    step = new // MILESTONE_STEP * MILESTONE_STEP
+    if step > MILESTONES[-1] and old < step:
+        crossed.append(step)
+    return max(crossed, default=None)
+
+class Encyclopedia:
+    """Локальна копія encyclopedia/achievements: назва медалі -> {'name', 'section'}; оновлюється раз на
+    ENCYCLOPEDIA_DAYS або коли гравець отримав медаль, якої ще немає в копії"""
+    ENCYCLOPEDIA_DAYS = 7
+
+    def __init__(self):
+        self.entries = {}
+        self.fetched_at = None
+
+    def stale(self, now=None):
+        now = now if now is not None else time.time()
+        return self.fetched_at is None or now - self.fetched_at > self.ENCYCLOPEDIA_DAYS * DAY
+
+    def update(self, data, now=None):
+        self.entries = {key: {'name': value['name_i18n'] if value.get('name_i18n') else value['name'],
+                              'section': value.get('section')}
+                        for key, value in data.items() if value is not None}
+        self.fetched_at = now if now is not None else time.time()
+
+    def name(self, key):
+        entry = self.entries.get(key)
+        return entry['name'] if entry else key
+
+    def notable(self, sections):
+        return {key for key, entry in self.entries.items() if entry['section'] in sections} | set(EXTRA_NOTABLE)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'fetched_at': self.fetched_at, 'entries': self.entries}, f)
+
+    @classmethod
+    def load(cls, path):
+        encyclopedia = cls()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            encyclopedia.entries = data.get('entries', {})
+            encyclopedia.fetched_at = data.get('fetched_at')
+        return encyclopedia
+
+class AchievementFeed:
+    """Стан гравців клану між опитуваннями та зведення подій, ще не доставлені на сервери"""
+
+    def __init__(self):
+        self.accounts = {}  # account_id -> [боїв, хеш досягнень, {медаль: кількість} для всіх медалей]
+        self.digests = []  # [[ts, [подія]]] за зростанням часу
+        self.updated_at = None
+
+    def changed(self, battles):
+        """Гравці, чия кількість боїв відрізняється від збереженої: лише їм запитуються досягнення"""
+        return [account_id for account_id, count in battles.items()
+                if account_id not in self.accounts or self.accounts[account_id][0] != count]
+
+    def observe(self, account_id, nickname, battles, achievements, notable):
+        """Оновлює стан гравця і повертає нові події; перший знімок гравця лише запам'ятовується.
+        Кількості зберігаються для всіх медалей, тож медаль, що стала оголошуваною пізніше,
+        дає подію лише на приріст, а не на всю кількість"""
+        digest = content_hash(achievements)
+        previous = self.accounts.get(account_id)
+        self.accounts[account_id] = [battles, digest, dict(achievements)]
+        if previous is None:
+            return []
+
+        events = []
+        reached = milestone(previous[0], battles)
+        if reached is not None:
+            events.append({'nickname': nickname, 'kind': 'battles', 'value': reached})
+        if previous[1] != digest:
+            for key, count in achievements.items():
+                if key not in notable:
+                    continue
+                gained = count - previous[2].get(key, 0)
+                if gained > 0:
+                    events.append({'nickname': nickname, 'kind': 'medal', 'key': key, 'value': gained})
+        return events
+
+    def add_digest(self, events, now=None):
+        now = now if now is not None else time.time()
+        if events:
+            self.digests.append([now, events])
+        self.digests = [digest for digest in self.digests if digest[0] > now - DIGEST_DAYS * DAY]
+        self.updated_at = now
+
+    def pending(self, since):
+        """Події всіх зведень, новіших за since, та час останнього з них"""
+        digests = [digest for digest in self.digests if since is None or digest[0] > since]
+        return [event for _, events in digests for event in events], (digests[-1][0] if digests else since)
+
+    def retain(self, account_ids):
+        """Прибирає гравців, які вийшли з клану"""
+        for account_id in set(self.accounts) - set(account_ids):
+            del self.accounts[account_id]
+
+    def to_dict(self):
+        return {'updated_at': self.updated_at, 'accounts': self.accounts, 'digests': self.digests}
+
+    @classmethod
+    def from_dict(cls, data):
+        feed = cls()
+        feed.accounts = data.get('accounts', {})
+        feed.digests = data.get('digests', [])
+        feed.updated_at = data.get('updated_at')
+        return feed
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
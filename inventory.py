@@ -0,0 +1,106 @@
+"""Інвертований індекс танків клану для підбору складу в укріпрайон"""
+import json
+import os
+from collections import defaultdict
+
+class TankInventory:
+    """tank_id та (рівень, тип) -> гравці та їхні бої на танку; оновлюється лише для гравців, які зіграли нові бої"""
+
+    def __init__(self):
+        self.vehicles = {}  # tank_id -> {'name', 'tier', 'type'}
+        self.accounts = {}  # account_id -> {'last_battle_time', 'tanks': {tank_id: [battles, wins]}}
+        self.by_tank = defaultdict(dict)  # tank_id -> {account_id: [battles, wins]}
+        self.by_class = defaultdict(set)  # (tier, type) -> tank_id
+        self.names = {}  # account_id -> нікнейм
+        self.updated_at = None
+
+    def add_vehicles(self, vehicles):
+        for tank_id, vehicle in vehicles.items():
+            if vehicle is None:
+                continue
+            tank_id = int(tank_id)
+            self.vehicles[tank_id] = {'name': vehicle['name'], 'tier': vehicle['tier'], 'type': vehicle['type']}
+            self.by_class[(vehicle['tier'], vehicle['type'])].add(tank_id)
+
+    def missing_vehicles(self, tank_ids):
+        return sorted({tank_id for tank_id in tank_ids if tank_id not in self.vehicles})
+
+    def changed(self, last_battles):
+        """Гравці, чий час останнього бою відрізняється від проіндексованого"""
+        return [account_id for account_id, last_battle_time in last_battles.items()
+                if account_id not in self.accounts or self.accounts[account_id]['last_battle_time'] != last_battle_time]
+
+    def update(self, account_id, last_battle_time, tanks):
+        """tanks: відповідь account/tanks (tank_id, statistics.battles, statistics.wins)"""
+        self.remove(account_id)
+        own = {tank['tank_id']: [tank['statistics']['battles'], tank['statistics']['wins']] for tank in tanks}
+        self.accounts[account_id] = {'last_battle_time': last_battle_time, 'tanks': own}
+        for tank_id, stats in own.items():
+            self.by_tank[tank_id][account_id] = stats
+
+    def remove(self, account_id):
+        previous = self.accounts.pop(account_id, None)
+        if previous is None:
+            return
+        for tank_id in previous['tanks']:
+            owners = self.by_tank.get(tank_id)
+            if owners is not None:
+                owners.pop(account_id, None)
+                if not owners:
+                    del self.by_tank[tank_id]
+
+    def retain(self, names):
+        """names: account_id -> нікнейм поточного складу; прибирає гравців, які вийшли з клану"""
+        self.names = dict(names)
+        for account_id in set(self.accounts) - set(names):
+            self.remove(account_id)
+
+    def find(self, tier=None, tank_type=None, name=None, min_battles=0):
+        """Повертає [(account_id, tank_id, battles, wins)], відсортовані за боями"""
+        if tier is not None and tank_type is not None:
+            tank_ids = self.by_class.get((tier, tank_type), ())
+        else:
+            tank_ids = [tank_id for (t, kind), ids in self.by_class.items()
+                        if (tier is None or t == tier) and (tank_type is None or kind == tank_type) for tank_id in ids]
+        if name:
+            name = name.lower()
+            tank_ids = [tank_id for tank_id in tank_ids if name in self.vehicles[tank_id]['name'].lower()]
+
+        found = []
+        for tank_id in tank_ids:
+            for account_id, (battles, wins) in self.by_tank.get(tank_id, {}).items():
+                if battles >= min_battles:
+                    found.append((account_id, tank_id, battles, wins))
+        found.sort(key=lambda row: row[2], reverse=True)
+        return found
+
+    def to_dict(self):
+        return {
+            'updated_at': self.updated_at,
+            'names': self.names,
+            'vehicles': self.vehicles,
+            'accounts': self.accounts,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        inventory = cls()
+        inventory.add_vehicles(data['vehicles'])
+        for account_id, account in data['accounts'].items():
+            tanks = [{'tank_id': int(tank_id), 'statistics': {'battles': battles, 'wins': wins}}
+                     for tank_id, (battles, wins) in account['tanks'].items()]
+            inventory.update(int(account_id), account['last_battle_time'], tanks)
+        inventory.names = {int(account_id): name for account_id, name in data.get('names', {}).items()}
+        inventory.updated_at = data.get('updated_at')
+        return inventory
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
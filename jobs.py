@@ -0,0 +1,132 @@
+"""Черга довготривалих задач команд: спільний результат для однакових запитів, загальний ліміт
+паралельності та почергове обслуговування серверів і користувачів"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+import metrics
+
+class QueueFull(Exception):
+    """Користувач вже має максимум задач у черзі"""
+
+class Job:
+    def __init__(self, key, fetch, args, guild_id, user_id):
+        self.key = key
+        self.fetch = fetch
+        self.args = args
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.future = asyncio.get_running_loop().create_future()
+        self.listeners = []  # async callback(position), position 0 - задача виконується
+        self.position = None
+        self.queued_at = time.perf_counter()
+
+class JobQueue:
+    """Однакові задачі (за ключем) виконуються один раз; очікуючі задачі видаються по колу:
+    спершу між серверами, всередині сервера - між користувачами"""
+
+    def __init__(self, concurrency, per_user):
+        self.concurrency = concurrency
+        self.per_user = per_user
+        self.jobs = {}  # key -> Job (у черзі або виконується)
+        self.guilds = OrderedDict()  # guild_id -> OrderedDict(user_id -> deque[Job])
+        self.running = 0
+        self.tasks = set()
+
+    def queued(self):
+        """Очікуючі задачі в порядку, в якому вони будуть запущені"""
+        guilds = deque(deque(deque(jobs) for jobs in users.values()) for users in self.guilds.values())
+        while guilds:
+            users = guilds.popleft()
+            jobs = users.popleft()
+            yield jobs.popleft()
+            if jobs:
+                users.append(jobs)
+            if users:
+                guilds.append(users)
+
+    def queued_by(self, guild_id, user_id):
+        return len(self.guilds.get(guild_id, {}).get(user_id, ()))
+
+    async def submit(self, key, fetch, *args, guild_id=None, user_id=None, on_position=None):
+        """Виконує fetch(*args) через чергу або приєднується до вже запланованої задачі з тим самим ключем"""
+        job = self.jobs.get(key)
+        if job is not None:
+            metrics.command_jobs.inc(key, 'joined')
+        else:
+            if self.queued_by(guild_id, user_id) >= self.per_user:
+                metrics.command_jobs.inc(key, 'rejected')
+                raise QueueFull()
+            job = self.jobs[key] = Job(key, fetch, args, guild_id, user_id)
+            users = self.guilds.setdefault(guild_id, OrderedDict())
+            users.setdefault(user_id, deque()).append(job)
+            metrics.command_jobs.inc(key, 'queued')
+
+        if on_position is not None:
+            job.listeners.append(on_position)
+            if job.position:
+                self.notify(on_position, job.position)
+        self.dispatch()
+        try:
+            # shield: скасування одного запиту не скасовує задачу для інших
+            return await asyncio.shield(job.future)
+        finally:
+            if on_position in job.listeners:
+                job.listeners.remove(on_position)
+
+    def dispatch(self):
+        while self.running < self.concurrency and self.guilds:
+            guild_id, users = next(iter(self.guilds.items()))
+            user_id, jobs = next(iter(users.items()))
+            job = jobs.popleft()
+            # Сервер і користувач переходять у кінець черги
+            if jobs:
+                users.move_to_end(user_id)
+            else:
+                del users[user_id]
+            if users:
+                self.guilds.move_to_end(guild_id)
+            else:
+                del self.guilds[guild_id]
+
+            self.running += 1
+            metrics.command_job_wait.observe(time.perf_counter() - job.queued_at, job.key)
+            if job.position:
+                for listener in job.listeners:
+                    self.notify(listener, 0)
+            job.position = 0
+            task = asyncio.create_task(self.run(job))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+        for position, job in enumerate(self.queued(), 1):
+            if job.position != position:
+                job.position = position
+                for listener in job.listeners:
+                    self.notify(listener, position)
+
+    async def run(self, job):
+        try:
+            job.future.set_result(await job.fetch(*job.args))
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            job.future.set_exception(e)
+            # Виняток отримують очікувачі; якщо їх не лишилось, не засмічуємо лог
+            job.future.exception()
+        finally:
+            del self.jobs[job.key]
+            self.running -= 1
+            self.dispatch()
+
+    def notify(self, listener, position):
+        task = asyncio.create_task(self._notify(listener, position))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _notify(self, listener, position):
+        try:
+            await listener(position)
+        except Exception as e:
+            print(f"Не вдалося показати позицію в черзі: {e}")
@@ -0,0 +1,135 @@
+"""Готові таблиці лідерів клану за кілька вікон днів, що перераховуються при кожному оновленні статистики учасників"""
+import json
+import os
+import time
+
+DAY = 86400
+WINDOWS = (1, 7, 30, 0)  # днів; 0 - за весь час
+TOP_SIZE = 10
+MIN_WINRATE_BATTLES = 10  # Відсоток перемог рахується лише для гравців з достатньою кількістю боїв
+
+# Накопичувальні поля статистики учасника, з яких рахуються всі параметри
+FIELDS = ('battles', 'wins', 'resources')
+
+def winrate(stats):
+    if stats['battles'] < MIN_WINRATE_BATTLES:
+        return None
+    return round(stats['wins'] / stats['battles'] * 100, 2)
+
+# Параметр -> (назва, значення зі статистики за вікно або None, якщо гравець не бере участі).
+# Новий параметр рахується з уже отриманих полів і не потребує додаткових запитів до API
+PARAMETERS = {
+    'battles': ('Боїв', lambda stats: stats['battles']),
+    'wins': ('Перемог', lambda stats: stats['wins']),
+    'resources': ('Промресурс', lambda stats: stats['resources']),
+    'winrate': ('Відсоток перемог', winrate),
+}
+
+class Leaderboards:
+    """Денні знімки накопичувальної статистики учасників і таблиці лідерів, побудовані з різниці знімків"""
+
+    def __init__(self):
+        self.snapshots = []  # [[ts, {account_id: [battles, wins, resources]}]], один на день, за зростанням часу
+        self.boards = {}  # 'параметр/днів' -> {'since': ts, 'rows': [[нікнейм, значення]]}
+        self.names = {}  # account_id -> нікнейм з останнього оновлення (для експорту знімків)
+        self.updated_at = None
+
+    def update(self, member_stats, now=None):
+        """Додає знімок статистики учасників і перераховує всі таблиці"""
+        now = now if now is not None else time.time()
+        current = {str(stats['account_id']): [stats[field] for field in FIELDS] for stats in member_stats}
+        names = {str(stats['account_id']): stats['nickname'] for stats in member_stats}
+        self.names = names
+        # Для вікон у днях вистачає першого знімка кожного дня, решта оновлень лише перераховує таблиці
+        if not self.snapshots or self.snapshots[-1][0] // DAY != now // DAY:
+            self.snapshots.append([now, current])
+        else:
+            # Гравці, яких немає в сьогоднішньому знімку (приєдналися або їхній запит не вдався), додаються до нього.
+            # Знімок замінюється новим словником: save може саме серіалізувати старий в іншому потоці
+            ts, accounts = self.snapshots[-1]
+            missing = {account_id: values for account_id, values in current.items() if account_id not in accounts}
+            if missing:
+                self.snapshots[-1] = [ts, {**accounts, **missing}]
+        self.prune(now)
+        self.materialize(current, names, now)
+
+    def prune(self, now):
+        # Лишається один знімок, старший за найдовше вікно, - база для цього вікна
+        cutoff = now - max(WINDOWS) * DAY
+        while len(self.snapshots) > 1 and self.snapshots[1][0] <= cutoff:
+            self.snapshots.pop(0)
+
+    def baseline(self, days, now):
+        """Останній знімок не пізніше початку вікна, інакше найстаріший наявний"""
+        if not days:
+            return None
+        cutoff = now - days * DAY
+        found = self.snapshots[0]
+        for snapshot in self.snapshots:
+            if snapshot[0] > cutoff:
+                break
+            found = snapshot
+        return found
+
+    def starts(self, base):
+        """Значення гравців на початок вікна: зі знімка base, а для відсутніх у ньому (приєдналися пізніше
+        або їхня статистика тоді не отримана) - з першого знімка, де вони є"""
+        starts = {}
+        for ts, accounts in reversed(self.snapshots):
+            if ts < base[0]:
+                break
+            starts.update(accounts)
+        return starts
+
+    def materialize(self, current, names, now):
+        boards = {}
+        for days in WINDOWS:
+            base = self.baseline(days, now)
+            since = base[0] if base is not None else None
+            starts = self.starts(base) if base is not None else {}
+            window_stats = []
+            for account_id, values in current.items():
+                previous = starts.get(account_id) if base is not None else [0] * len(FIELDS)
+                if previous is None:
+                    # Без знімка гравця накопичена за весь час статистика потрапила б у вікно
+                    continue
+                window_stats.append((names[account_id], {field: value - old for field, value, old
+                                                         in zip(FIELDS, values, previous)}))
+            for parameter, (_, value_of) in PARAMETERS.items():
+                rows = [[nickname, value_of(stats)] for nickname, stats in window_stats]
+                rows = [row for row in rows if row[1] is not None]
+                rows.sort(key=lambda row: row[1], reverse=True)
+                boards[f"{parameter}/{days}"] = {'since': since, 'rows': rows[:TOP_SIZE]}
+        self.boards = boards
+        self.updated_at = now
+
+    def board(self, parameter, days):
+        return self.boards.get(f"{parameter}/{days}")
+
+    def to_dict(self):
+        # Копія списку: prune і update змінюють його в циклі подій, поки save пише файл
+        return {'updated_at': self.updated_at, 'snapshots': list(self.snapshots), 'boards': self.boards,
+                'names': self.names}
+
+    @classmethod
+    def from_dict(cls, data):
+        leaderboards = cls()
+        leaderboards.snapshots = data.get('snapshots', [])
+        leaderboards.boards = data.get('boards', {})
+        leaderboards.names = data.get('names', {})
+        leaderboards.updated_at = data.get('updated_at')
+        return leaderboards
+
+    def save(self, path):
+        """Блокуючий запис (з бота - через asyncio.to_thread); файл замінюється цілком, тож експорт,
+        що читає його з іншого потоку, не побачить недописаний JSON"""
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,144 @@
+"""Метрики бота у текстовому форматі Prometheus (локальний HTTP ендпоінт на aiohttp)"""
+import asyncio
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from aiohttp import web
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values = defaultdict(int)
+
+    def inc(self, *labelvalues, amount=1):
+        self.values[labelvalues] += amount
+
+    def samples(self):
+        for labelvalues, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_number(value)}"
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [лічильники по бакетах (+Inf останній), сума]
+        self.values = {}
+
+    def observe(self, value, *labelvalues):
+        entry = self.values.get(labelvalues)
+        if entry is None:
+            entry = self.values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self):
+        for labelvalues, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{_format_number(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_number(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+registry = []
+
+command_duration = Histogram(
+    'wot_bot_command_duration_seconds', 'Тривалість виконання slash-команд', ('command',))
+command_errors = Counter(
+    'wot_bot_command_errors_total', 'Помилки slash-команд', ('command',))
+wg_request_duration = Histogram(
+    'wot_bot_wg_request_duration_seconds', 'Тривалість запитів до Wargaming API', ('endpoint',))
+wg_response_size = Histogram(
+    'wot_bot_wg_response_bytes', 'Розмір відповідей Wargaming API', ('endpoint',), buckets=SIZE_BUCKETS)
+wg_responses = Counter(
+    'wot_bot_wg_responses_total', 'Відповіді Wargaming API за HTTP та API статусом', ('endpoint', 'http_status', 'status'))
+event_loop_lag = Histogram(
+    'wot_bot_event_loop_lag_seconds', 'Затримка циклу подій asyncio')
+task_duration = Histogram(
+    'wot_bot_task_duration_seconds', 'Тривалість фонових задач', ('task', 'shard'))
+gateway_events = Counter(
+    'wot_bot_gateway_events_total', 'Події шлюзу Discord', ('event',))
+extension_load_duration = Histogram(
+    'wot_bot_extension_load_seconds', 'Тривалість завантаження розширень бота', ('extension',))
+command_jobs = Counter(
+    'wot_bot_command_jobs_total', 'Запити до черги задач команд (queued/joined/rejected)', ('job', 'outcome'))
+command_job_wait = Histogram(
+    'wot_bot_command_job_wait_seconds', 'Час очікування задачі команди в черзі', ('job',))
+roster_role_updates = Counter(
+    'wot_bot_roster_role_updates_total', 'Зміни ролей учасників за складом клану', ('reason',))
+dashboard_requests = Counter(
+    'wot_bot_dashboard_requests_total', 'Виклики /me: відповідь з кешу чи із запитом до API', ('source',))
+achievement_events = Counter(
+    'wot_bot_achievement_events_total', 'Нові медалі та рубежі боїв учасників у стрічці досягнень', ('kind',))
+wg_circuit_rejections = Counter(
+    'wot_bot_wg_circuit_rejections_total', 'Запити, відхилені відкритим запобіжником ендпоінта', ('endpoint',))
+wg_hedged_requests = Counter(
+    'wot_bot_wg_hedged_requests_total', 'Дублі повільних запитів до Wargaming API', ('endpoint',))
+stale_responses = Counter(
+    'wot_bot_stale_responses_total', 'Відповіді команд із збережених даних через недоступність API', ('data',))
+scheduler_job_duration = Histogram(
+    'wot_bot_scheduler_job_seconds', 'Тривалість фонових оновлень кланів у планувальнику', ('job', 'realm'))
+
+def render():
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+async def monitor_event_loop(interval=0.5):
+    """Вимірює, наскільки пізніше запланованого прокидається цикл подій"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(0.0, time.perf_counter() - started - interval))
+
+async def handle_metrics(request):
+    return web.Response(body=render().encode('utf-8'),
+                        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+async def start_server(host, port):
+    """Запускає HTTP сервер з ендпоінтом /metrics"""
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
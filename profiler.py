@@ -0,0 +1,106 @@
+"""Семплюючий профайлер і сторожовий таймер циклу подій"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+ASYNCIO_ROOT = os.path.dirname(os.path.abspath(asyncio.__file__))
+
+def _frame_label(frame):
+    code = frame.f_code
+    path = os.path.normpath(code.co_filename).split(os.sep)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{frame.f_lineno})"
+
+def _stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+def _origin(frame):
+    """Найзовнішній кадр коду бота в межах поточного callback циклу подій: зазвичай обробник slash-команди
+    чи фонова задача, що блокує цикл. Задачу asyncio з іншого потоку публічним API не визначити, тож джерело
+    шукається за стеком: від кадру, що виконується, до Handle._run циклу подій"""
+    origin = None
+    while frame is not None:
+        path = os.path.abspath(frame.f_code.co_filename)
+        if path.startswith(ASYNCIO_ROOT + os.sep) and frame.f_code.co_name == '_run':
+            break
+        if path.startswith(PROJECT_ROOT + os.sep) and 'site-packages' not in path:
+            origin = frame
+        frame = frame.f_back
+    return _frame_label(origin) if origin is not None else "поза кодом бота"
+
+class SamplingProfiler:
+    """Періодично знімає стек потоку циклу подій; результат - згорнуті стеки для flamegraph/speedscope"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+
+    def run(self, duration):
+        """Блокуючий виклик: запускати в окремому потоці"""
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[';'.join(_stack(frame))] += 1
+                self.sample_count += 1
+            del frame
+            time.sleep(self.interval)
+        return self
+
+    def folded(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def top_functions(self, limit=10):
+        """Найчастіші функції на вершині стеку"""
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+class LoopWatchdog:
+    """Логує кожен callback, що блокує цикл подій довше за поріг, разом зі стеком і кодом бота, з якого він почався"""
+
+    def __init__(self, loop, threshold):
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = min(0.1, threshold / 4)
+        self.last_beat = time.monotonic()
+        self.thread_id = None
+        self.stall = None
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.loop.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name='loop-watchdog', daemon=True).start()
+
+    async def _heartbeat(self):
+        while True:
+            self.last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            blocked = time.monotonic() - self.last_beat - self.interval
+            if blocked > self.threshold:
+                if self.stall is None:
+                    # Знімаємо стек, поки блокуючий код ще виконується
+                    frame = sys._current_frames().get(self.thread_id)
+                    self.stall = [_origin(frame), _stack(frame), blocked] if frame else ["невідоме", [], blocked]
+                    del frame
+                self.stall[2] = blocked
+            elif self.stall is not None:
+                origin, stack, duration = self.stall
+                self.stall = None
+                print(f"⚠️ Цикл подій заблоковано щонайменше на {duration:.2f}с (поріг {self.threshold:.2f}с), "
+                      f"джерело: {origin}\n" + ''.join(f"    {label}\n" for label in stack[-15:]), end='')
@@ -0,0 +1,170 @@
+"""WN8 за локальною таблицею очікуваних значень, векторно на NumPy"""
+import json
+
+import numpy as np
+
+# Поля tanks/stats (розділ all), потрібні для WN8
+STAT_FIELDS = ('battles', 'damage_dealt', 'spotted', 'frags', 'dropped_capture_points', 'wins')
+BATTLES, DAMAGE, SPOTTED, FRAGS, DEFENSE, WINS = range(len(STAT_FIELDS))
+EXPECTED_FIELDS = ('expDamage', 'expSpot', 'expFrag', 'expDef', 'expWinRate')
+
+class ExpectedValues:
+    """Таблиця очікуваних значень у форматі XVM/modxvm: {"data": [{"IDNum": ..., "expDamage": ...}, ...]}"""
+
+    def __init__(self, tank_ids, table):
+        order = np.argsort(tank_ids)
+        self.tank_ids = np.asarray(tank_ids, dtype=np.int64)[order]
+        self.table = np.asarray(table, dtype=np.float64)[order]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            rows = json.load(f)['data']
+        if not rows:
+            raise ValueError("таблиця очікуваних значень порожня")
+        return cls([row['IDNum'] for row in rows],
+                   [[float(row[field]) for field in EXPECTED_FIELDS] for row in rows])
+
+    def lookup(self, tank_ids):
+        """Повертає (маска відомих танків, рядки очікуваних значень для них)"""
+        tank_ids = np.asarray(tank_ids, dtype=np.int64)
+        index = np.searchsorted(self.tank_ids, tank_ids)
+        index[index == len(self.tank_ids)] = 0
+        known = self.tank_ids[index] == tank_ids
+        return known, self.table[index[known]]
+
+class TankStats:
+    """Статистика танків одного гравця у вигляді масивів"""
+    __slots__ = ('tank_ids', 'values')
+
+    def __init__(self, tank_ids, values):
+        self.tank_ids = np.asarray(tank_ids, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64).reshape(-1, len(STAT_FIELDS))
+
+    @classmethod
+    def from_api(cls, tanks):
+        """З відповіді tanks/stats (fields=tank_id,all.*)"""
+        return cls([tank['tank_id'] for tank in tanks],
+                   [[tank['all'].get(field, 0) or 0 for field in STAT_FIELDS] for tank in tanks])
+
+    @property
+    def battles(self):
+        return int(self.values[:, BATTLES].sum())
+
+def wn8(damage, spot, frag, defense, win):
+    """Формула WN8 над відношеннями фактичних показників до очікуваних (масиви)"""
+    win_c = np.maximum(0, (win - 0.71) / (1 - 0.71))
+    damage_c = np.maximum(0, (damage - 0.22) / (1 - 0.22))
+    frag_c = np.maximum(0, np.minimum(damage_c + 0.2, (frag - 0.12) / (1 - 0.12)))
+    spot_c = np.maximum(0, np.minimum(damage_c + 0.1, (spot - 0.38) / (1 - 0.38)))
+    def_c = np.maximum(0, np.minimum(damage_c + 0.1, (defense - 0.10) / (1 - 0.10)))
+    return (980 * damage_c + 210 * damage_c * frag_c + 155 * frag_c * spot_c
+            + 75 * def_c * frag_c + 145 * np.minimum(1.8, win_c))
+
+def _ratios(actual, expected):
+    """actual: (n, 6) сумарна статистика, expected: (n, 5) сумарні очікувані значення"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = [
+            actual[:, DAMAGE] / expected[:, 0],
+            actual[:, SPOTTED] / expected[:, 1],
+            actual[:, FRAGS] / expected[:, 2],
+            actual[:, DEFENSE] / expected[:, 3],
+            actual[:, WINS] * 100 / expected[:, 4],
+        ]
+    return [np.nan_to_num(ratio) for ratio in ratios]
+
+class AccountRating:
+    __slots__ = ('key', 'stats', 'overall', 'tanks')
+
+    def __init__(self, key, stats, overall, tanks):
+        self.key = key  # кількість боїв, при якій рахувався рейтинг
+        self.stats = stats
+        self.overall = overall
+        self.tanks = tanks  # tank_id -> WN8 танка
+
+class RatingEngine:
+    """Рахує WN8 для багатьох гравців за один прохід; результат кешується до зміни кількості боїв"""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.cache = {}
+
+    def cached(self, account_id, key):
+        rating = self.cache.get(account_id)
+        if rating is None or rating.key != key:
+            return None
+        return rating
+
+    def rate(self, accounts, keys=None):
+        """accounts: account_id -> TankStats, keys: account_id -> кількість боїв для перевірки кешу
+        (за замовчуванням сума боїв зі статистики). Повертає account_id -> AccountRating"""
+        keys = keys or {}
+        results = {}
+        pending = {}
+        for account_id, stats in accounts.items():
+            key = keys.get(account_id, stats.battles)
+            rating = self.cached(account_id, key)
+            if rating is not None:
+                results[account_id] = rating
+            else:
+                pending[account_id] = stats
+        if not pending:
+            return results
+
+        account_ids = list(pending)
+        owners = np.concatenate([np.full(len(pending[a].tank_ids), i) for i, a in enumerate(account_ids)])
+        tank_ids = np.concatenate([pending[a].tank_ids for a in account_ids])
+        values = np.concatenate([pending[a].values for a in account_ids])
+
+        known, expected = self.expected.lookup(tank_ids)
+        owners, tank_ids, values = owners[known], tank_ids[known], values[known]
+        battles = values[:, BATTLES:BATTLES + 1]
+        expected_totals = expected * battles
+
+        # WN8 кожного танка
+        tank_wn8 = wn8(*_ratios(values, expected_totals))
+        tank_wn8[battles[:, 0] == 0] = 0
+
+        # Загальний WN8 гравця: суми по всіх його танках
+        count = len(account_ids)
+        actual_sum = np.stack([np.bincount(owners, weights=values[:, i], minlength=count)
+                               for i in range(len(STAT_FIELDS))], axis=1)
+        expected_sum = np.stack([np.bincount(owners, weights=expected_totals[:, i], minlength=count)
+                                 for i in range(len(EXPECTED_FIELDS))], axis=1)
+        overall = wn8(*_ratios(actual_sum, expected_sum))
+
+        # owners відсортовані, тож танки кожного гравця - суцільний відрізок
+        bounds = np.searchsorted(owners, np.arange(count + 1))
+        for i, account_id in enumerate(account_ids):
+            start, end = bounds[i], bounds[i + 1]
+            rating = AccountRating(
+                keys.get(account_id, pending[account_id].battles),
+                pending[account_id],
+                float(overall[i]) if actual_sum[i, BATTLES] else 0.0,
+                dict(zip(tank_ids[start:end].tolist(), tank_wn8[start:end].tolist()))
+            )
+            self.cache[account_id] = results[account_id] = rating
+        return results
+
+    def combined(self, ratings):
+        """WN8 групи гравців (клану) як одного гравця з сумарною статистикою"""
+        stats = [rating.stats for rating in ratings if len(rating.stats.tank_ids)]
+        if not stats:
+            return 0.0
+        tank_ids = np.concatenate([s.tank_ids for s in stats])
+        values = np.concatenate([s.values for s in stats])
+        known, expected = self.expected.lookup(tank_ids)
+        values = values[known]
+        actual_sum = values.sum(axis=0, keepdims=True)
+        expected_sum = (expected * values[:, BATTLES:BATTLES + 1]).sum(axis=0, keepdims=True)
+        if not actual_sum[0, BATTLES]:
+            return 0.0
+        return float(wn8(*_ratios(actual_sum, expected_sum))[0])
+
+def wn8_color(value):
+    """Колір шкали WN8 для embed"""
+    for threshold, color in ((2900, 0x5a3175), (2450, 0x83579d), (2000, 0x3972c6), (1600, 0x4099bf),
+                             (1200, 0x4d7326), (900, 0x849b24), (600, 0xccb800), (300, 0xcc7a00)):
+        if value >= threshold:
+            return color
+    return 0x930d0d
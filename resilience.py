@@ -0,0 +1,84 @@
+"""Захист від повільного Wargaming API: бюджет часу команди, запобіжник на ендпоінт та дубльовані запити"""
+import asyncio
+import contextvars
+import time
+
+# Момент (час циклу подій), до якого поточна команда має отримати всі відповіді; None - без обмеження
+deadline = contextvars.ContextVar('wg_deadline', default=None)
+
+class UpstreamError(Exception):
+    """Wargaming API не відповів вчасно або повернув помилку сервера"""
+
+class CircuitOpen(UpstreamError):
+    """Запити до ендпоінта тимчасово не надсилаються після серії помилок"""
+
+def start_budget(seconds):
+    """Задає бюджет часу поточній задачі (і задачам, які вона створить); None знімає обмеження"""
+    deadline.set(asyncio.get_running_loop().time() + seconds if seconds is not None else None)
+
+def remaining():
+    end = deadline.get()
+    return None if end is None else end - asyncio.get_running_loop().time()
+
+def attempt_timeout(limit):
+    """Тайм-аут одного запиту: не більше limit і не більше залишку бюджету"""
+    left = remaining()
+    if left is None:
+        return limit
+    if left <= 0:
+        raise UpstreamError("вичерпано час на відповідь")
+    return min(limit, left)
+
+class CircuitBreaker:
+    """Після failures помилок поспіль запити відхиляються одразу; через cooldown секунд
+    пропускається одна пробна спроба, успіх якої знову відкриває доступ"""
+
+    def __init__(self, failures, cooldown):
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def check(self):
+        """Піднімає CircuitOpen, якщо запит не можна пропустити; True - запит є пробною спробою"""
+        if self.opened_at is None:
+            return False
+        if self.probing or time.monotonic() - self.opened_at < self.cooldown:
+            raise CircuitOpen("Wargaming API тимчасово недоступне")
+        self.probing = True
+        return True
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+async def hedged(attempt, delay, timeout, on_hedge=None):
+    """Якщо перша спроба не відповіла за delay секунд, запускає другу; повертає першу успішну відповідь"""
+    end = asyncio.get_running_loop().time() + timeout
+    tasks = {asyncio.create_task(attempt())}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=min(delay, timeout))
+        if not done:
+            if on_hedge is not None:
+                on_hedge()
+            tasks.add(asyncio.create_task(attempt()))
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, timeout=max(0.0, end - asyncio.get_running_loop().time()),
+                                             return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError()
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
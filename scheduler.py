@@ -0,0 +1,124 @@
+"""Спільний планувальник фонових оновлень для багатьох кланів у межах квот запитів регіонів"""
+import asyncio
+import contextvars
+import time
+
+import metrics
+import resilience
+
+PHI = 0.6180339887498949  # Золотий перетин: будь-яка кількість задач рівномірно розходиться по інтервалу
+WARMUP_SECONDS = 60  # Перший запуск всіх задач розподіляється в межах першої хвилини
+
+# Лічильник запитів до API поточної задачі (успадковується задачами, створеними всередині неї)
+request_count = contextvars.ContextVar('wg_request_count', default=None)
+
+def count_request():
+    counter = request_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+class Entry:
+    def __init__(self, name, kind, realm, seconds, job, args, phase):
+        self.name = name
+        self.kind = kind
+        self.realm = realm
+        self.seconds = seconds
+        self.job = job
+        self.args = args
+        self.phase = phase
+        self.added = time.monotonic()
+        self.due = self.added + phase * min(seconds, WARMUP_SECONDS)
+        self.runs = 0
+        self.cost = 0  # Запитів до API за останній запуск
+        self.running = False
+
+class RefreshScheduler:
+    """Періодичні задачі з рівномірно рознесеними фазами. Якщо задачі регіону разом потребують більше
+    за частку share його квоти (запитів/с), інтервали всіх задач регіону пропорційно подовжуються"""
+
+    def __init__(self, quota, share):
+        self.quota = quota  # quota(realm) -> запитів/с (0 - без обмеження)
+        self.share = share
+        self.entries = {}
+        self.added = 0
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.running_tasks = set()
+
+    def add(self, name, kind, realm, minutes, job, *args):
+        """name - унікальна назва задачі, kind - тип задачі для метрик; повторне додавання замінює задачу"""
+        previous = self.entries.get(name)
+        entry = Entry(name, kind, realm, minutes * 60, job, args, (self.added * PHI) % 1)
+        self.added += 1
+        if previous is not None:
+            # Заміна (наприклад після перезавантаження розширення) зберігає розклад і вартість
+            entry.added, entry.due, entry.runs, entry.cost = previous.added, previous.due, previous.runs, previous.cost
+            if previous.running:
+                # Попередній запуск ще триває - наступний лише через інтервал
+                entry.due += entry.seconds
+        self.entries[name] = entry
+        self.wakeup.set()
+
+    def remove(self, name):
+        self.entries.pop(name, None)
+
+    def load(self, realm):
+        """Запитів/с, які потребують задачі регіону за поточних інтервалів"""
+        return sum(entry.cost / entry.seconds for entry in self.entries.values() if entry.realm == realm)
+
+    def stretch(self, realm):
+        quota = self.quota(realm)
+        if not quota:
+            return 1.0
+        return max(1.0, self.load(realm) / (quota * self.share))
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        while True:
+            now = time.monotonic()
+            for entry in list(self.entries.values()):
+                if entry.due <= now and not entry.running:
+                    entry.running = True
+                    task = asyncio.create_task(self.execute(entry))
+                    self.running_tasks.add(task)
+                    task.add_done_callback(self.running_tasks.discard)
+
+            waiting = [entry.due for entry in self.entries.values() if not entry.running]
+            timeout = max(0.0, min(waiting) - time.monotonic()) if waiting else None
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def execute(self, entry):
+        counter = [0]
+        request_count.set(counter)
+        # Фонова задача не успадковує бюджет часу команди, під час якої її було додано
+        resilience.deadline.set(None)
+        started = time.perf_counter()
+        try:
+            await entry.job(*entry.args)
+        except Exception as e:
+            print(f"Помилка задачі {entry.name}: {e}")
+        finally:
+            metrics.scheduler_job_duration.observe(time.perf_counter() - started, entry.kind, entry.realm or '')
+            entry.cost = counter[0]
+            entry.runs += 1
+            entry.running = False
+            period = entry.seconds * self.stretch(entry.realm)
+            if entry.runs == 1:
+                # Після розігріву задача займає свою фазу в повному інтервалі
+                entry.due = entry.added + period * (1 + entry.phase)
+            else:
+                entry.due += period
+            entry.due = max(entry.due, time.monotonic())
+            self.wakeup.set()
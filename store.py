@@ -0,0 +1,43 @@
+"""Спільне сховище готових результатів між процесом-воркером і процесом бота"""
+import json
+import os
+import tempfile
+import time
+
+class SharedStore:
+    """Кожен ключ - окремий JSON-файл, що замінюється атомарно; читач декодує файл лише після зміни"""
+
+    def __init__(self, root):
+        self.root = root
+        self.cache = {}  # key -> (mtime_ns, size, factory, value)
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key.replace('/', '_')}.json")
+
+    def put(self, key, data):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'updated_at': time.time(), 'data': data}, f)
+        os.replace(tmp, self._path(key))
+
+    def get(self, key, factory=None):
+        """Повертає дані ключа (через factory, якщо задано) або None, якщо воркер їх ще не записав"""
+        try:
+            stat = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        cached = self.cache.get(key)
+        if cached and cached[:3] == (stat.st_mtime_ns, stat.st_size, factory):
+            return cached[3]
+        with open(self._path(key), 'r') as f:
+            data = json.load(f)['data']
+        value = factory(data) if factory else data
+        self.cache[key] = (stat.st_mtime_ns, stat.st_size, factory, value)
+        return value
+
+    def updated_at(self, key):
+        try:
+            return os.stat(self._path(key)).st_mtime
+        except FileNotFoundError:
+            return None
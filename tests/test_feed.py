@@ -0,0 +1,30 @@
+import feed
+
+
+def test_first_snapshot_is_baseline():
+    state = feed.AchievementFeed()
+    assert state.observe('1', 'Player', 900, {'medalKay': 3}, {'medalKay'}) == []
+
+
+def test_medal_gain_and_milestone():
+    state = feed.AchievementFeed()
+    state.observe('1', 'Player', 900, {'medalKay': 3}, {'medalKay'})
+    events = state.observe('1', 'Player', 1010, {'medalKay': 5, 'newMedal': 1}, {'medalKay', 'newMedal'})
+    assert {'nickname': 'Player', 'kind': 'battles', 'value': 1000} in events
+    assert {'nickname': 'Player', 'kind': 'medal', 'key': 'medalKay', 'value': 2} in events
+    assert {'nickname': 'Player', 'kind': 'medal', 'key': 'newMedal', 'value': 1} in events
+
+
+def test_notable_set_grew():
+    state = feed.AchievementFeed()
+    state.observe('1', 'Player', 900, {'medalKay': 3, 'warrior': 40}, {'medalKay'})
+    # 'warrior' став оголошуваним: без нових медалей подій немає, далі - лише приріст
+    assert state.observe('1', 'Player', 910, {'medalKay': 3, 'warrior': 40}, {'medalKay', 'warrior'}) == []
+    events = state.observe('1', 'Player', 920, {'medalKay': 3, 'warrior': 41}, {'medalKay', 'warrior'})
+    assert events == [{'nickname': 'Player', 'kind': 'medal', 'key': 'warrior', 'value': 1}]
+
+
+def test_non_notable_gain_is_silent():
+    state = feed.AchievementFeed()
+    state.observe('1', 'Player', 900, {'warrior': 40}, set())
+    assert state.observe('1', 'Player', 910, {'warrior': 41}, set()) == []
@@ -0,0 +1,35 @@
+import leaderboards
+
+DAY = leaderboards.DAY
+
+
+def stats(account_id, nickname, battles, wins=0, resources=0):
+    return {'account_id': account_id, 'nickname': nickname, 'battles': battles, 'wins': wins, 'resources': resources}
+
+
+def test_window_counts_difference_from_baseline():
+    boards = leaderboards.Leaderboards()
+    boards.update([stats(1, 'a', 100)], now=10 * DAY)
+    boards.update([stats(1, 'a', 120)], now=11 * DAY)
+    assert boards.board('battles', 7)['rows'] == [['a', 20]]
+    assert boards.board('battles', 0)['rows'] == [['a', 120]]
+
+
+def test_joined_member_starts_from_first_snapshot():
+    boards = leaderboards.Leaderboards()
+    boards.update([stats(1, 'a', 100)], now=10 * DAY)
+    boards.update([stats(1, 'a', 120), stats(2, 'vet', 30000)], now=11 * DAY)
+    assert boards.board('battles', 7)['rows'] == [['a', 20], ['vet', 0]]
+    boards.update([stats(1, 'a', 130), stats(2, 'vet', 30050)], now=12 * DAY)
+    assert boards.board('battles', 7)['rows'] == [['vet', 50], ['a', 30]]
+
+
+def test_member_missing_from_todays_snapshot_joins_it():
+    boards = leaderboards.Leaderboards()
+    boards.update([stats(1, 'a', 100)], now=10 * DAY)
+    # Запит статистики 'b' не вдався під час першого оновлення дня
+    boards.update([stats(1, 'a', 100)], now=11 * DAY)
+    boards.update([stats(1, 'a', 110), stats(2, 'b', 5000)], now=11 * DAY + 3600)
+    assert boards.board('battles', 1)['rows'] == [['a', 10], ['b', 0]]
+    boards.update([stats(1, 'a', 110), stats(2, 'b', 5010)], now=11 * DAY + 7200)
+    assert boards.board('battles', 1)['rows'] == [['a', 10], ['b', 10]]
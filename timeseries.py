@@ -0,0 +1,119 @@
+"""Компактне append-only сховище часових рядів метрик клану з погодинними, денними та тижневими агрегатами"""
+import os
+import struct
+import time
+
+import numpy as np
+
+RAW_DTYPE = np.dtype([('ts', '<i8'), ('value', '<f8')])
+ROLLUP_DTYPE = np.dtype([('ts', '<i8'), ('count', '<i8'), ('sum', '<f8'), ('min', '<f8'), ('max', '<f8'), ('last', '<f8')])
+RAW_RECORD = struct.Struct('<qd')
+ROLLUP_RECORD = struct.Struct('<qqdddd')
+
+# Роздільна здатність -> крок у секундах
+RESOLUTIONS = {'1h': 3600, '1d': 86400, '1w': 7 * 86400}
+WEEK_OFFSET = 4 * 86400  # 1970-01-01 - четвер, тижні починаються з понеділка
+
+def bucket_start(ts, resolution):
+    step = RESOLUTIONS[resolution]
+    offset = WEEK_OFFSET if resolution == '1w' else 0
+    return ts - (ts - offset) % step
+
+class TimeSeriesStore:
+    """Кожен ряд - окремі файли фіксованих записів: сирі точки та агрегати (останній запис оновлюється на місці)"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, series, resolution='raw'):
+        return os.path.join(self.root, f"{series}.{resolution}")
+
+    def append(self, series, value, ts=None):
+        ts = int(ts if ts is not None else time.time())
+        value = float(value)
+        os.makedirs(os.path.dirname(self._path(series)) or '.', exist_ok=True)
+        with open(self._path(series), 'ab') as f:
+            f.write(RAW_RECORD.pack(ts, value))
+        for resolution in RESOLUTIONS:
+            self._update_rollup(self._path(series, resolution), bucket_start(ts, resolution), value)
+
+    def _update_rollup(self, path, bucket, value):
+        mode = 'r+b' if os.path.exists(path) else 'w+b'
+        with open(path, mode) as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell() - f.tell() % ROLLUP_RECORD.size
+            if size:
+                f.seek(size - ROLLUP_RECORD.size)
+                last_ts, count, total, low, high, _ = ROLLUP_RECORD.unpack(f.read(ROLLUP_RECORD.size))
+                if bucket == last_ts:
+                    f.seek(size - ROLLUP_RECORD.size)
+                    f.write(ROLLUP_RECORD.pack(bucket, count + 1, total + value, min(low, value), max(high, value), value))
+                    return
+                if bucket < last_ts:
+                    # Запізніла точка: сирі дані збережено, закритий агрегат не змінюємо
+                    return
+            f.seek(size)
+            f.write(ROLLUP_RECORD.pack(bucket, 1, value, value, value, value))
+
+    def read(self, series, resolution='raw', since=None, until=None):
+        """Записи ряду за проміжок [since, until] (структурований масив numpy)"""
+        dtype = RAW_DTYPE if resolution == 'raw' else ROLLUP_DTYPE
+        path = self._path(series, resolution)
+        if not os.path.exists(path) or os.path.getsize(path) < dtype.itemsize:
+            return np.empty(0, dtype=dtype)
+        data = np.memmap(path, dtype=dtype, mode='r', shape=(os.path.getsize(path) // dtype.itemsize,))
+        # Позначки часу відсортовані, тому вистачає бінарного пошуку
+        start = np.searchsorted(data['ts'], since, side='left') if since is not None else 0
+        end = np.searchsorted(data['ts'], until, side='right') if until is not None else len(data)
+        return np.array(data[start:end])
+
+    def chunks(self, series, size=65536):
+        """Усі сирі записи ряду частинами по size, без читання всього файлу в пам'ять"""
+        path = self._path(series)
+        if not os.path.exists(path) or os.path.getsize(path) < RAW_DTYPE.itemsize:
+            return
+        data = np.memmap(path, dtype=RAW_DTYPE, mode='r', shape=(os.path.getsize(path) // RAW_DTYPE.itemsize,))
+        for start in range(0, len(data), size):
+            yield np.array(data[start:start + size])
+
+    def query(self, series, since, until=None, max_points=400):
+        """Повертає (ts, values) з найдрібнішою роздільною здатністю, що вкладається в max_points"""
+        until = int(until if until is not None else time.time())
+        span = until - since
+        if span <= 2 * 86400:
+            records = self.read(series, 'raw', since, until)
+            return records['ts'], records['value']
+        for resolution, step in RESOLUTIONS.items():
+            if span / step <= max_points or resolution == '1w':
+                records = self.read(series, resolution, bucket_start(since, resolution), until)
+                return records['ts'], records['last']
+
+    def series(self, prefix=''):
+        if not os.path.isdir(self.root):
+            return []
+        names = set()
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith('.raw'):
+                    name = os.path.relpath(os.path.join(dirpath, filename[:-4]), self.root).replace(os.sep, '/')
+                    if name.startswith(prefix):
+                        names.add(name)
+        return sorted(names)
+
+def trend(ts, values):
+    """Зміна та лінійний тренд ряду (за добу)"""
+    if len(values) < 2:
+        return None
+    values = np.asarray(values, dtype=np.float64)
+    days = (np.asarray(ts, dtype=np.float64) - ts[0]) / 86400
+    slope = np.polyfit(days, values, 1)[0] if days[-1] > 0 else 0.0
+    delta = values[-1] - values[0]
+    return {
+        'first': values[0],
+        'last': values[-1],
+        'delta': delta,
+        'pct': delta / values[0] * 100 if values[0] else None,
+        'slope_per_day': slope,
+        'min': values.min(),
+        'max': values.max(),
+    }
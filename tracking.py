@@ -0,0 +1,145 @@
+"""Компактний стан трекерів: числові масиви з ключами-ID учасників і записи зі __slots__ замість словників"""
+from datetime import datetime
+
+import numpy as np
+
+class IdArray:
+    """ID (int64) -> число (float64: секунди або epoch-секунди) у двох відсортованих масивах numpy.
+    Запис займає 16 байт; пошук - бінарний, масові оновлення - векторні"""
+    __slots__ = ('ids', 'values')
+
+    def __init__(self, ids=(), values=()):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        order = np.argsort(self.ids, kind='stable')
+        self.ids, self.values = self.ids[order], self.values[order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _find(self, key):
+        i = int(np.searchsorted(self.ids, key))
+        return i if i < len(self.ids) and self.ids[i] == key else -1
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def get(self, key, default=None):
+        i = self._find(key)
+        return float(self.values[i]) if i >= 0 else default
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        return float(self.values[i])
+
+    def __setitem__(self, key, value):
+        i = int(np.searchsorted(self.ids, key))
+        if i < len(self.ids) and self.ids[i] == key:
+            self.values[i] = value
+        else:
+            self.ids = np.insert(self.ids, i, key)
+            self.values = np.insert(self.values, i, value)
+
+    def pop(self, key, default=None):
+        i = self._find(key)
+        if i < 0:
+            return default
+        value = float(self.values[i])
+        self.ids = np.delete(self.ids, i)
+        self.values = np.delete(self.values, i)
+        return value
+
+    def add_many(self, keys, amount):
+        """Додає amount до значень усіх keys (відсутні починаються з нуля, повтори додаються кілька разів)"""
+        keys, counts = np.unique(np.asarray(keys, dtype=np.int64), return_counts=True)
+        if not len(keys):
+            return
+        index = np.searchsorted(self.ids, keys)
+        found = index < len(self.ids)
+        found[found] = self.ids[index[found]] == keys[found]
+        if not found.all():
+            # Нові ID вставляються одним злиттям відсортованих масивів
+            new = keys[~found]
+            self.ids = np.insert(self.ids, index[~found], new)
+            self.values = np.insert(self.values, index[~found], 0.0)
+            index = np.searchsorted(self.ids, keys)
+        self.values[index] += amount * counts
+
+    def get_many(self, keys, default=0.0):
+        """Значення для масиву keys (default для відсутніх)"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(keys), default)
+        index = np.minimum(np.searchsorted(self.ids, keys), len(self.ids) - 1)
+        return np.where(self.ids[index] == keys, self.values[index], default)
+
+    def below(self, limit):
+        """ID зі значенням не більше limit (наприклад мути, час яких минув)"""
+        return self.ids[self.values <= limit].tolist()
+
+    def items(self):
+        return zip(self.ids.tolist(), self.values.tolist())
+
+class Mute:
+    __slots__ = ('unmute_at', 'role_id', 'reason', 'log_channel', 'original_roles')
+
+    def __init__(self, unmute_at, role_id, reason, log_channel, original_roles):
+        self.unmute_at = unmute_at  # epoch-секунди
+        self.role_id = role_id
+        self.reason = reason
+        self.log_channel = log_channel
+        self.original_roles = tuple(original_roles)
+
+    def to_dict(self):
+        return {'unmute_at': self.unmute_at, 'role_id': self.role_id, 'reason': self.reason,
+                'log_channel': self.log_channel, 'original_roles': list(self.original_roles)}
+
+    @classmethod
+    def from_dict(cls, data):
+        unmute_at = data.get('unmute_at')
+        if unmute_at is None:
+            # Старий формат: ISO-час UTC без часового поясу
+            unmute_at = (datetime.fromisoformat(data['unmute_time']) - datetime(1970, 1, 1)).total_seconds()
+        return cls(unmute_at, data.get('role_id'), data.get('reason'), data.get('log_channel'),
+                   data.get('original_roles', ()))
+
+class GuildMutes:
+    """Мути сервера: записи за ID учасника та масив часу зняття для щохвилинної перевірки без розбору дат"""
+    __slots__ = ('records', 'expiry')
+
+    def __init__(self):
+        self.records = {}  # member_id -> Mute
+        self.expiry = IdArray()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, member_id):
+        return member_id in self.records
+
+    def get(self, member_id):
+        return self.records.get(member_id)
+
+    def add(self, member_id, mute):
+        self.records[member_id] = mute
+        self.expiry[member_id] = mute.unmute_at
+
+    def pop(self, member_id):
+        self.expiry.pop(member_id)
+        return self.records.pop(member_id, None)
+
+    def due(self, now):
+        return self.expiry.below(now)
+
+    def to_dict(self):
+        return {str(member_id): mute.to_dict() for member_id, mute in self.records.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        # Масив часу зняття будується одним сортуванням, а не вставкою кожного запису (add - для окремих мутів)
+        mutes = cls()
+        mutes.records = {int(member_id): Mute.from_dict(mute) for member_id, mute in data.items()}
+        mutes.expiry = IdArray(list(mutes.records), [mute.unmute_at for mute in mutes.records.values()])
+        return mutes
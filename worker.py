@@ -0,0 +1,96 @@
+"""Процес-воркер: опитує Wargaming API, агрегує дані та пише готові результати у спільне сховище.
+
+Бот із INGEST_WORKER=true лише читає ці результати і не звертається до API для кланових команд.
+Оновлення всіх відстежуваних кланів рівномірно розподіляються спільним планувальником у межах квот регіонів.
+Запуск: python worker.py (з тими ж змінними середовища, що й бот)
+"""
+import asyncio
+import os
+
+import core
+from cogs import achievements, roster, wargaming
+
+WORKER_CLAN_MINUTES = int(os.getenv('WORKER_CLAN_MINUTES', '5'))
+WORKER_MEMBERS_MINUTES = int(os.getenv('WORKER_MEMBERS_MINUTES', '15'))
+WORKER_WN8_MINUTES = int(os.getenv('WORKER_WN8_MINUTES', '60'))
+GUILD_CLANS_CHECK_MINUTES = 1
+
+async def ingest_clan(clan):
+    """Інформація про клан, рейтинг, укріпрайон і бої (рейтинг та денна статистика пишуться в історію)"""
+    results = {
+        'clan_info': await wargaming.fetch_clan_info(clan),
+        'clan_ratings': await wargaming.fetch_clan_ratings(clan),
+        'stronghold/day': await wargaming.fetch_stronghold_stats(clan, 'day'),
+        'stronghold/month': await wargaming.fetch_stronghold_stats(clan, 'month'),
+        'clan_battles': await wargaming.fetch_clan_battles(clan),
+    }
+    await asyncio.to_thread(wargaming.record_clan_metrics, clan, results['clan_ratings'], results['stronghold/day'])
+    for name, data in results.items():
+        # Невдалий запит не затирає попередній результат
+        if data is not None:
+            core.shared_store.put(clan.store_key(name), data)
+
+async def ingest_members(clan):
+    """Статистика учасників в укріпрайоні (для /members_activity) та перераховані з неї таблиці лідерів (/top_players)"""
+    member_stats = await wargaming.fetch_member_stats(clan)
+    if member_stats is not None:
+        core.shared_store.put(clan.store_key('member_stats'), member_stats)
+        # Боту потрібні лише готові таблиці, знімки історії лишаються у воркера
+        core.shared_store.put(clan.store_key('leaderboards'),
+                              {'updated_at': clan.leaderboards.updated_at, 'boards': clan.leaderboards.boards})
+
+async def ingest_inventory(clan):
+    if await wargaming.refresh_tank_inventory(clan):
+        core.shared_store.put(clan.store_key('tank_inventory'), clan.inventory.to_dict())
+
+async def ingest_wn8(clan):
+    wn8 = await wargaming.fetch_clan_wn8(clan)
+    if wn8 is not None:
+        core.shared_store.put(clan.store_key('clan_wn8'), wn8)
+
+async def ingest_roster(clan):
+    """Склад клану зі званнями для синхронізації ролей Discord"""
+    members = await roster.fetch_clan_roster(clan)
+    if members is not None:
+        core.shared_store.put(clan.store_key('roster'), members)
+
+async def ingest_feed(clan):
+    """Нові медалі та рубежі боїв учасників; стан гравців лишається у воркера, боту потрібні лише зведення"""
+    if await achievements.refresh_feed(clan):
+        core.shared_store.put(clan.store_key('feed'), {'updated_at': clan.feed.updated_at,
+                                                       'digests': clan.feed.digests})
+
+# назва -> (інтервал у хвилинах, завдання)
+JOBS = {
+    'clan': (WORKER_CLAN_MINUTES, ingest_clan),
+    'members': (WORKER_MEMBERS_MINUTES, ingest_members),
+    'inventory': (core.INVENTORY_REFRESH_MINUTES, ingest_inventory),
+    'wn8': (WORKER_WN8_MINUTES, ingest_wn8),
+    'roster': (core.ROSTER_SYNC_MINUTES, ingest_roster),
+    'feed': (core.ACHIEVEMENT_FEED_MINUTES, ingest_feed),
+}
+
+def schedule_clans():
+    for clan in core.tracked_clans.values():
+        for name, (minutes, job) in JOBS.items():
+            if f"{clan.key}/{name}" not in core.refresh_scheduler.entries:
+                core.refresh_scheduler.add(f"{clan.key}/{name}", name, clan.realm, minutes, job, clan)
+
+async def sync_guild_clans():
+    """Підхоплює клани, які сервери налаштували через /clan_setup після запуску воркера"""
+    core.load_clans()
+    schedule_clans()
+
+async def main():
+    core.load_clans()
+    schedule_clans()
+    core.refresh_scheduler.add('guild_clans', 'guild_clans', None, GUILD_CLANS_CHECK_MINUTES, sync_guild_clans)
+    print(f"Воркер запущено: {len(core.tracked_clans)} кланів, сховище: {core.SHARED_STORE_DIR}")
+    core.refresh_scheduler.start()
+    try:
+        await core.refresh_scheduler.task
+    finally:
+        await core.close_wg_apis()
+
+if __name__ == '__main__':
+    asyncio.run(main())